@@ -0,0 +1,180 @@
+"""Benchmark the pipeline stages on synthetic data sets of several scales.
+
+Each scale is run in a new process, so the peak memory of a scale is not affected by the others.
+The synthetic data sets are produced with ``data_prepper.py`` and reused if they exist.
+
+Usage:
+    benchmark.py run [--scales=<SCALES>] [--to-stage=<STAGE>] [--work-dir=<DIR>] [--output=<FILE>]
+                     [--trace-memory]
+    benchmark.py compare <BASELINE_FILE> <RESULTS_FILE>
+
+Options:
+  --scales=<SCALES>   Comma separated node counts [default: 10000,100000,1000000,10000000].
+  --to-stage=<STAGE>  Stop the pipeline after a stage [default: report].
+  --work-dir=<DIR>    The folder of the synthetic project folders [default: benchmark_data].
+  --output=<FILE>     The results JSON file [default: benchmark_results.json].
+  --trace-memory      Record the peak of the traced (Python and NumPy) memory of each stage with
+                      tracemalloc, this slows down the pipeline.
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, List
+
+import pandas as pd
+from data_prepper import produce_synthetic_data_set
+from docopt import docopt
+
+from onto_merger.data.constants import DIRECTORY_INPUT
+from onto_merger.pipeline.pipeline import Pipeline
+from onto_merger.version import __version__
+
+
+class BenchmarkPipeline(Pipeline):
+    """Pipeline that records the run time and the peak memory of each stage."""
+
+    def __init__(self, project_folder_path: str, to_stage: str, trace_memory: bool):
+        super().__init__(project_folder_path=project_folder_path, to_stage=to_stage)
+        self.trace_memory = trace_memory
+        self.stage_results: List[dict] = []
+
+    def _run_stage(self, stage_name: str, stage: Callable[[], object]) -> None:
+        if stage_name not in self._stages:
+            return
+        if self.trace_memory:
+            reset_traced_peak()
+        start = time.perf_counter()
+        super()._run_stage(stage_name=stage_name, stage=stage)
+        self.stage_results.append(
+            {
+                "stage": stage_name,
+                "elapsed_seconds": round(time.perf_counter() - start, 3),
+                "max_rss_mb": round(get_max_rss_mb(), 1),
+                "traced_peak_mb": (
+                    round(tracemalloc.get_traced_memory()[1] / (1 << 20), 1) if self.trace_memory else None
+                ),
+            }
+        )
+
+
+def reset_traced_peak() -> None:
+    """Resets the peak of the traced memory.
+
+    tracemalloc.reset_peak is only available from Python 3.9, on earlier versions the traces are
+    cleared, so the peak only covers the memory allocated after the reset.
+    """
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.clear_traces()
+
+
+def get_max_rss_mb() -> float:
+    """Returns the peak resident set size of the process so far (in MB)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return max_rss / (1 << 20) if sys.platform == "darwin" else max_rss / (1 << 10)
+
+
+def benchmark_scale(project_folder_path: str, to_stage: str, trace_memory: bool) -> List[dict]:
+    """Runs the pipeline on a project folder, returns the results of the stages (run in a new process)."""
+    if trace_memory:
+        tracemalloc.start()
+    pipeline = BenchmarkPipeline(project_folder_path=project_folder_path, to_stage=to_stage, trace_memory=trace_memory)
+    start = time.perf_counter()
+    pipeline.run_alignment_and_connection_process()
+    return pipeline.stage_results + [
+        {
+            "stage": "total",
+            "elapsed_seconds": round(time.perf_counter() - start, 3),
+            "max_rss_mb": round(get_max_rss_mb(), 1),
+            "traced_peak_mb": None,
+        }
+    ]
+
+
+def get_input_row_counts(project_folder_path: str) -> dict:
+    """Returns the row count of each input table of a project folder."""
+    input_path = os.path.join(project_folder_path, DIRECTORY_INPUT)
+    row_counts = {}
+    for file_name in sorted(os.listdir(input_path)):
+        if file_name.endswith(".csv"):
+            with open(os.path.join(input_path, file_name)) as table_file:
+                row_counts[file_name[: -len(".csv")]] = sum(1 for _ in table_file) - 1
+    return row_counts
+
+
+def run_benchmark(node_counts: List[int], to_stage: str, work_dir: str, output_path: str, trace_memory: bool) -> None:
+    """Runs the pipeline on synthetic data sets of the given node counts, saves the results JSON."""
+    data_sets, results = [], []
+    for node_count in node_counts:
+        project_folder_path = os.path.abspath(os.path.join(work_dir, f"synthetic_{node_count}"))
+        if not os.path.isdir(os.path.join(project_folder_path, DIRECTORY_INPUT)):
+            produce_synthetic_data_set(project_folder_path=project_folder_path, node_count=node_count)
+        data_sets.append({"node_count": node_count, "input_row_counts": get_input_row_counts(project_folder_path)})
+        print(f"Benchmarking {data_sets[-1]}")
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            stage_results = executor.submit(benchmark_scale, project_folder_path, to_stage, trace_memory).result()
+        for stage_result in stage_results:
+            print(f"\t{stage_result}")
+            results.append({"node_count": node_count, **stage_result})
+        # save after each scale, so the results of the smaller scales are kept if a larger one fails
+        with open(output_path, "w") as output_file:
+            json.dump(
+                {
+                    "onto_merger_version": __version__,
+                    "date_time": datetime.now().isoformat(timespec="seconds"),
+                    "python_version": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "to_stage": to_stage,
+                    "data_sets": data_sets,
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+            )
+    print(f"Benchmark results saved to '{output_path}'")
+
+
+def read_benchmark_results(path: str) -> pd.DataFrame:
+    """Reads the stage results of a benchmark result file."""
+    with open(path) as results_file:
+        return pd.DataFrame(json.load(results_file)["results"])
+
+
+def compare_benchmarks(baseline_path: str, results_path: str) -> pd.DataFrame:
+    """Compares the stage run times and peak memory of two benchmark result files."""
+    columns = ["node_count", "stage", "elapsed_seconds", "max_rss_mb"]
+    baseline, results = [read_benchmark_results(path=path)[columns] for path in [baseline_path, results_path]]
+    comparison = baseline.merge(results, on=["node_count", "stage"], how="outer", suffixes=("_baseline", ""))
+    comparison["speedup"] = (comparison["elapsed_seconds_baseline"] / comparison["elapsed_seconds"]).round(2)
+    comparison["max_rss_ratio"] = (comparison["max_rss_mb"] / comparison["max_rss_mb_baseline"]).round(2)
+    return comparison
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    if arguments["run"]:
+        run_benchmark(
+            node_counts=[int(node_count) for node_count in arguments["--scales"].split(",")],
+            to_stage=arguments["--to-stage"],
+            work_dir=arguments["--work-dir"],
+            output_path=arguments["--output"],
+            trace_memory=arguments["--trace-memory"],
+        )
+    else:
+        pd.set_option("display.width", 200)
+        print(
+            compare_benchmarks(
+                baseline_path=arguments["<BASELINE_FILE>"], results_path=arguments["<RESULTS_FILE>"]
+            ).to_string(index=False)
+        )
@@ -1,14 +1,34 @@
-"""Prepare data sets: example, integration test"""
+"""Prepare data sets: example, integration test and synthetic (benchmark) data sets.
+
+Usage:
+    data_prepper.py example
+    data_prepper.py test
+    data_prepper.py synthetic <FOLDER_PATH> [--nodes=<N>] [--namespaces=<N>] [--mapping-density=<D>]
+                              [--obsolete-ratio=<R>] [--hierarchy-depth=<N>] [--seed=<N>]
+
+Options:
+  --nodes=<N>            Number of (current) nodes [default: 10000].
+  --namespaces=<N>       Number of namespaces, including the seed ontology [default: 8].
+  --mapping-density=<D>  Mean number of mappings drawn per node [default: 1.0].
+  --obsolete-ratio=<R>   Number of obsolete nodes relative to the node count [default: 0.01].
+  --hierarchy-depth=<N>  Number of levels of the concept hierarchy [default: 8].
+  --seed=<N>             Random seed [default: 42].
+"""
 
 # mypy: ignore-errors
 
+import json
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
+import numpy as np
 import pandas as pd
+from docopt import docopt
 from pandas import DataFrame
 
+# the alignment package is imported before the data manager, as the pipeline does (circular import)
+from onto_merger.alignment import merge_utils  # noqa: F401
 from onto_merger.analyser import analysis_utils
 from onto_merger.data.constants import (
     COLUMN_DEFAULT_ID,
@@ -16,20 +36,35 @@ from onto_merger.data.constants import (
     COLUMN_RELATION,
     COLUMN_SOURCE_ID,
     COLUMN_TARGET_ID,
+    DIRECTORY_INPUT,
     DIRECTORY_OUTPUT,
     RELATION_RDFS_SUBCLASS_OF,
+    SCHEMA_HIERARCHY_EDGE_TABLE,
+    SCHEMA_MAPPING_TABLE,
+    SCHEMA_NODE_ID_LIST_TABLE,
     TABLE_EDGES_HIERARCHY,
     TABLE_EDGES_HIERARCHY_POST,
     TABLE_MAPPINGS,
     TABLE_MERGES_AGGREGATED,
     TABLE_NODES,
-    TABLE_NODES_CONNECTED_ONLY,
+    TABLE_NODES_CONNECTED_EXC_SEED,
     TABLE_NODES_MERGED,
     TABLE_NODES_OBSOLETE,
 )
 from onto_merger.data.data_manager import DataManager
 from onto_merger.data.dataclasses import DataRepository, NamedTable
 
+# synthetic data sets: the namespace of the seed ontology and the mapping relations
+SYNTHETIC_SEED_NAMESPACE = "SEED"
+SYNTHETIC_RELATION_EQUIVALENCE = "equivalent_to"
+SYNTHETIC_RELATION_XREF = "xref"
+# the ratio of the concepts that the seed ontology (the largest namespace) has a node for
+SYNTHETIC_SEED_CONCEPT_COVERAGE = 0.8
+# the ratio of the mappings that point to a random node instead of the node of the same concept
+SYNTHETIC_MAPPING_NOISE_RATIO = 0.05
+# the ratio of the (correct) mappings that are equivalences, the rest are database references
+SYNTHETIC_EQUIVALENCE_RATIO = 0.7
+
 
 def prune_nodes_by_namespace(nodes_raw: DataFrame,
                              node_namespaces_to_remove: List[str]) -> DataFrame:
@@ -164,10 +199,10 @@ def produce_test_data_set(raw_path: str = "bikg_2022-02-28-4.27.0_disease",
     nodes_merged = pd.read_csv(os.path.abspath(
         f"{raw_path}/{DIRECTORY_OUTPUT}/{TABLE_NODES_MERGED}.csv"))[COLUMN_DEFAULT_ID].tolist()
     nodes_connected = pd.read_csv(os.path.abspath(
-        f"{raw_path}/{DIRECTORY_OUTPUT}/{TABLE_NODES_CONNECTED_ONLY}.csv"))[COLUMN_DEFAULT_ID].tolist()
+        f"{raw_path}/{DIRECTORY_OUTPUT}/{TABLE_NODES_CONNECTED_EXC_SEED}.csv"))[COLUMN_DEFAULT_ID].tolist()
     nodes_to_keep = list(set(nodes_merged + nodes_connected))
     print(f"TABLE_NODES_MERGED = {len(nodes_merged):,d}")
-    print(f"TABLE_NODES_CONNECTED_ONLY {len(nodes_connected):,d}")
+    print(f"TABLE_NODES_CONNECTED_EXC_SEED {len(nodes_connected):,d}")
     print(f"nodes_to_keep {len(nodes_to_keep):,d}")
 
     # prune nodes to map: keep merged, some connected, but reduce overall size significantly
@@ -237,4 +272,192 @@ def produce_test_data_set(raw_path: str = "bikg_2022-02-28-4.27.0_disease",
         .to_csv(os.path.join(test_data_project_path, "edges_hierarchy.csv"), index=False)
 
 
-produce_test_data_set()
+def produce_synthetic_data_set(project_folder_path: str,
+                               node_count: int = 10_000,
+                               namespace_count: int = 8,
+                               mapping_density: float = 1.0,
+                               obsolete_ratio: float = 0.01,
+                               hierarchy_depth: int = 8,
+                               random_seed: int = 42) -> Dict[str, int]:
+    """Produces a reproducible synthetic project folder (input tables and config) of a given scale.
+
+    Nodes represent latent concepts that form a hierarchy: each namespace has a node for a subset of
+    the concepts (the namespace sizes follow a Zipf distribution, the seed ontology is the largest).
+    Mappings connect nodes of the same concept in different namespaces (plus some noise), obsolete
+    nodes are mapped from the current node of their concept, and every other namespace has a
+    hierarchy that follows the concept hierarchy.
+
+    :param project_folder_path: The project folder, the tables are saved to its input folder.
+    :param node_count: The number of (current) nodes.
+    :param namespace_count: The number of namespaces, including the seed ontology.
+    :param mapping_density: The mean number of mappings drawn per node (duplicates, and mappings
+    of concepts that have a single node are dropped).
+    :param obsolete_ratio: The number of obsolete nodes relative to the node count.
+    :param hierarchy_depth: The number of levels of the concept hierarchy.
+    :param random_seed: The random seed.
+    :return: The row counts of the input tables.
+    """
+    rng = np.random.default_rng(random_seed)
+    namespaces = np.array(
+        [SYNTHETIC_SEED_NAMESPACE] + [f"NS{index:02d}" for index in range(1, namespace_count)], dtype=object
+    )
+
+    # (1) nodes: a node is a (namespace, concept) pair, ordered by namespace and concept
+    namespace_weights = 1.0 / np.arange(1, namespace_count + 1)
+    namespace_sizes = np.maximum(np.round(node_count * namespace_weights / namespace_weights.sum()), 1).astype(np.int64)
+    concept_count = int(np.ceil(namespace_sizes[0] / SYNTHETIC_SEED_CONCEPT_COVERAGE))
+    node_namespaces = np.repeat(np.arange(namespace_count), namespace_sizes)
+    # the seed ontology has a node for the root concept
+    seed_concepts = 1 + rng.choice(concept_count - 1, size=namespace_sizes[0] - 1, replace=False)
+    node_concepts = np.concatenate(
+        [np.concatenate([[0], np.sort(seed_concepts)])]
+        + [np.sort(rng.choice(concept_count, size=size, replace=False)) for size in namespace_sizes[1:]]
+    )
+    node_keys = node_namespaces * concept_count + node_concepts
+    node_ids = _produce_synthetic_node_ids(namespaces=namespaces[node_namespaces], local_ids=node_concepts)
+
+    # (2) mappings: to another node of the same concept (plus noise), oriented from the seed ontology
+    sources = np.repeat(np.arange(len(node_keys)), rng.poisson(mapping_density, size=len(node_keys)))
+    nodes_by_concept = np.argsort(node_concepts, kind="stable")
+    concept_starts = np.searchsorted(node_concepts[nodes_by_concept], node_concepts[sources], side="left")
+    concept_sizes = np.searchsorted(node_concepts[nodes_by_concept], node_concepts[sources], side="right") \
+        - concept_starts
+    node_positions = np.empty(len(node_keys), dtype=np.int64)
+    node_positions[nodes_by_concept] = np.arange(len(node_keys))
+    target_positions = concept_starts + (rng.random(len(sources)) * (concept_sizes - 1)).astype(np.int64)
+    target_positions += target_positions >= node_positions[sources]
+    is_noise = rng.random(len(sources)) < SYNTHETIC_MAPPING_NOISE_RATIO
+    targets = np.where(
+        is_noise,
+        rng.integers(0, len(node_keys), size=len(sources)),
+        np.where(concept_sizes > 1, nodes_by_concept[np.minimum(target_positions, len(node_keys) - 1)], -1),
+    )
+    is_kept = (targets != -1) & (node_namespaces[targets] != node_namespaces[sources])
+    sources, targets, is_noise = sources[is_kept], targets[is_kept], is_noise[is_kept]
+    is_swapped = node_namespaces[targets] < node_namespaces[sources]
+    sources, targets = np.where(is_swapped, targets, sources), np.where(is_swapped, sources, targets)
+    _, unique_mappings = np.unique(sources * len(node_keys) + targets, return_index=True)
+    sources, targets, is_noise = sources[unique_mappings], targets[unique_mappings], is_noise[unique_mappings]
+    is_equivalence = ~is_noise & (rng.random(len(sources)) < SYNTHETIC_EQUIVALENCE_RATIO)
+    mappings = pd.DataFrame({
+        COLUMN_SOURCE_ID: node_ids[sources],
+        COLUMN_TARGET_ID: node_ids[targets],
+        COLUMN_RELATION: np.where(is_equivalence, SYNTHETIC_RELATION_EQUIVALENCE, SYNTHETIC_RELATION_XREF),
+        COLUMN_PROVENANCE: namespaces[node_namespaces[sources]],
+    })
+
+    # (3) obsolete nodes: former IDs of the concepts (numbered after the concepts), mapped from the current node
+    obsolete_nodes = np.sort(
+        rng.choice(len(node_keys), size=min(int(round(node_count * obsolete_ratio)), len(node_keys)), replace=False)
+    )
+    obsolete_node_ids = _produce_synthetic_node_ids(
+        namespaces=namespaces[node_namespaces[obsolete_nodes]],
+        local_ids=concept_count + np.arange(len(obsolete_nodes)),
+    )
+    mappings_obsolete = pd.DataFrame({
+        COLUMN_SOURCE_ID: node_ids[obsolete_nodes],
+        COLUMN_TARGET_ID: obsolete_node_ids,
+        COLUMN_RELATION: SYNTHETIC_RELATION_EQUIVALENCE,
+        COLUMN_PROVENANCE: namespaces[node_namespaces[obsolete_nodes]],
+    })
+
+    # (4) hierarchy edges: every other namespace links its nodes to the node of the closest ancestor concept
+    concept_parents = _produce_synthetic_concept_hierarchy(
+        concept_count=concept_count, hierarchy_depth=hierarchy_depth, rng=rng
+    )
+    hierarchy_edges = []
+    for namespace in range(0, namespace_count, 2):
+        namespace_nodes = np.flatnonzero(node_namespaces == namespace)
+        has_node = np.zeros(concept_count, dtype=bool)
+        has_node[node_concepts[namespace_nodes]] = True
+        ancestors = concept_parents[node_concepts[namespace_nodes]]
+        is_missing = (ancestors != -1) & ~has_node[np.maximum(ancestors, 0)]
+        while is_missing.any():
+            ancestors[is_missing] = concept_parents[ancestors[is_missing]]
+            is_missing = (ancestors != -1) & ~has_node[np.maximum(ancestors, 0)]
+        has_parent = ancestors != -1
+        parents = _lookup_synthetic_nodes(
+            node_keys=node_keys, keys=namespace * concept_count + ancestors[has_parent]
+        )
+        hierarchy_edges.append(pd.DataFrame({
+            COLUMN_SOURCE_ID: node_ids[namespace_nodes[has_parent]],
+            COLUMN_TARGET_ID: node_ids[parents],
+            COLUMN_RELATION: RELATION_RDFS_SUBCLASS_OF,
+            COLUMN_PROVENANCE: namespaces[namespace],
+        }))
+
+    # (5) save
+    tables = {
+        TABLE_NODES: pd.DataFrame({COLUMN_DEFAULT_ID: node_ids})[SCHEMA_NODE_ID_LIST_TABLE],
+        TABLE_NODES_OBSOLETE: pd.DataFrame({COLUMN_DEFAULT_ID: obsolete_node_ids})[SCHEMA_NODE_ID_LIST_TABLE],
+        TABLE_MAPPINGS: pd.concat([mappings, mappings_obsolete], ignore_index=True)[SCHEMA_MAPPING_TABLE],
+        TABLE_EDGES_HIERARCHY: pd.concat(hierarchy_edges, ignore_index=True)[SCHEMA_HIERARCHY_EDGE_TABLE],
+    }
+    input_path = os.path.join(os.path.abspath(project_folder_path), DIRECTORY_INPUT)
+    Path(input_path).mkdir(parents=True, exist_ok=True)
+    for table_name, table in tables.items():
+        table.to_csv(os.path.join(input_path, f"{table_name}.csv"), index=False)
+    with open(os.path.join(input_path, "config.json"), "w") as config_file:
+        json.dump(
+            {
+                "domain_node_type": "Disease",
+                "seed_ontology_name": SYNTHETIC_SEED_NAMESPACE,
+                "mappings": {
+                    "type_groups": {
+                        "equivalence": [SYNTHETIC_RELATION_EQUIVALENCE],
+                        "database_reference": [SYNTHETIC_RELATION_XREF],
+                        "label_match": [],
+                    }
+                },
+            },
+            config_file,
+            indent=2,
+        )
+    row_counts = {table_name: len(table) for table_name, table in tables.items()}
+    print(f"Synthetic data set saved to '{input_path}': {row_counts}")
+    return row_counts
+
+
+def _produce_synthetic_node_ids(namespaces: np.ndarray, local_ids: np.ndarray) -> np.ndarray:
+    return (pd.Series(namespaces, dtype=object) + ":"
+            + pd.Series(local_ids).astype(str).str.zfill(8)).to_numpy(dtype=object)
+
+
+def _lookup_synthetic_nodes(node_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Returns the index of the node of each (sorted) node key, -1 if there is no such node."""
+    indices = np.minimum(np.searchsorted(node_keys, keys), len(node_keys) - 1)
+    return np.where(node_keys[indices] == keys, indices, -1)
+
+
+def _produce_synthetic_concept_hierarchy(concept_count: int, hierarchy_depth: int,
+                                         rng: np.random.Generator) -> np.ndarray:
+    """Produces the parent of each concept (-1 for the root concept 0), the level sizes double with each level."""
+    level_weights = np.power(2.0, np.arange(max(hierarchy_depth, 2))) - 1
+    level_starts = np.unique(np.concatenate([
+        [0], 1 + np.round((concept_count - 1) * level_weights / level_weights[-1]).astype(np.int64)
+    ]))
+    concept_levels = np.searchsorted(level_starts, np.arange(concept_count), side="right") - 1
+    parents = np.full(concept_count, -1, dtype=np.int64)
+    has_parent = concept_levels > 0
+    parent_level_starts = level_starts[concept_levels[has_parent] - 1]
+    parent_level_sizes = level_starts[concept_levels[has_parent]] - parent_level_starts
+    parents[has_parent] = parent_level_starts + (rng.random(has_parent.sum()) * parent_level_sizes).astype(np.int64)
+    return parents
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    if arguments["example"]:
+        produce_example_data_set()
+    elif arguments["test"]:
+        produce_test_data_set()
+    else:
+        produce_synthetic_data_set(
+            project_folder_path=arguments["<FOLDER_PATH>"],
+            node_count=int(arguments["--nodes"]),
+            namespace_count=int(arguments["--namespaces"]),
+            mapping_density=float(arguments["--mapping-density"]),
+            obsolete_ratio=float(arguments["--obsolete-ratio"]),
+            hierarchy_depth=int(arguments["--hierarchy-depth"]),
+            random_seed=int(arguments["--seed"]),
+        )
@@ -1,30 +1,34 @@
 """Alignment process runner and helper methods."""
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 from pandas import DataFrame
 
 from onto_merger.alignment import mapping_utils, merge_utils
+from onto_merger.alignment.duckdb_utils import DuckDBMappingStore
 from onto_merger.analyser import analysis_utils
 from onto_merger.data.constants import (
+    COLUMN_DEFAULT_ID,
     COLUMN_MAPPING_TYPE_GROUP,
     COLUMN_NAMESPACE,
     COLUMN_PROVENANCE,
     COLUMN_RELATION,
+    COLUMN_SOURCE_ID,
     COLUMN_SOURCE_ID_ALIGNED_TO,
     COLUMN_STEP_COUNTER,
+    DIRECTORY_INPUT,
     MAPPING_TYPE_GROUP_EQV,
     MAPPING_TYPE_GROUP_XREF,
     ONTO_MERGER,
     RELATION_MERGE,
     SCHEMA_HIERARCHY_EDGE_TABLE,
     SCHEMA_MERGE_TABLE_WITH_META_DATA,
+    TABLE_ENGINE_DUCKDB,
     TABLE_MAPPINGS,
     TABLE_MAPPINGS_FOR_INPUT_NODES,
     TABLE_MAPPINGS_OBSOLETE_TO_CURRENT,
     TABLE_MAPPINGS_UPDATED,
-    TABLE_MERGES_WITH_META_DATA,
     TABLE_NODES,
     TABLE_NODES_OBSOLETE,
 )
@@ -34,6 +38,8 @@ from onto_merger.data.dataclasses import (
     AlignmentStep,
     DataRepository,
     NamedTable,
+    NamespaceIndex,
+    NodeIdDictionary,
     convert_alignment_steps_to_named_table,
 )
 from onto_merger.logger.log import get_logger
@@ -63,9 +69,31 @@ class AlignmentManager:
         # store alignment steps data
         self._alignment_steps: List[AlignmentStep] = []
 
-        # store produced data
+        # the node ID dictionary of the input data, used to index the node and mapping tables by namespace
+        self._node_id_dictionary = data_repo.node_id_dictionary or NodeIdDictionary.from_tables(
+            tables=data_repo.get_input_tables()
+        )
+        self._nodes_namespace_index = NamespaceIndex(
+            table=data_repo.get(TABLE_NODES).dataframe, node_id_dictionary=self._node_id_dictionary
+        )
+        # the mappings for the input nodes, partitioned by (namespace, mapping type group) once,
+        # each alignment step filters its partition for the unmapped nodes
+        self._mapping_partitions: Dict[Tuple[str, str], DataFrame] = {}
+
+        # the DuckDB engine runs the mapping operations out-of-core, in a database file (that
+        # exists while the alignment runs)
+        self._mapping_store: Optional[DuckDBMappingStore] = None
+
+        # unmapped input nodes, indexed by node ID code: updated with the merges of each step
+        self._unmapped_node_mask = np.zeros(len(self._node_id_dictionary), dtype=bool)
+        self._count_input_nodes = 0
+        self._count_unmapped_nodes = 0
+        self._reset_unmapped_nodes()
+
+        # store produced data: the merges of each step are accumulated, and the merge table
+        # is produced after the last step
         self._data_repo_output = DataRepository()
-        self._data_repo_output.update(table=DataManager.produce_empty_merge_table())
+        self._merges = merge_utils.MergeTableAccumulator()
 
     def align_nodes(self) -> Tuple[DataRepository, List[str]]:
         """Run the alignment pipeline.
@@ -75,12 +103,43 @@ class AlignmentManager:
         :return: The output tables in a data repository dataclass, and the source
         alignment order list.
         """
+        if self._alignment_config.base_config.table_engine == TABLE_ENGINE_DUCKDB:
+            self._mapping_store = DuckDBMappingStore(
+                database_file_path=self._data_manager.get_alignment_database_path(),
+                node_id_dictionary=self._node_id_dictionary,
+            )
+        try:
+            source_alignment_order = self._run_alignment_steps()
+        finally:
+            if self._mapping_store is not None:
+                self._mapping_store.close()
+                self._mapping_store = None
+
+        return self._data_repo_output, source_alignment_order
+
+    def _run_alignment_steps(self) -> List[str]:
+        """Run the mapping preprocessing, and the alignment steps for each mapping type group and source.
+
+        Results are stored in the internal data repository.
+
+        :return: The source alignment order list.
+        """
         # prepare for alignment
         self._preprocess_mappings()
-        source_alignment_order = _produce_source_alignment_priority_order(
+        source_alignment_order = produce_source_alignment_priority_order(
             seed_ontology_name=self._alignment_config.base_config.seed_ontology_name,
             nodes=self._data_repo_input.get(TABLE_NODES).dataframe,
         )
+        if self._mapping_store is None:
+            self._mapping_partitions = mapping_utils.produce_mapping_partitions(
+                mappings=self._data_repo_output.get(TABLE_MAPPINGS_FOR_INPUT_NODES).dataframe,
+                namespaces=source_alignment_order,
+                mapping_type_groups={
+                    MAPPING_TYPE_GROUP_EQV: self._alignment_config.mapping_type_groups.equivalence,
+                    MAPPING_TYPE_GROUP_XREF: self._alignment_config.mapping_type_groups.database_reference,
+                },
+                node_id_dictionary=self._node_id_dictionary,
+            )
 
         # (1) use the strongest relations: equivalence
         self._create_initial_step(mapping_type_group_name=MAPPING_TYPE_GROUP_EQV)
@@ -99,22 +158,17 @@ class AlignmentManager:
             start_step=len(source_alignment_order)
         )
 
-        # remove self merges
-        all_merges = self._data_repo_output.get(TABLE_MERGES_WITH_META_DATA).dataframe
-        filtered_merges = pd.concat([
-            all_merges,
-            self._data_repo_output.get("SEED_MERGES").dataframe]).drop_duplicates(keep=False)
-        self._data_repo_output.update(
-            table=NamedTable(TABLE_MERGES_WITH_META_DATA, filtered_merges)
-        )
-        logger.info(f"Filtered out seed self merges ({len(all_merges):,d} -> {len(filtered_merges):,d})")
+        # produce the merge table (without the seed self merges)
+        self._data_repo_output.update(table=self._merges.produce_named_table())
 
         # save meta data
         self._data_repo_output.update(
             table=convert_alignment_steps_to_named_table(alignment_steps=self._alignment_steps)
         )
+        if self._mapping_store is not None:
+            self._data_repo_output.update(tables=self._mapping_store.produce_mapping_tables())
 
-        return self._data_repo_output, source_alignment_order
+        return source_alignment_order
 
     def _align_sources(
             self,
@@ -163,55 +217,47 @@ class AlignmentManager:
         :param mapping_types: The mapping types in the given type group.
         :return: The merge named table for the step, and the step meta data dataclass.
         """
-        unmapped_nodes = merge_utils.produce_table_unmapped_nodes(
-            nodes=self._data_repo_input.get(TABLE_NODES).dataframe,
-            merges=self._data_repo_output.get(TABLE_MERGES_WITH_META_DATA).dataframe,
+        logger.info(
+            f"Out of {self._count_input_nodes:,d} nodes, {self._count_unmapped_nodes:,d} "
+            + f"({((self._count_unmapped_nodes / self._count_input_nodes) * 100):.2f}%) are unmapped."
         )
 
-        # (1) get mappings for NS
-        mappings_for_ns = mapping_utils.get_mappings_for_namespace(
-            namespace=source_id,
-            edges=self._data_repo_output.get(TABLE_MAPPINGS_FOR_INPUT_NODES).dataframe,
-        )
         alignment_step = AlignmentStep(
             mapping_type_group=mapping_type_group_name,
             source=source_id,
             step_counter=step_counter,
-            count_unmapped_nodes=len(unmapped_nodes),
+            count_unmapped_nodes=self._count_unmapped_nodes,
         )
 
-        # (2) filter for permitted mapping types
-        mappings_for_permitted_type = mapping_utils.get_mappings_with_mapping_relations(
-            permitted_mapping_relations=mapping_types, mappings=mappings_for_ns
-        )
-
-        # (3) orient mappings towards NS
-        mapping_towards_ns = mapping_utils.orient_mappings_to_namespace(
-            required_target_id_namespace=source_id,
-            mappings=mappings_for_permitted_type,
-        )
-
-        # (4) get 1..n : 1 mappings for unmapped nodes
-        mappings_deduplicated = mapping_utils.deduplicate_mappings_for_type_group(
-            mapping_type_group_name=mapping_type_group_name, mappings=mapping_towards_ns
-        )
-        mappings_for_unmapped_nodes = mapping_utils.filter_mappings_for_node_set(
-            nodes=unmapped_nodes,
-            mappings=mappings_deduplicated,
-        )
-        mappings_one_or_many_source_to_one_target = mapping_utils.get_one_or_many_source_to_one_target_mappings(
-            mappings=mappings_for_unmapped_nodes,
-        )
-        mappings_one_source_to_many_target_mappings = mapping_utils.get_one_source_to_many_target_mappings(
-            mappings=mappings_for_unmapped_nodes,
-        )
+        # (1) - (4) get 1..n : 1 mappings for unmapped nodes, and the dropped 1 : n mappings
+        if self._mapping_store is not None:
+            (
+                mappings_one_or_many_source_to_one_target,
+                mappings_one_source_to_many_target_mappings,
+            ) = self._mapping_store.get_mappings_for_unmapped_nodes(
+                namespace=source_id,
+                mapping_type_group_name=mapping_type_group_name,
+                mapping_types=mapping_types,
+                unmapped_node_ids=self._node_id_dictionary.get_node_ids(
+                    codes=np.flatnonzero(self._unmapped_node_mask)
+                ),
+            )
+        else:
+            (
+                mappings_one_or_many_source_to_one_target,
+                mappings_one_source_to_many_target_mappings,
+            ) = self._get_mappings_for_unmapped_nodes(
+                source_id=source_id, mapping_type_group_name=mapping_type_group_name, mapping_types=mapping_types
+            )
         self._data_manager.save_dropped_mappings_table(
             table=mappings_one_source_to_many_target_mappings,
             step_count=step_counter,
             source_id=source_id,
             mapping_type=mapping_type_group_name,
         )
-        alignment_step.count_mappings = len(mappings_for_unmapped_nodes)
+        alignment_step.count_mappings = (
+            len(mappings_one_or_many_source_to_one_target) + len(mappings_one_source_to_many_target_mappings)
+        )
         alignment_step.count_nodes_one_source_to_many_target = len(mappings_one_source_to_many_target_mappings)
 
         # (5) produce return tables
@@ -226,6 +272,39 @@ class AlignmentManager:
 
         return merge_table, alignment_step
 
+    def _get_mappings_for_unmapped_nodes(
+            self,
+            source_id: str,
+            mapping_type_group_name: str,
+            mapping_types: List[str],
+    ) -> Tuple[DataFrame, DataFrame]:
+        """Select the mappings of an alignment step, and split them by source node multiplicity.
+
+        :param source_id: The source the unmapped nodes are aligned to.
+        :param mapping_type_group_name: The name of mapping type group.
+        :param mapping_types: The mapping types in the given type group.
+        :return: The one or many source to one target mappings, and the one source to many
+        target mappings.
+        """
+        # (1) get the mappings for NS with the permitted mapping types, oriented towards NS and
+        # deduplicated (the partition is only used by this step, it is released afterwards)
+        mapping_partition = self._mapping_partitions.pop((source_id, mapping_type_group_name), None)
+        if mapping_partition is None:
+            mapping_partition = mapping_utils.produce_mapping_partitions(
+                mappings=self._data_repo_output.get(TABLE_MAPPINGS_FOR_INPUT_NODES).dataframe,
+                namespaces=[source_id],
+                mapping_type_groups={mapping_type_group_name: mapping_types},
+                node_id_dictionary=self._node_id_dictionary,
+            )[(source_id, mapping_type_group_name)]
+
+        # (2) get 1..n : 1 mappings for unmapped nodes
+        mappings_for_unmapped_nodes = mapping_utils.filter_mappings_for_node_mask(
+            node_mask=self._unmapped_node_mask,
+            node_id_dictionary=self._node_id_dictionary,
+            mappings=mapping_partition,
+        )
+        return mapping_utils.get_mappings_partitioned_by_source_multiplicity(mappings=mappings_for_unmapped_nodes)
+
     def _preprocess_mappings(self) -> None:
         """Preprocess the mappings: internal code reassignments are computed and used to update the full mapping set.
 
@@ -235,6 +314,42 @@ class AlignmentManager:
         """
         logger.info("Starting to preprocess mappings...")
 
+        if self._mapping_store is not None:
+            mappings_obsolete_to_current_node_id_applicable = self._mapping_store.preprocess_mappings(
+                mappings_file_path=self._data_manager.get_table_path(
+                    process_directory=DIRECTORY_INPUT, table_name=TABLE_MAPPINGS
+                ),
+                nodes=self._data_repo_input.get(TABLE_NODES).dataframe,
+                nodes_obsolete=self._data_repo_input.get(TABLE_NODES_OBSOLETE).dataframe,
+                equivalence_relations=self._alignment_config.mapping_type_groups.equivalence,
+            )
+        else:
+            mappings_obsolete_to_current_node_id_applicable = self._preprocess_mappings_in_memory()
+
+        mappings_obsolete_to_current_node_id_applicable[COLUMN_RELATION] = RELATION_MERGE
+        mappings_obsolete_to_current_node_id_applicable[COLUMN_PROVENANCE] = ONTO_MERGER
+        self._data_repo_output.update(
+            table=NamedTable(
+                name=TABLE_MAPPINGS_OBSOLETE_TO_CURRENT,
+                dataframe=mappings_obsolete_to_current_node_id_applicable[SCHEMA_HIERARCHY_EDGE_TABLE],
+            )
+        )
+
+        mappings_obsolete_to_current_node_id_applicable[COLUMN_STEP_COUNTER] = 0
+        mappings_obsolete_to_current_node_id_applicable[COLUMN_SOURCE_ID_ALIGNED_TO] = "INTERNAL"
+        mappings_obsolete_to_current_node_id_applicable[COLUMN_MAPPING_TYPE_GROUP] = MAPPING_TYPE_GROUP_EQV
+        self._merges.append(merges=mappings_obsolete_to_current_node_id_applicable[SCHEMA_MERGE_TABLE_WITH_META_DATA])
+        self._update_unmapped_nodes(merges=mappings_obsolete_to_current_node_id_applicable)
+
+        logger.info("Finished pre-processing mappings.")
+
+    def _preprocess_mappings_in_memory(self) -> DataFrame:
+        """Compute the internal code reassignments, and use them to update the full mapping set in memory.
+
+        The updated mapping sets are stored in the internal data repository.
+
+        :return: The obsolete to current node ID mappings that apply to the input nodes.
+        """
         # get internal code re-assignment mappings that are 1:1
         # and have the correct mapping relation (e.g. xref could be too weak to merge)
         mappings_obsolete_to_current_node_id = mapping_utils.get_mappings_obsolete_to_current_node_id(
@@ -245,6 +360,10 @@ class AlignmentManager:
             permitted_mapping_relations=self._alignment_config.mapping_type_groups.equivalence,
             mappings=mappings_obsolete_to_current_node_id,
         )
+        # resolve obsolescence chains once: the resolved map updates both the mappings and the nodes
+        mappings_obsolete_to_current_node_id_merge_strength = mapping_utils.resolve_obsolete_to_current_node_id_chains(
+            mappings_obsolete_to_current_node_id=mappings_obsolete_to_current_node_id_merge_strength
+        )
 
         # get the mappings without the internal code reassignment and update
         # any obsolete node IDs
@@ -264,31 +383,10 @@ class AlignmentManager:
         )
 
         #
-        mappings_obsolete_to_current_node_id_applicable = mapping_utils.get_nodes_with_updated_node_ids(
+        return mapping_utils.get_nodes_with_updated_node_ids(
             nodes=self._data_repo_input.get(TABLE_NODES).dataframe,
             mappings_obsolete_to_current_node_id=mappings_obsolete_to_current_node_id_merge_strength,
         )
-        mappings_obsolete_to_current_node_id_applicable[COLUMN_RELATION] = RELATION_MERGE
-        mappings_obsolete_to_current_node_id_applicable[COLUMN_PROVENANCE] = ONTO_MERGER
-        self._data_repo_output.update(
-            table=NamedTable(
-                name=TABLE_MAPPINGS_OBSOLETE_TO_CURRENT,
-                dataframe=mappings_obsolete_to_current_node_id_applicable[SCHEMA_HIERARCHY_EDGE_TABLE],
-            )
-        )
-
-        mappings_obsolete_to_current_node_id_applicable[COLUMN_STEP_COUNTER] = 0
-        mappings_obsolete_to_current_node_id_applicable[COLUMN_SOURCE_ID_ALIGNED_TO] = "INTERNAL"
-        mappings_obsolete_to_current_node_id_applicable[COLUMN_MAPPING_TYPE_GROUP] = MAPPING_TYPE_GROUP_EQV
-        self._data_repo_output.update(
-            table=DataManager.merge_tables_of_same_type(
-                tables=[NamedTable(TABLE_MERGES_WITH_META_DATA,
-                                   mappings_obsolete_to_current_node_id_applicable[SCHEMA_MERGE_TABLE_WITH_META_DATA]),
-                        self._data_repo_output.get(TABLE_MERGES_WITH_META_DATA)]
-            )
-        )
-
-        logger.info("Finished pre-processing mappings.")
 
     def _create_initial_step(self, mapping_type_group_name: str) -> None:
         """Produce and store the initial set of merges (self merges for the seed ontology) and the step meta data.
@@ -305,9 +403,13 @@ class AlignmentManager:
             seed_id=self._alignment_config.base_config.seed_ontology_name,
             nodes=self._data_repo_input.get(TABLE_NODES).dataframe,
             nodes_obsolete=self._data_repo_input.get(TABLE_NODES_OBSOLETE).dataframe,
+            namespace_index=self._nodes_namespace_index,
         )
-        self._data_repo_output.update(table=self_merges_for_seed_nodes)
-        self._data_repo_output.update(table=NamedTable("SEED_MERGES", self_merges_for_seed_nodes.dataframe))
+        # the seed self merges replace the accumulated merges
+        self._merges.clear()
+        self._merges.append(merges=self_merges_for_seed_nodes.dataframe, is_seed_self_merge=True)
+        self._reset_unmapped_nodes()
+        self._update_unmapped_nodes(merges=self_merges_for_seed_nodes.dataframe)
 
         # record start step meta data
         step = AlignmentStep(
@@ -332,14 +434,35 @@ class AlignmentManager:
         """
         alignment_step.task_finished()
         self._alignment_steps.append(alignment_step)
-        self._data_repo_output.update(
-            table=DataManager.merge_tables_of_same_type(
-                tables=[merges_for_source, self._data_repo_output.get(TABLE_MERGES_WITH_META_DATA)]
-            )
+        self._merges.append(merges=merges_for_source.dataframe)
+        self._update_unmapped_nodes(merges=merges_for_source.dataframe)
+
+    def _reset_unmapped_nodes(self) -> None:
+        """Set every input node as unmapped.
+
+        :return:
+        """
+        input_node_id_codes = self._node_id_dictionary.get_codes(
+            node_ids=self._data_repo_input.get(TABLE_NODES).dataframe[COLUMN_DEFAULT_ID]
         )
+        self._unmapped_node_mask[:] = False
+        self._unmapped_node_mask[input_node_id_codes[input_node_id_codes != -1]] = True
+        self._count_input_nodes = int(np.count_nonzero(self._unmapped_node_mask))
+        self._count_unmapped_nodes = self._count_input_nodes
+
+    def _update_unmapped_nodes(self, merges: DataFrame) -> None:
+        """Unset the source nodes of the given merges in the unmapped node mask.
+
+        :param merges: The merges produced by a step.
+        :return:
+        """
+        source_id_codes = self._node_id_dictionary.get_codes(node_ids=merges[COLUMN_SOURCE_ID])
+        source_id_codes = np.unique(source_id_codes[source_id_codes != -1])
+        self._count_unmapped_nodes -= int(np.count_nonzero(self._unmapped_node_mask[source_id_codes]))
+        self._unmapped_node_mask[source_id_codes] = False
 
 
-def _produce_source_alignment_priority_order(seed_ontology_name: str, nodes: DataFrame) -> List[str]:
+def produce_source_alignment_priority_order(seed_ontology_name: str, nodes: DataFrame) -> List[str]:
     """Produce the alignment process source priority order.
 
     The alignment order is produced by putting the seed ontology as first (this
@@ -0,0 +1,348 @@
+"""Out-of-core mapping operations of the alignment process, run in an embedded DuckDB database.
+
+The mapping set is loaded from the input CSV into a local DuckDB database file, and the mapping
+preprocessing and the mapping selection of each alignment step run as SQL queries that spill to
+disk when they exceed the memory limit; only the results of each step are materialised as
+dataframes. Requires the ``duckdb`` package.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from onto_merger.alignment import mapping_utils
+from onto_merger.data.constants import (
+    COLUMN_DEFAULT_ID,
+    COLUMN_PROVENANCE,
+    COLUMN_RELATION,
+    COLUMN_SOURCE_ID,
+    COLUMN_TARGET_ID,
+    SCHEMA_MAPPING_TABLE,
+    TABLE_MAPPINGS_FOR_INPUT_NODES,
+    TABLE_MAPPINGS_UPDATED,
+)
+from onto_merger.data.dataclasses import NamedTable, NodeIdDictionary
+from onto_merger.logger.log import get_logger
+
+logger = get_logger(__name__)
+
+# the column of the mapping row order: the in-memory process keeps the input file order
+_COLUMN_ROW_POSITION = "_row_position"
+_COLUMN_SOURCE_NAMESPACE = "source_namespace"
+_COLUMN_TARGET_NAMESPACE = "target_namespace"
+_COLUMN_HAS_ONE_TARGET = "has_one_target"
+
+# the strings read as null values from the CSV, as by Pandas (read_csv default 'na_values')
+_CSV_NULL_STRINGS = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+_MAPPING_COLUMNS = ", ".join(SCHEMA_MAPPING_TABLE)
+
+
+class DuckDBMappingStore:
+    """Store the mapping set in a DuckDB database file, and select the mappings of each alignment step with SQL.
+
+    The results are the same as the results of the in-memory mapping operations (see mapping_utils),
+    including the row order.
+    """
+
+    def __init__(self, database_file_path: str, node_id_dictionary: NodeIdDictionary):
+        """Initialise the DuckDBMappingStore class.
+
+        Raises an ImportError if DuckDB is not installed.
+
+        :param database_file_path: The path of the database file, an existing file is overwritten.
+        :param node_id_dictionary: The node ID dictionary used to encode the result tables.
+        """
+        # DuckDB is an optional dependency
+        import duckdb
+
+        self._database_file_path = database_file_path
+        self._node_id_dictionary = node_id_dictionary
+        self._remove_database_files()
+        self._connection = duckdb.connect(database=database_file_path)
+        # the namespace of a missing node ID is 'nan', as in the namespace columns of the tables
+        self._connection.execute(
+            "CREATE MACRO node_id_namespace(node_id) AS coalesce(split_part(node_id, ':', 1), 'nan')"
+        )
+
+    def preprocess_mappings(
+        self,
+        mappings_file_path: str,
+        nodes: DataFrame,
+        nodes_obsolete: DataFrame,
+        equivalence_relations: List[str],
+    ) -> DataFrame:
+        """Load the mappings, and update their obsolete node IDs with the internal code reassignments.
+
+        Produces the updated mapping set, and its subset that covers the input nodes in the database.
+
+        :param mappings_file_path: The path of the input mapping CSV.
+        :param nodes: The input node table.
+        :param nodes_obsolete: The obsolete node table.
+        :param equivalence_relations: The mapping relations of the equivalence type group.
+        :return: The obsolete to current node ID mappings that apply to the input nodes.
+        """
+        self._load_mappings(mappings_file_path=mappings_file_path)
+        self._load_node_ids(table_name="input_node_ids", nodes=nodes)
+        self._load_node_ids(table_name="obsolete_node_ids", nodes=nodes_obsolete)
+
+        # internal code reassignments of an obsolete node ID, oriented towards the current node ID (or
+        # kept as is between two obsolete node IDs, to be resolved as a chain), that have merge strength
+        self._connection.execute(
+            f"""
+            CREATE TABLE mappings_obsolete_to_current AS
+            SELECT
+                CASE WHEN {COLUMN_SOURCE_ID} IN (SELECT node_id FROM obsolete_node_ids)
+                    THEN {COLUMN_SOURCE_ID} ELSE {COLUMN_TARGET_ID} END AS {COLUMN_SOURCE_ID},
+                CASE WHEN {COLUMN_SOURCE_ID} IN (SELECT node_id FROM obsolete_node_ids)
+                    THEN {COLUMN_TARGET_ID} ELSE {COLUMN_SOURCE_ID} END AS {COLUMN_TARGET_ID},
+                {COLUMN_RELATION}, {COLUMN_PROVENANCE}, {_COLUMN_ROW_POSITION}
+            FROM mappings
+            WHERE node_id_namespace({COLUMN_SOURCE_ID}) = node_id_namespace({COLUMN_TARGET_ID})
+                AND ({COLUMN_SOURCE_ID} IN (SELECT node_id FROM obsolete_node_ids)
+                     OR {COLUMN_TARGET_ID} IN (SELECT node_id FROM obsolete_node_ids))
+                AND list_contains($equivalence_relations, {COLUMN_RELATION})
+            """,
+            {"equivalence_relations": list(equivalence_relations)},
+        )
+        # the obsolescence chains are resolved in memory: the map only holds the reassignments of
+        # obsolete node IDs
+        mappings_obsolete_to_current = mapping_utils.resolve_obsolete_to_current_node_id_chains(
+            mappings_obsolete_to_current_node_id=self._connection.execute(
+                f"SELECT * FROM mappings_obsolete_to_current ORDER BY {_COLUMN_ROW_POSITION}"
+            ).fetch_df()
+        )
+        self._connection.register("mappings_obsolete_to_current_view", mappings_obsolete_to_current)
+        self._connection.execute(
+            "CREATE OR REPLACE TABLE mappings_obsolete_to_current AS SELECT * FROM mappings_obsolete_to_current_view"
+        )
+        self._connection.unregister("mappings_obsolete_to_current_view")
+
+        # mappings between namespaces, with the obsolete node IDs updated (a node ID with more than
+        # one current node ID yields a mapping for each)
+        self._connection.execute(f"""
+            CREATE TABLE {TABLE_MAPPINGS_UPDATED} AS
+            SELECT
+                coalesce(source_update.{COLUMN_TARGET_ID}, m.{COLUMN_SOURCE_ID}) AS {COLUMN_SOURCE_ID},
+                coalesce(target_update.{COLUMN_TARGET_ID}, m.{COLUMN_TARGET_ID}) AS {COLUMN_TARGET_ID},
+                m.{COLUMN_RELATION}, m.{COLUMN_PROVENANCE},
+                row_number() OVER (
+                    ORDER BY m.{_COLUMN_ROW_POSITION}, source_update.{_COLUMN_ROW_POSITION},
+                        target_update.{_COLUMN_ROW_POSITION}
+                ) AS {_COLUMN_ROW_POSITION}
+            FROM mappings AS m
+            LEFT JOIN mappings_obsolete_to_current AS source_update
+                ON m.{COLUMN_SOURCE_ID} = source_update.{COLUMN_SOURCE_ID}
+            LEFT JOIN mappings_obsolete_to_current AS target_update
+                ON m.{COLUMN_TARGET_ID} = target_update.{COLUMN_SOURCE_ID}
+            WHERE node_id_namespace(m.{COLUMN_SOURCE_ID}) != node_id_namespace(m.{COLUMN_TARGET_ID})
+            """)
+
+        # mappings that cover input nodes, with the namespaces used to select the mappings of each step
+        self._connection.execute(f"""
+            CREATE TABLE {TABLE_MAPPINGS_FOR_INPUT_NODES} AS
+            SELECT
+                *,
+                node_id_namespace({COLUMN_SOURCE_ID}) AS {_COLUMN_SOURCE_NAMESPACE},
+                node_id_namespace({COLUMN_TARGET_ID}) AS {_COLUMN_TARGET_NAMESPACE}
+            FROM {TABLE_MAPPINGS_UPDATED}
+            WHERE {COLUMN_SOURCE_ID} IN (SELECT node_id FROM input_node_ids)
+                AND {COLUMN_TARGET_ID} IN (SELECT node_id FROM input_node_ids)
+            ORDER BY {_COLUMN_ROW_POSITION}
+            """)
+        counts = self._produce_table_row_counts(
+            table_names=[
+                "mappings",
+                "mappings_obsolete_to_current",
+                TABLE_MAPPINGS_UPDATED,
+                TABLE_MAPPINGS_FOR_INPUT_NODES,
+            ]
+        )
+        logger.info(
+            f"Loaded {counts['mappings']:,d} mappings into '{self._database_file_path}', found "
+            + f"{counts['mappings_obsolete_to_current']:,d} obsolete_to_current_node_id mappings, "
+            + f"{counts[TABLE_MAPPINGS_UPDATED]:,d} updated mappings, and "
+            + f"{counts[TABLE_MAPPINGS_FOR_INPUT_NODES]:,d} mappings for input nodes."
+        )
+
+        return self._fetch_table(query=f"""
+            SELECT {_MAPPING_COLUMNS} FROM mappings_obsolete_to_current
+            WHERE {COLUMN_SOURCE_ID} IN (SELECT node_id FROM input_node_ids)
+            ORDER BY {_COLUMN_ROW_POSITION}
+            """)
+
+    def get_mappings_for_unmapped_nodes(
+        self,
+        namespace: str,
+        mapping_type_group_name: str,
+        mapping_types: List[str],
+        unmapped_node_ids: np.ndarray,
+    ) -> Tuple[DataFrame, DataFrame]:
+        """Select the mappings of an alignment step, and split them by source node multiplicity.
+
+        The mappings of the namespace with the permitted mapping relations are oriented towards the
+        namespace, deduplicated for the type group, and filtered for the unmapped source nodes.
+
+        :param namespace: The namespace the unmapped nodes are aligned to.
+        :param mapping_type_group_name: The name of the mapping type group.
+        :param mapping_types: The mapping types in the given type group.
+        :param unmapped_node_ids: The IDs of the unmapped nodes.
+        :return: The one or many source to one target mappings (merges), and the one source to
+        many target mappings (dropped, sorted by source and target node ID).
+        """
+        self._connection.register("unmapped_node_ids", pd.DataFrame({"node_id": unmapped_node_ids}))
+        mappings = self._fetch_table(
+            query=f"""
+            WITH oriented_mappings AS (
+                SELECT
+                    CASE WHEN {_COLUMN_SOURCE_NAMESPACE} = $namespace
+                        THEN {COLUMN_TARGET_ID} ELSE {COLUMN_SOURCE_ID} END AS {COLUMN_SOURCE_ID},
+                    CASE WHEN {_COLUMN_TARGET_NAMESPACE} = $namespace
+                        THEN {COLUMN_TARGET_ID} ELSE {COLUMN_SOURCE_ID} END AS {COLUMN_TARGET_ID},
+                    $mapping_type_group_name AS {COLUMN_RELATION},
+                    {COLUMN_PROVENANCE},
+                    {_COLUMN_ROW_POSITION}
+                FROM {TABLE_MAPPINGS_FOR_INPUT_NODES}
+                WHERE ({_COLUMN_SOURCE_NAMESPACE} = $namespace OR {_COLUMN_TARGET_NAMESPACE} = $namespace)
+                    AND list_contains($mapping_types, {COLUMN_RELATION})
+            ),
+            deduplicated_mappings AS (
+                SELECT * FROM oriented_mappings
+                QUALIFY row_number() OVER (
+                    PARTITION BY {COLUMN_SOURCE_ID}, {COLUMN_TARGET_ID}, {COLUMN_PROVENANCE}
+                    ORDER BY {_COLUMN_ROW_POSITION}
+                ) = 1
+            ),
+            mappings_for_unmapped_nodes AS (
+                SELECT * FROM deduplicated_mappings
+                WHERE {COLUMN_SOURCE_ID} IN (SELECT node_id FROM unmapped_node_ids)
+            ),
+            source_multiplicity AS (
+                SELECT {COLUMN_SOURCE_ID}, count(DISTINCT {COLUMN_TARGET_ID}) = 1 AS {_COLUMN_HAS_ONE_TARGET}
+                FROM mappings_for_unmapped_nodes
+                GROUP BY {COLUMN_SOURCE_ID}
+            )
+            SELECT {_MAPPING_COLUMNS}, {_COLUMN_HAS_ONE_TARGET}
+            FROM mappings_for_unmapped_nodes JOIN source_multiplicity USING ({COLUMN_SOURCE_ID})
+            ORDER BY {_COLUMN_ROW_POSITION}
+            """,
+            parameters={
+                "namespace": namespace,
+                "mapping_type_group_name": mapping_type_group_name,
+                "mapping_types": list(mapping_types),
+            },
+        )
+        self._connection.unregister("unmapped_node_ids")
+        has_one_target = mappings.pop(_COLUMN_HAS_ONE_TARGET).to_numpy(dtype=bool)
+        mappings_one_or_many_source_to_one_target = mappings[has_one_target]
+        mappings_one_source_to_many_target = mappings[~has_one_target].sort_values([COLUMN_SOURCE_ID, COLUMN_TARGET_ID])
+        logger.info(
+            f"Found {len(mappings):,d} mappings for namespace '{namespace}' and {len(unmapped_node_ids):,d} "
+            + f"unmapped nodes: {len(mappings_one_or_many_source_to_one_target):,d} "
+            + "one_or_many_source_to_one_target and "
+            + f"{len(mappings_one_source_to_many_target):,d} one_source_to_many_target mappings."
+        )
+        return mappings_one_or_many_source_to_one_target, mappings_one_source_to_many_target
+
+    def produce_mapping_tables(self) -> List[NamedTable]:
+        """Materialise the updated mapping set, and the mappings that cover input nodes.
+
+        :return: The mapping named tables.
+        """
+        return [
+            NamedTable(
+                name=table_name,
+                dataframe=self._fetch_table(
+                    query=f"SELECT {_MAPPING_COLUMNS} FROM {table_name} ORDER BY {_COLUMN_ROW_POSITION}"
+                ),
+            )
+            for table_name in [TABLE_MAPPINGS_UPDATED, TABLE_MAPPINGS_FOR_INPUT_NODES]
+        ]
+
+    def close(self) -> None:
+        """Close the database connection, and delete the database file.
+
+        :return:
+        """
+        self._connection.close()
+        self._remove_database_files()
+
+    def _load_mappings(self, mappings_file_path: str) -> None:
+        """Load the mapping CSV into the mappings table, dropping duplicated rows as the DataManager.
+
+        :param mappings_file_path: The path of the input mapping CSV.
+        :return:
+        """
+        self._connection.execute(
+            "CREATE TABLE mappings_csv AS SELECT * FROM read_csv($file_path, header = true, "
+            + "all_varchar = true, nullstr = $null_strings)",
+            {"file_path": mappings_file_path, "null_strings": _CSV_NULL_STRINGS},
+        )
+        csv_columns = ", ".join(f'"{row[0]}"' for row in self._connection.execute("DESCRIBE mappings_csv").fetchall())
+        # the row ID follows the insertion (i.e. file) order
+        self._connection.execute(f"""
+            CREATE TABLE mappings AS
+            SELECT {_MAPPING_COLUMNS}, rowid AS {_COLUMN_ROW_POSITION}
+            FROM mappings_csv
+            QUALIFY row_number() OVER (PARTITION BY {csv_columns} ORDER BY rowid) = 1
+            ORDER BY rowid
+            """)
+        self._connection.execute("DROP TABLE mappings_csv")
+
+    def _load_node_ids(self, table_name: str, nodes: DataFrame) -> None:
+        """Load the (non null) node IDs of a node table into a single column table.
+
+        :param table_name: The name of the database table.
+        :param nodes: The node table.
+        :return:
+        """
+        node_ids = pd.DataFrame({"node_id": nodes[COLUMN_DEFAULT_ID].dropna().astype(str).unique()})
+        self._connection.register("node_ids_view", node_ids)
+        self._connection.execute(f"CREATE TABLE {table_name} AS SELECT node_id FROM node_ids_view")
+        self._connection.unregister("node_ids_view")
+
+    def _fetch_table(self, query: str, parameters: Optional[Dict] = None) -> DataFrame:
+        """Run a query, and return the result as a dataframe with the node ID columns encoded.
+
+        :param query: The SQL query.
+        :param parameters: The named query parameters.
+        :return: The result table.
+        """
+        return self._node_id_dictionary.encode_table(table=self._connection.execute(query, parameters or {}).fetch_df())
+
+    def _produce_table_row_counts(self, table_names: List[str]) -> Dict[str, int]:
+        row_counts = {}
+        for table_name in table_names:
+            row = self._connection.execute(f"SELECT count(*) FROM {table_name}").fetchone()
+            # a count query returns exactly one row
+            assert row is not None
+            row_counts[table_name] = row[0]
+        return row_counts
+
+    def _remove_database_files(self) -> None:
+        for file_path in [self._database_file_path, f"{self._database_file_path}.wal"]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
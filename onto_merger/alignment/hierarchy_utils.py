@@ -1,8 +1,8 @@
 """Methods to produce node hierarchy and analyse node connectivity status."""
 
-import itertools
 from typing import List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from tqdm import tqdm
@@ -13,12 +13,14 @@ from onto_merger.analyser.analysis_utils import (
     filter_nodes_for_namespace,
     produce_table_node_ids_from_edge_table,
 )
+from onto_merger.analyser.table_engine import get_table_engine
 from onto_merger.data.constants import (
     COLUMN_DEFAULT_ID,
     COLUMN_PROVENANCE,
     COLUMN_RELATION,
     COLUMN_SOURCE_ID,
     COLUMN_TARGET_ID,
+    CONNECTIVITY_PATH_SEARCH_A_STAR,
     ONTO_MERGER,
     RELATION_RDFS_SUBCLASS_OF,
     SCHEMA_HIERARCHY_EDGE_TABLE,
@@ -40,6 +42,7 @@ from onto_merger.data.dataclasses import (
     ConnectivityStep,
     DataRepository,
     NamedTable,
+    NamespaceIndex,
     convert_connectivity_steps_to_named_table,
 )
 from onto_merger.logger.log import get_logger
@@ -47,6 +50,108 @@ from onto_merger.logger.log import get_logger
 logger = get_logger(__name__)
 
 
+class TerminusMap:
+    """The terminus (canonical) node of the merged and connected nodes.
+
+    The map is built from the aggregated merges as an array of canonical node codes, indexed by
+    node code. The nodes connected to the hierarchy are their own terminus: the connected nodes
+    of each namespace are added as a layer on top of the merges once the namespace is connected,
+    so discarding the additions of a namespace does not require a copy of the map.
+    """
+
+    def __init__(self, merges: DataFrame):
+        """Initialise the TerminusMap class.
+
+        :param merges: The aggregated merge table (source is the merged, target the canonical node).
+        """
+        node_codes, node_ids = pd.factorize(
+            np.concatenate(
+                [merges[COLUMN_SOURCE_ID].to_numpy(dtype=object), merges[COLUMN_TARGET_ID].to_numpy(dtype=object)]
+            )
+        )
+        self._node_ids = np.asarray(node_ids, dtype=object)
+        self._node_id_index = pd.Index(self._node_ids)
+        self._canonical_codes = np.full(len(self._node_ids), -1, dtype=np.int64)
+        self._canonical_codes[node_codes[:len(merges)]] = node_codes[len(merges):]
+        self._layers: List[pd.Index] = []
+
+    def add_layer(self, node_ids: List[str]) -> None:
+        """Add a layer of connected nodes (that are their own terminus).
+
+        :param node_ids: The connected node IDs.
+        :return:
+        """
+        if len(node_ids) > 0:
+            self._layers.append(pd.Index(node_ids, dtype=object).unique())
+
+    def get_terminus_node_ids(self, node_ids: np.ndarray) -> np.ndarray:
+        """Get the terminus node ID of each given node.
+
+        :param node_ids: The node IDs.
+        :return: The terminus node IDs, None for the nodes that are not merged or connected.
+        """
+        terminus_node_ids = np.full(len(node_ids), None, dtype=object)
+        node_codes = self._node_id_index.get_indexer(node_ids)
+        canonical_codes = np.full(len(node_ids), -1, dtype=np.int64)
+        canonical_codes[node_codes != -1] = self._canonical_codes[node_codes[node_codes != -1]]
+        is_merged = canonical_codes != -1
+        terminus_node_ids[is_merged] = self._node_ids[canonical_codes[is_merged]]
+        # the later layers take precedence
+        for layer in self._layers:
+            is_connected = layer.get_indexer(node_ids) != -1
+            terminus_node_ids[is_connected] = node_ids[is_connected]
+        return terminus_node_ids
+
+
+class ConnectivityIndex:
+    """The connectivity status of the hierarchy graph nodes of a namespace.
+
+    The reachable unmapped nodes, and the terminus nodes (merged, or connected while connecting
+    the namespace) are held as boolean arrays aligned with the node indices of the hierarchy
+    graph (`NetworkitGraph.node_id_to_index_map`), so the membership tests of the connectivity
+    process are array lookups.
+    """
+
+    def __init__(self, hierarchy_graph: NetworkitGraph, unmapped_node_ids: List[str], terminus_map: TerminusMap):
+        """Initialise the ConnectivityIndex class.
+
+        :param hierarchy_graph: The hierarchy graph of the namespace.
+        :param unmapped_node_ids: The unmapped node IDs of the namespace.
+        :param terminus_map: The terminus map of the merged and connected nodes.
+        """
+        self.node_ids = np.array(list(hierarchy_graph.node_id_to_index_map.keys()), dtype=object)
+        node_count = len(self.node_ids)
+
+        # the unmapped nodes that are in the hierarchy graph, in the unmapped node order
+        unmapped_node_indices = pd.Index(self.node_ids).get_indexer(pd.Index(unmapped_node_ids, dtype=object))
+        self.reachable_unmapped_node_indices = unmapped_node_indices[unmapped_node_indices != -1]
+        self.is_unmapped = np.zeros(node_count, dtype=bool)
+        self.is_unmapped[self.reachable_unmapped_node_indices] = True
+
+        # the terminus node ID of each node (None if the node is not a terminus)
+        self.terminus_node_ids = terminus_map.get_terminus_node_ids(node_ids=self.node_ids)
+        self.is_merged = pd.notna(self.terminus_node_ids)
+        self.is_terminus = self.is_merged.copy()
+        self.is_connected = np.zeros(node_count, dtype=bool)
+
+    def mark_connected(self, node_indices: List[int]) -> None:
+        """Set the given nodes as terminus nodes (that are their own terminus).
+
+        :param node_indices: The indices of the connected nodes.
+        :return:
+        """
+        self.is_terminus[node_indices] = True
+        self.is_connected[node_indices] = True
+        self.terminus_node_ids[node_indices] = self.node_ids[node_indices]
+
+    def get_connected_node_ids(self) -> List[str]:
+        """Get the nodes connected while connecting the namespace.
+
+        :return: The connected node IDs.
+        """
+        return self.node_ids[self.is_connected].tolist()
+
+
 class HierarchyManager:
     """Connect domain ontology nodes to form a single DAG."""
 
@@ -80,6 +185,7 @@ class HierarchyManager:
             seed_ontology_name=alignment_config.base_config.seed_ontology_name,
             nodes=data_repo.get(TABLE_NODES).dataframe,
             hierarchy_edges=data_repo.get(TABLE_EDGES_HIERARCHY).dataframe,
+            nodes_namespace_index=data_repo.get_namespace_index(table_name=TABLE_NODES),
         )
 
         # (2) connect unmapped nodes to the seed hierarchy
@@ -88,6 +194,8 @@ class HierarchyManager:
             merges=data_repo.get(TABLE_MERGES_AGGREGATED).dataframe,
             source_alignment_order=source_alignment_order,
             hierarchy_edges=data_repo.get(TABLE_EDGES_HIERARCHY).dataframe,
+            unmapped_nodes_namespace_index=data_repo.get_namespace_index(table_name=TABLE_NODES_UNMAPPED),
+            path_search=alignment_config.base_config.connectivity_path_search,
         )
 
         # (4) return the merged hierarchy and node tables
@@ -101,12 +209,13 @@ class HierarchyManager:
 
     def _produce_hierarchy_edges_for_unmapped_nodes(
             self, unmapped_nodes: DataFrame, merges: DataFrame, source_alignment_order: List[str],
-            hierarchy_edges: DataFrame
+            hierarchy_edges: DataFrame, unmapped_nodes_namespace_index: Optional[NamespaceIndex] = None,
+            path_search: str = CONNECTIVITY_PATH_SEARCH_A_STAR,
     ) -> Tuple[DataFrame, List[ConnectivityStep]]:
         # contains all merges; iteratively extended with connected nodes (where the node will "merge" to itself)
         # this provides a single data structure to identify terminus nodes in hierarchy paths, i.e. where
         # the path can be terminated while establishing connectivity to the main hierarchy
-        merge_and_connectivity_map = _produce_merge_map(merges=merges)
+        terminus_map = TerminusMap(merges=merges)
         connectivity_order = source_alignment_order[1:]
         edges_for_all_nodes = []
         connectivity_steps = []
@@ -115,20 +224,22 @@ class HierarchyManager:
             # produce the hierarchy edges for the namespace node set
             (
                 edges_for_namespace_nodes,
-                merge_and_connectivity_map_for_ns,
+                connected_node_ids,
                 connectivity_step,
             ) = self._produce_hierarchy_edges_for_unmapped_nodes_of_namespace(
                 node_namespace=node_namespace,
                 unmapped_nodes=unmapped_nodes,
                 hierarchy_edges=hierarchy_edges,
-                merge_and_connectivity_map=merge_and_connectivity_map,
+                terminus_map=terminus_map,
+                unmapped_nodes_namespace_index=unmapped_nodes_namespace_index,
+                path_search=path_search,
             )
             connectivity_step.step_counter = connectivity_order.index(node_namespace)
             connectivity_steps.append(connectivity_step)
             if edges_for_namespace_nodes:
                 # update result and processing data structures
                 edges_for_all_nodes.extend(edges_for_namespace_nodes)
-                merge_and_connectivity_map = merge_and_connectivity_map_for_ns
+                terminus_map.add_layer(node_ids=connected_node_ids)
         self.f.close()
 
         # edges
@@ -145,14 +256,13 @@ class HierarchyManager:
 
     def _produce_hierarchy_edges_for_unmapped_nodes_of_namespace(
             self, node_namespace: str, unmapped_nodes: DataFrame, hierarchy_edges: DataFrame,
-            merge_and_connectivity_map: dict,
-    ) -> Tuple[List[Tuple[str, str]], dict, ConnectivityStep]:
-        merge_and_connectivity_map_for_ns = merge_and_connectivity_map.copy()
-
+            terminus_map: TerminusMap, unmapped_nodes_namespace_index: Optional[NamespaceIndex] = None,
+            path_search: str = CONNECTIVITY_PATH_SEARCH_A_STAR,
+    ) -> Tuple[List[Tuple[str, str]], List[str], ConnectivityStep]:
         # get the unmapped node IDs for the namespace
-        unmapped_node_ids_for_namespace = filter_nodes_for_namespace(nodes=unmapped_nodes, namespace=node_namespace)[
-            COLUMN_DEFAULT_ID
-        ].tolist()
+        unmapped_node_ids_for_namespace = filter_nodes_for_namespace(
+            nodes=unmapped_nodes, namespace=node_namespace, namespace_index=unmapped_nodes_namespace_index
+        )[COLUMN_DEFAULT_ID].tolist()
         logger.info(
             f"* * * Connectivity for {node_namespace} "
             + f"({len(unmapped_node_ids_for_namespace):,d} unmapped, "
@@ -163,46 +273,43 @@ class HierarchyManager:
         )
         if not unmapped_node_ids_for_namespace:
             connectivity_step.task_finished()
-            return [], {}, connectivity_step
+            return [], [], connectivity_step
 
         # get edges for ns
         edges_for_ns = hierarchy_edges.query(expr=f"prov == '{node_namespace}'", inplace=False)
         connectivity_step.count_available_edges = len(edges_for_ns)
         if edges_for_ns.empty:
             connectivity_step.task_finished()
-            return [], merge_and_connectivity_map_for_ns, connectivity_step
-
-        # create the hierarchy graph for the namespace
-        hierarchy_graph_for_ns = NetworkitGraph(edges=edges_for_ns)
-        reachable_nodes = list(hierarchy_graph_for_ns.node_id_to_index_map.keys())
-        reachable_unmapped_nodes = [node_id for node_id in unmapped_node_ids_for_namespace if
-                                    node_id in reachable_nodes]
-        count_unmapped = len(reachable_unmapped_nodes)
+            return [], [], connectivity_step
+
+        # create the hierarchy graph for the namespace, and index the unmapped and terminus nodes
+        hierarchy_graph_for_ns = NetworkitGraph(edges=edges_for_ns, path_search=path_search)
+        connectivity_index = ConnectivityIndex(
+            hierarchy_graph=hierarchy_graph_for_ns,
+            unmapped_node_ids=unmapped_node_ids_for_namespace,
+            terminus_map=terminus_map,
+        )
+        count_unmapped = len(connectivity_index.reachable_unmapped_node_indices)
         connectivity_step.count_reachable_unmapped_nodes = count_unmapped
         logger.info(
-            f"Reachable unmapped nodes {len(reachable_unmapped_nodes):,d} "
-            + f"({(len(reachable_unmapped_nodes) * 100) / len(unmapped_node_ids_for_namespace):.2f}%)\n"
+            f"Reachable unmapped nodes {count_unmapped:,d} "
+            + f"({(count_unmapped * 100) / len(unmapped_node_ids_for_namespace):.2f}%)\n"
         )
 
         # connect each reachable node
         edges_for_namespace_nodes = []
-        counter = 1
         with tqdm(total=count_unmapped, desc=f"Connecting {node_namespace} nodes") as progress_bar:
-            for node_to_connect in reachable_unmapped_nodes:
-                counter += 1
-                if node_to_connect not in merge_and_connectivity_map:
-                    edges_for_node = self._produce_hierarchy_path_for_unmapped_node(
-                        node_to_connect=node_to_connect,
-                        unmapped_node_ids=unmapped_node_ids_for_namespace,
-                        merge_and_connectivity_map_for_ns=merge_and_connectivity_map_for_ns,
+            for node_index in connectivity_index.reachable_unmapped_node_indices.tolist():
+                if not connectivity_index.is_merged[node_index]:
+                    edges_for_node, connected_node_indices = self._produce_hierarchy_path_for_unmapped_node(
+                        node_index=node_index,
+                        connectivity_index=connectivity_index,
                         hierarchy_graph_for_ns=hierarchy_graph_for_ns,
                     )
                     if edges_for_node:
                         # update result and processing data structures
                         edges_for_namespace_nodes.extend(edges_for_node)
-                        merge_and_connectivity_map_for_ns.update(
-                            {item: item for item in list(itertools.chain(*edges_for_node))[0:-1]}
-                        )
+                        connectivity_index.mark_connected(node_indices=connected_node_indices)
                 progress_bar.update(1)
 
         # results
@@ -220,36 +327,40 @@ class HierarchyManager:
         )
         connectivity_step.task_finished()
 
-        return edges_for_namespace_nodes, merge_and_connectivity_map_for_ns, connectivity_step
+        return edges_for_namespace_nodes, connectivity_index.get_connected_node_ids(), connectivity_step
 
     def _produce_hierarchy_path_for_unmapped_node(
             self,
-            node_to_connect: str,
-            unmapped_node_ids: List[str],
-            merge_and_connectivity_map_for_ns: dict,
+            node_index: int,
+            connectivity_index: ConnectivityIndex,
             hierarchy_graph_for_ns: NetworkitGraph,
-    ) -> List[Tuple[str, str]]:
+    ) -> Tuple[List[Tuple[str, str]], List[int]]:
         # get shortest path
-        shortest_path = hierarchy_graph_for_ns.get_path_for_node(node_id=node_to_connect)
-        if not shortest_path:
-            return []
+        shortest_path_indices = np.array(
+            hierarchy_graph_for_ns.get_path_for_node_index(node_index=node_index), dtype=np.int64
+        )
+        if len(shortest_path_indices) == 0:
+            return [], []
 
         # check if it contains any merged nodes, i.e. whether it can be used for integration
-        merged_node_ids_in_path = [
-            node_id for node_id in shortest_path if node_id in merge_and_connectivity_map_for_ns.keys()
-        ]
-        if not merged_node_ids_in_path:
-            return []
+        is_terminus_in_path = connectivity_index.is_terminus[shortest_path_indices]
+        if not is_terminus_in_path.any():
+            return [], []
 
         # modify the path: removed redundant (no unmapped nodes), terminate it with a merged node
         # and use the canonical ID for the terminus node
-        index_of_first_merged_node = sorted([shortest_path.index(node_id) for node_id in merged_node_ids_in_path])[0]
-        first_merged_node_canonical_id = merge_and_connectivity_map_for_ns[shortest_path[index_of_first_merged_node]]
-        pruned_path = shortest_path[0:index_of_first_merged_node] + [first_merged_node_canonical_id]
-        unmapped_node_ids_in_path = [node_id for node_id in shortest_path if node_id in unmapped_node_ids]
-        permitted_node_ids_in_path = unmapped_node_ids_in_path + merged_node_ids_in_path + [
-            first_merged_node_canonical_id]
-        final_path = [node_id for node_id in pruned_path if node_id in permitted_node_ids_in_path]
+        index_of_first_merged_node = int(np.argmax(is_terminus_in_path))
+        first_merged_node_canonical_id = connectivity_index.terminus_node_ids[
+            shortest_path_indices[index_of_first_merged_node]
+        ]
+        pruned_path_indices = shortest_path_indices[:index_of_first_merged_node]
+        pruned_path_indices = pruned_path_indices[
+            connectivity_index.is_unmapped[pruned_path_indices]
+            | (connectivity_index.node_ids[pruned_path_indices] == first_merged_node_canonical_id)
+        ]
+        final_path = connectivity_index.node_ids[pruned_path_indices].tolist() + [first_merged_node_canonical_id]
+        shortest_path = connectivity_index.node_ids[shortest_path_indices].tolist()
+        node_to_connect = shortest_path[0]
 
         #
         self.f.write(f"{node_to_connect},{node_to_connect.split(':')[0]},{len(shortest_path)},{len(final_path)},"
@@ -259,31 +370,30 @@ class HierarchyManager:
         # convert the path into a hierarchy edge tuple list
         edges = _convert_hierarchy_path_into_tuple_list(pruned_path=final_path)
 
-        return edges
+        return edges, pruned_path_indices.tolist()
 
 
 def _produce_table_seed_ontology_hierarchy(
-        seed_ontology_name: str, nodes: DataFrame, hierarchy_edges: DataFrame
+        seed_ontology_name: str, nodes: DataFrame, hierarchy_edges: DataFrame,
+        nodes_namespace_index: Optional[NamespaceIndex] = None,
 ) -> Optional[DataFrame]:
     """Produce the hierarchy edge table for the seed ontology nodes.
 
     :param seed_ontology_name: The name of the seed ontology.
     :param nodes: The full set of domain nodes (including seed nodes).
     :param hierarchy_edges: All full set of hierarchy edges (including the seed edges).
+    :param nodes_namespace_index: The namespace index of the node table, if available.
     :return: The produced hierarchy edge table.
     """
     # get hierarchy of the seed ontology, filter out any non seed nodes
     # (nodes only have the type 'correct' IDs, whereas the edges may contain other ones)
-    seed_node_list = list(
-        filter_nodes_for_namespace(
-            nodes=nodes,
-            namespace=seed_ontology_name,
-        )[COLUMN_DEFAULT_ID]
-    )
-    seed_hierarchy_table = hierarchy_edges.query(
-        f"{COLUMN_SOURCE_ID} in @node_ids & {COLUMN_TARGET_ID} in @node_ids",
-        local_dict={"node_ids": seed_node_list},
-        inplace=False,
+    seed_node_ids = filter_nodes_for_namespace(
+        nodes=nodes,
+        namespace=seed_ontology_name,
+        namespace_index=nodes_namespace_index,
+    )[COLUMN_DEFAULT_ID]
+    seed_hierarchy_table = get_table_engine().filter_rows_for_values(
+        table=hierarchy_edges, columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID], values=seed_node_ids
     )
 
     # check if the hierarchy is still one network (DAG)
@@ -295,10 +405,6 @@ def _produce_table_seed_ontology_hierarchy(
         return seed_hierarchy_table[SCHEMA_HIERARCHY_EDGE_TABLE]
 
 
-def _produce_merge_map(merges: DataFrame) -> dict:
-    return {row[COLUMN_SOURCE_ID]: row[COLUMN_TARGET_ID] for _, row in merges.iterrows()}
-
-
 def _convert_hierarchy_path_into_tuple_list(pruned_path: List[str]) -> List[Tuple[str, str]]:
     return [
         (pruned_path[source_index], pruned_path[source_index + 1]) for source_index in range(0, (len(pruned_path) - 1))
@@ -349,7 +455,9 @@ def produce_named_table_nodes_connected(hierarchy_edges: DataFrame) -> NamedTabl
 def _produce_named_table_nodes_connected_excluding_seed(
         nodes_connected: DataFrame, nodes_seed: DataFrame,
 ) -> NamedTable:
-    df = pd.concat([nodes_connected, nodes_seed, nodes_seed]).drop_duplicates(keep=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=nodes_connected, tables_to_remove=[nodes_seed], columns=SCHEMA_NODE_ID_LIST_TABLE
+    )
     logger.info(
         f"There are {len(nodes_connected):,d} connected nodes, {len(df):,d} excluding seed)."
     )
@@ -365,11 +473,9 @@ def produce_named_table_nodes_dangling(
     :param nodes_connected:  The set of all connected nodes.
     :return: The table of nodes connected that are not merged but connected.
     """
-    df = pd.concat([
-        nodes_all[SCHEMA_NODE_ID_LIST_TABLE],
-        nodes_connected[SCHEMA_NODE_ID_LIST_TABLE],
-        nodes_connected[SCHEMA_NODE_ID_LIST_TABLE],
-    ]).drop_duplicates(keep=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=nodes_all, tables_to_remove=[nodes_connected], columns=SCHEMA_NODE_ID_LIST_TABLE
+    )
     logger.info(
         f"Out of {len(nodes_all):,d} nodes, {len(df):,d} "
         + f"({((len(df) / len(nodes_all)) * 100):.2f}%) are dangling."
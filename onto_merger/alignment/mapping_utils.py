@@ -1,15 +1,18 @@
 """Helper methods to work with mappings."""
 
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
 from onto_merger.analyser.analysis_utils import (
+    filter_nodes_for_namespace,
     get_namespace_column_name_for_column,
     produce_table_node_ids_from_edge_table,
     produce_table_with_namespace_column_for_node_ids,
 )
+from onto_merger.analyser.table_engine import get_table_engine
 from onto_merger.data.constants import (
     COLUMN_DEFAULT_ID,
     COLUMN_MAPPING_HASH,
@@ -20,7 +23,7 @@ from onto_merger.data.constants import (
     SCHEMA_MAPPING_TABLE,
     TABLE_MERGES_WITH_META_DATA,
 )
-from onto_merger.data.dataclasses import NamedTable
+from onto_merger.data.dataclasses import NamedTable, NamespaceIndex, NodeIdDictionary
 from onto_merger.logger.log import get_logger
 
 logger = get_logger(__name__)
@@ -32,13 +35,7 @@ def get_mappings_internal_node_reassignment(mappings: DataFrame) -> DataFrame:
     :param mappings: The input mapping set ot be filtered.
     :return: The internal code re-assigment mappings table.
     """
-    query = (
-        f"{get_namespace_column_name_for_column(COLUMN_SOURCE_ID)} == "
-        + f"{get_namespace_column_name_for_column(COLUMN_TARGET_ID)}"
-    )
-    mapping_subset = produce_table_with_namespace_column_for_node_ids(table=mappings).query(expr=query, inplace=False)[
-        SCHEMA_MAPPING_TABLE
-    ]
+    mapping_subset = get_table_engine().filter_mappings_for_namespace_match(mappings=mappings, same_namespace=True)
     logger.info(
         f"Found {len(mapping_subset)} 'internal_node_reassignment' mappings from total " + f"{len(mappings)} mappings."
     )
@@ -51,13 +48,7 @@ def filter_out_mappings_internal_node_reassignment(mappings: DataFrame) -> DataF
     :param mappings: The input mapping set ot be filtered.
     :return: The internal code re-assigment mappings table.
     """
-    query = (
-        f"{get_namespace_column_name_for_column(COLUMN_SOURCE_ID)} != "
-        + f"{get_namespace_column_name_for_column(COLUMN_TARGET_ID)}"
-    )
-    mapping_subset = produce_table_with_namespace_column_for_node_ids(table=mappings).query(expr=query, inplace=False)[
-        SCHEMA_MAPPING_TABLE
-    ]
+    mapping_subset = get_table_engine().filter_mappings_for_namespace_match(mappings=mappings, same_namespace=False)
     logger.info(
         f"Filtered out {len(mappings) - len(mapping_subset)} mappings from total " + f"{len(mappings)} mappings."
     )
@@ -75,37 +66,76 @@ def get_mappings_obsolete_to_current_node_id(nodes_obsolete: DataFrame, mappings
     :param mappings: The input that contains internal_node_reassignment mappings.
     :return:
     """
-    nodes_obsolete_ids = list(nodes_obsolete[COLUMN_DEFAULT_ID])
     df = get_mappings_internal_node_reassignment(mappings=mappings)
+    nodes_obsolete_ids = pd.unique(nodes_obsolete[COLUMN_DEFAULT_ID].to_numpy(dtype=object))
+    is_source_obsolete = df[COLUMN_SOURCE_ID].isin(nodes_obsolete_ids).to_numpy()
+    is_target_obsolete = df[COLUMN_TARGET_ID].isin(nodes_obsolete_ids).to_numpy()
+    has_obsolete_node = is_source_obsolete | is_target_obsolete
+    df = df[has_obsolete_node].copy()
+    is_source_obsolete = is_source_obsolete[has_obsolete_node]
+    is_target_obsolete = is_target_obsolete[has_obsolete_node]
+
+    # the obsolete node ID is the source, if both node IDs are obsolete the mapping keeps its
+    # orientation, so the obsolescence chain (A -> B -> C) can be resolved later on
+    source_ids, target_ids = df[COLUMN_SOURCE_ID].copy(), df[COLUMN_TARGET_ID].copy()
+    df[COLUMN_SOURCE_ID] = source_ids.where(is_source_obsolete, target_ids)
+    df[COLUMN_TARGET_ID] = target_ids.where(is_source_obsolete, source_ids)
 
-    df["has_obs_node"] = df.apply(
-        lambda x: True
-        if ((x[COLUMN_SOURCE_ID] in nodes_obsolete_ids) | (x[COLUMN_TARGET_ID] in nodes_obsolete_ids))
-        else False,
-        axis=1,
-    )
-    df.query("has_obs_node == True", inplace=True)
+    return df
 
-    updated_src_id_column = f"updated_{COLUMN_SOURCE_ID}"
-    df[updated_src_id_column] = df.apply(
-        lambda x: x[COLUMN_SOURCE_ID] if x[COLUMN_SOURCE_ID] in nodes_obsolete_ids else x[COLUMN_TARGET_ID],
-        axis=1,
-    )
 
-    updated_trg_id_column = f"updated_{COLUMN_TARGET_ID}"
-    df[updated_trg_id_column] = df.apply(
-        lambda x: x[COLUMN_SOURCE_ID] if x[COLUMN_TARGET_ID] in nodes_obsolete_ids else x[COLUMN_TARGET_ID],
-        axis=1,
-    )
+def resolve_obsolete_to_current_node_id_chains(mappings_obsolete_to_current_node_id: DataFrame) -> DataFrame:
+    """Resolve the obsolete to current node ID mappings, so each target node ID is a current node ID.
 
-    df.drop(columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID], inplace=True)
-    df.rename(
-        columns={updated_src_id_column: COLUMN_SOURCE_ID, updated_trg_id_column: COLUMN_TARGET_ID},
-        inplace=True,
-    )
-
-    df = df[SCHEMA_MAPPING_TABLE]
+    When the target of a mapping is itself obsolete (e.g. A -> B and B -> C), the target is
+    updated to the end of the chain (A -> C). The chains are followed with pointer jumping over
+    the obsolete to current node ID map: each jump doubles the followed chain length, until the
+    map reaches a fixed point. Only node IDs with a single current node ID are followed; node IDs
+    in an obsolescence cycle keep their direct target.
 
+    :param mappings_obsolete_to_current_node_id: The obsolete to current node ID mappings.
+    :return: The mappings with resolved target node IDs.
+    """
+    if len(mappings_obsolete_to_current_node_id) == 0:
+        return mappings_obsolete_to_current_node_id
+    df = mappings_obsolete_to_current_node_id.copy()
+    codes, node_ids = pd.factorize(
+        np.concatenate([df[COLUMN_SOURCE_ID].to_numpy(dtype=object), df[COLUMN_TARGET_ID].to_numpy(dtype=object)])
+    )
+    source_codes, target_codes = codes[:len(df)], codes[len(df):]
+    if len(node_ids) == 0:
+        return df
+
+    # the map of each node ID (code) to its current node ID, where that is unambiguous
+    node_id_pairs = np.unique(np.stack([source_codes, target_codes], axis=1), axis=0)
+    node_id_pairs = node_id_pairs[(node_id_pairs != -1).all(axis=1)]
+    has_one_target = np.bincount(node_id_pairs[:, 0], minlength=len(node_ids)) == 1
+    node_id_pairs = node_id_pairs[has_one_target[node_id_pairs[:, 0]]]
+    current_codes = np.arange(len(node_ids))
+    current_codes[node_id_pairs[:, 0]] = node_id_pairs[:, 1]
+
+    # pointer jumping: a chain of length n is resolved in log2(n) jumps (cycles never reach a
+    # fixed point, hence the jump limit)
+    for _ in range(int(np.ceil(np.log2(len(node_ids) + 1))) + 1):
+        jumped_codes = current_codes[current_codes]
+        if np.array_equal(jumped_codes, current_codes):
+            break
+        current_codes = jumped_codes
+    is_resolved = current_codes[current_codes] == current_codes
+
+    resolved_target_codes = np.where(
+        (target_codes != -1) & is_resolved[target_codes], current_codes[target_codes], target_codes
+    )
+    is_updated = resolved_target_codes != target_codes
+    if is_updated.any():
+        resolved_target_ids = df[COLUMN_TARGET_ID].to_numpy(dtype=object).copy()
+        resolved_target_ids[is_updated] = node_ids[resolved_target_codes[is_updated]]
+        df[COLUMN_TARGET_ID] = pd.Series(resolved_target_ids, index=df.index).astype(df[COLUMN_TARGET_ID].dtype)
+    logger.info(
+        f"Resolved the obsolescence chains of {np.count_nonzero(is_updated):,d} (out of {len(df):,d}) "
+        + f"obsolete_to_current_node_id mappings, {np.count_nonzero(~is_resolved):,d} node ID(s) are in "
+        + "(or lead into) obsolescence cycles."
+    )
     return df
 
 
@@ -120,11 +150,9 @@ def get_mappings_with_updated_node_ids(
     :return: The updated mapping set.
     """
     # internal mappings that would apply
-    node_ids_in_mappings = produce_table_node_ids_from_edge_table(edges=mappings)[COLUMN_DEFAULT_ID].tolist()
-    mappings_obsolete_to_current_node_id_applicable = mappings_obsolete_to_current_node_id.query(
-        expr=(f"{COLUMN_SOURCE_ID} == @node_ids_in_mappings"),
-        local_dict={"node_ids_in_mappings": node_ids_in_mappings},
-        inplace=False,
+    node_ids_in_mappings = produce_table_node_ids_from_edge_table(edges=mappings)[COLUMN_DEFAULT_ID]
+    mappings_obsolete_to_current_node_id_applicable = get_table_engine().filter_rows_for_values(
+        table=mappings_obsolete_to_current_node_id, columns=[COLUMN_SOURCE_ID], values=node_ids_in_mappings
     )
     logger.info(f"Out of {len(mappings_obsolete_to_current_node_id)} obsolete_to_current_node_id mappings, "
                 + f"{len(mappings_obsolete_to_current_node_id_applicable)} can be applied to mappings.")
@@ -148,11 +176,9 @@ def get_nodes_with_updated_node_ids(
     :return: The updated node table.
     """
     # internal mappings that would apply
-    mappings_obsolete_to_current_node_id_applicable = mappings_obsolete_to_current_node_id.copy().query(
-        expr=(f"{COLUMN_SOURCE_ID} == @node_ids_in_mappings"),
-        local_dict={"node_ids_in_mappings": nodes[COLUMN_DEFAULT_ID].tolist()},
-        inplace=False,
-    )
+    mappings_obsolete_to_current_node_id_applicable = get_table_engine().filter_rows_for_values(
+        table=mappings_obsolete_to_current_node_id, columns=[COLUMN_SOURCE_ID], values=nodes[COLUMN_DEFAULT_ID]
+    ).copy()
     logger.info(f"Out of {len(mappings_obsolete_to_current_node_id)} obsolete_to_current_node_id mappings, "
                 + f"{len(mappings_obsolete_to_current_node_id_applicable)} can be applied to nodes.")
 
@@ -174,7 +200,9 @@ def add_comparison_column_for_reoriented_mappings(mappings: DataFrame):
     return mappings
 
 
-def get_mappings_for_namespace(namespace: str, edges: DataFrame) -> DataFrame:
+def get_mappings_for_namespace(
+        namespace: str, edges: DataFrame, namespace_index: Optional[NamespaceIndex] = None
+) -> DataFrame:
     """Filter a mapping set for a given namespace.
 
     The result will only contain mapping where either the source or the target node
@@ -182,15 +210,20 @@ def get_mappings_for_namespace(namespace: str, edges: DataFrame) -> DataFrame:
 
     :param namespace: The ontology namespace.
     :param edges: The input mapping set.
+    :param namespace_index: The namespace index of the mapping set, if available: the rows
+    are then sliced from the index instead of scanning the namespace columns.
     :return: The filtered mapping set.
     """
-    mappings_with_ns = produce_table_with_namespace_column_for_node_ids(table=edges)
-    query = (
-        f"({get_namespace_column_name_for_column(COLUMN_SOURCE_ID)} == '{namespace}') "
-        + f"| ({get_namespace_column_name_for_column(COLUMN_TARGET_ID)} == "
-        + f"'{namespace}')"
-    )
-    mapping_subset = mappings_with_ns.query(expr=query, inplace=False)[SCHEMA_MAPPING_TABLE]
+    if namespace_index is not None:
+        mapping_subset = edges.iloc[namespace_index.get_row_positions(namespace=namespace)][SCHEMA_MAPPING_TABLE]
+    else:
+        mappings_with_ns = produce_table_with_namespace_column_for_node_ids(table=edges)
+        query = (
+            f"({get_namespace_column_name_for_column(COLUMN_SOURCE_ID)} == '{namespace}') "
+            + f"| ({get_namespace_column_name_for_column(COLUMN_TARGET_ID)} == "
+            + f"'{namespace}')"
+        )
+        mapping_subset = mappings_with_ns.query(expr=query, inplace=False)[SCHEMA_MAPPING_TABLE]
     logger.info(
         f"Found {len(mapping_subset):,d} edges (mapping or hierarchy edges) for namespace '{namespace}'"
         + f" from total {len(edges):,d}."
@@ -198,75 +231,25 @@ def get_mappings_for_namespace(namespace: str, edges: DataFrame) -> DataFrame:
     return mapping_subset
 
 
-def get_source_to_target_mappings_for_multiplicity(mappings: DataFrame, is_one_or_many_to_one: bool) -> DataFrame:
-    """Filter a mapping set according to multiplicity.
+def get_mappings_partitioned_by_source_multiplicity(mappings: DataFrame) -> Tuple[DataFrame, DataFrame]:
+    """Partition a mapping set according to multiplicity, in a single pass.
 
-    Return either the mapping subset that align one or many source node to exactly
-    one target node (stable set used for merges), or the subset that align one source
+    Return both the mapping subset that align one or many source node to exactly one
+    target node (stable set used for merges), and the subset that align one source
     node to many target nodes (unstable set that is dropped).
 
-    The mapping subsets are not pruned i.e. the filtering is based on multiplicity
-    analysis of the source nodes.
-
     :param mappings: The input mapping set.
-    :param is_one_or_many_to_one: If True it return the stable mappings, if False it
-    returns the unstable mappings.
-    :return: The filtered mapping set, either stable or unstable.
+    :return: The stable mapping set, and the unstable mapping set (sorted by source and
+    target node ID).
     """
-    # group from source perspective
-    df = (
-        mappings[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]]
-        .groupby(COLUMN_SOURCE_ID)
-        .agg({COLUMN_TARGET_ID: lambda x: set(x)})
-        .reset_index()
-    )
-    df["target_size"] = df[COLUMN_TARGET_ID].apply(lambda x: len(x))
-    df_one_to_one = df[df["target_size"] == 1]
-    df_one_to_many = df[df["target_size"] > 1]
-
-    # drop non one to one mappings
-    if is_one_or_many_to_one:
-        source_ids_to_drop = list(df_one_to_many[COLUMN_SOURCE_ID])
-    else:
-        source_ids_to_drop = list(df_one_to_one[COLUMN_SOURCE_ID])
-    mapping_subset = mappings.query(
-        f"{COLUMN_SOURCE_ID} != @node_ids",
-        local_dict={"node_ids": source_ids_to_drop},
-        inplace=False,
+    mappings_stable, mappings_unstable = get_table_engine().partition_mappings_for_source_multiplicity(
+        mappings=mappings
     )
-    return mapping_subset
-
-
-def get_one_or_many_source_to_one_target_mappings(mappings: DataFrame) -> DataFrame:
-    """Return only one or many source to one target mappings.
-
-    Filter a mapping set to return the mapping subset that align one or
-    many source node to exactly one target node (stable set used for merges).
-
-    :param mappings: The input mapping set to be filtered.
-    :return: The filtered (stable) mapping set.
-    """
-    mapping_subset = get_source_to_target_mappings_for_multiplicity(mappings=mappings, is_one_or_many_to_one=True)
     logger.info(
-        f"Found {len(mapping_subset)} one_or_many_source_to_one_target mappings from " + f"{len(mappings)} mappings."
+        f"Found {len(mappings_stable):,d} one_or_many_source_to_one_target and {len(mappings_unstable):,d} "
+        + f"one_source_to_many_target mappings from {len(mappings):,d} mappings."
     )
-    return mapping_subset
-
-
-def get_one_source_to_many_target_mappings(mappings: DataFrame) -> DataFrame:
-    """Return only one source to many target mappings.
-
-    Filter a mapping set to return the mapping subset that align one source
-     node to many target nodes (unstable set that is dropped)
-
-    :param mappings: The input mapping set to be filtered.
-    :return: The filtered (unstable) mapping set.
-    """
-    mapping_subset = get_source_to_target_mappings_for_multiplicity(mappings=mappings, is_one_or_many_to_one=False)
-    logger.info(
-        f"Found {len(mapping_subset)} one_or_many_source_to_one_target mappings from " + f"{len(mappings)} mappings."
-    )
-    return mapping_subset.sort_values([COLUMN_SOURCE_ID, COLUMN_TARGET_ID])
+    return mappings_stable, mappings_unstable.sort_values([COLUMN_SOURCE_ID, COLUMN_TARGET_ID])
 
 
 def update_mappings_with_current_node_ids(
@@ -279,39 +262,17 @@ def update_mappings_with_current_node_ids(
     :param mappings: The input mapping set to be updated.
     :return: The updated mapping set.
     """
-    # src
-    df = pd.merge(
-        mappings[SCHEMA_MAPPING_TABLE],
-        mappings_internal_obsolete_to_current_node_id[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]].rename(
-            columns={COLUMN_TARGET_ID: "new_src"},
-            inplace=False,
-        ),
-        how="left",
-        on=COLUMN_SOURCE_ID,
-    )
-
-    # trg
-    df = pd.merge(
-        df,
-        mappings_internal_obsolete_to_current_node_id[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]].rename(
-            columns={COLUMN_TARGET_ID: "new_trg", COLUMN_SOURCE_ID: COLUMN_TARGET_ID},
-            inplace=False,
-        ),
-        how="left",
-        on=COLUMN_TARGET_ID,
+    return get_table_engine().update_mappings_with_current_node_ids(
+        mappings_internal_obsolete_to_current_node_id=mappings_internal_obsolete_to_current_node_id,
+        mappings=mappings,
     )
-    # clean df
-    df["src"] = df["new_src"].mask(pd.isnull, df[COLUMN_SOURCE_ID])
-    df["trg"] = df["new_trg"].mask(pd.isnull, df[COLUMN_TARGET_ID])
-    df.drop([COLUMN_SOURCE_ID, COLUMN_TARGET_ID], axis=1, inplace=True)
-    df.rename(
-        columns={"src": COLUMN_SOURCE_ID, "trg": COLUMN_TARGET_ID},
-        inplace=True,
-    )
-    return df[SCHEMA_MAPPING_TABLE]
 
 
-def orient_mappings_to_namespace(required_target_id_namespace: str, mappings: DataFrame) -> DataFrame:
+def orient_mappings_to_namespace(
+        required_target_id_namespace: str,
+        mappings: DataFrame,
+        node_id_dictionary: Optional[NodeIdDictionary] = None,
+) -> DataFrame:
     """Update a mapping so the target node is always of the specified ontology (namespace).
 
     The mapping set assumed to contain only mappings where either the source or the
@@ -319,31 +280,15 @@ def orient_mappings_to_namespace(required_target_id_namespace: str, mappings: Da
 
     :param required_target_id_namespace: The ontology namespace for the target node ID.
     :param mappings: The input mapping set to be updated.
+    :param node_id_dictionary: The node ID dictionary, if available: the namespaces are then
+    looked up by node ID code.
     :return: The updated mapping set.
     """
-    df = produce_table_with_namespace_column_for_node_ids(table=mappings)
-    if len(df) == 0:
-        return mappings
-    updated_src_id_column = f"updated_{COLUMN_SOURCE_ID}"
-    updated_trg_id_column = f"updated_{COLUMN_TARGET_ID}"
-    df[updated_src_id_column] = df.apply(
-        lambda x: x[COLUMN_SOURCE_ID]
-        if x[get_namespace_column_name_for_column(COLUMN_SOURCE_ID)] != required_target_id_namespace
-        else x[COLUMN_TARGET_ID],
-        axis=1,
-    )
-    df[updated_trg_id_column] = df.apply(
-        lambda x: x[COLUMN_TARGET_ID]
-        if x[get_namespace_column_name_for_column(COLUMN_TARGET_ID)] == required_target_id_namespace
-        else x[COLUMN_SOURCE_ID],
-        axis=1,
+    return get_table_engine().orient_mappings_to_namespace(
+        required_target_id_namespace=required_target_id_namespace,
+        mappings=mappings,
+        node_id_dictionary=node_id_dictionary,
     )
-    df.drop([COLUMN_SOURCE_ID, COLUMN_TARGET_ID], axis=1, inplace=True)
-    df.rename(
-        columns={updated_src_id_column: COLUMN_SOURCE_ID, updated_trg_id_column: COLUMN_TARGET_ID},
-        inplace=True,
-    )
-    return df[SCHEMA_MAPPING_TABLE]
 
 
 def get_mappings_with_mapping_relations(permitted_mapping_relations: List[str], mappings: DataFrame) -> DataFrame:
@@ -353,8 +298,9 @@ def get_mappings_with_mapping_relations(permitted_mapping_relations: List[str],
     :param mappings: The input mapping set to be filtered.
     :return: The filtered mapping set.
     """
-    query = f"{COLUMN_RELATION} == @permitted_mapping_relations"
-    mapping_subset = mappings.query(expr=query, inplace=False)
+    mapping_subset = get_table_engine().filter_rows_for_values(
+        table=mappings, columns=[COLUMN_RELATION], values=permitted_mapping_relations
+    )
     logger.info(
         f"Found {len(mapping_subset):,d} for relation(s) "
         + f"'{permitted_mapping_relations}' from {len(mappings):,d} mappings."
@@ -385,6 +331,51 @@ def deduplicate_mappings_for_type_group(mapping_type_group_name: str, mappings:
     return mappings_deduplicated
 
 
+def produce_mapping_partitions(
+        mappings: DataFrame,
+        namespaces: List[str],
+        mapping_type_groups: Dict[str, List[str]],
+        node_id_dictionary: Optional[NodeIdDictionary] = None,
+) -> Dict[Tuple[str, str], DataFrame]:
+    """Partition a mapping set by (namespace, mapping type group), for the alignment steps.
+
+    Each partition holds the mappings of a namespace with the mapping relations of a type
+    group, oriented towards the namespace and deduplicated for the type group, so an alignment
+    step only filters its partition for the unmapped nodes.
+
+    :param mappings: The input mapping set (e.g. the mappings for the input nodes).
+    :param namespaces: The ontology namespaces the nodes are aligned to.
+    :param mapping_type_groups: The mapping relations of each mapping type group, by type group name.
+    :param node_id_dictionary: The node ID dictionary, if available: the rows of each namespace are
+    then sliced from a namespace index instead of scanning the namespace columns.
+    :return: The mapping partitions by (namespace, mapping type group name).
+    """
+    partitions = {}
+    for mapping_type_group_name, mapping_types in mapping_type_groups.items():
+        mappings_for_type_group = get_mappings_with_mapping_relations(
+            permitted_mapping_relations=mapping_types, mappings=mappings
+        )
+        namespace_index = None
+        if node_id_dictionary is not None:
+            namespace_index = NamespaceIndex(table=mappings_for_type_group, node_id_dictionary=node_id_dictionary)
+        for namespace in namespaces:
+            partitions[(namespace, mapping_type_group_name)] = deduplicate_mappings_for_type_group(
+                mapping_type_group_name=mapping_type_group_name,
+                mappings=orient_mappings_to_namespace(
+                    required_target_id_namespace=namespace,
+                    mappings=get_mappings_for_namespace(
+                        namespace=namespace, edges=mappings_for_type_group, namespace_index=namespace_index
+                    ),
+                    node_id_dictionary=node_id_dictionary,
+                ),
+            )
+    logger.info(
+        f"Produced {len(partitions):,d} mapping partitions for {len(namespaces):,d} namespaces and "
+        + f"{len(mapping_type_groups):,d} mapping type groups from {len(mappings):,d} mappings."
+    )
+    return partitions
+
+
 def filter_mappings_for_input_node_set(input_nodes: DataFrame, mappings: DataFrame) -> DataFrame:
     """Filter a mapping set so it only contains mappings referencing nodes from the input set.
 
@@ -392,11 +383,8 @@ def filter_mappings_for_input_node_set(input_nodes: DataFrame, mappings: DataFra
     :param mappings: The mapping set to be filtered.
     :return: The filtered mapping set.
     """
-    node_ids_to_keep = list(input_nodes[COLUMN_DEFAULT_ID])
-    mapping_subset = mappings.query(
-        f"({COLUMN_SOURCE_ID} == @node_ids) and ({COLUMN_TARGET_ID} == @node_ids)",
-        local_dict={"node_ids": node_ids_to_keep},
-        inplace=False,
+    mapping_subset = get_table_engine().filter_rows_for_values(
+        table=mappings, columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID], values=input_nodes[COLUMN_DEFAULT_ID]
     )
     logger.info(
         f"Found {len(mapping_subset):,d} mappings (from total {len(mappings):,d}) "
@@ -412,11 +400,8 @@ def filter_mappings_for_node_set(nodes: DataFrame, mappings: DataFrame) -> DataF
     :param mappings: The input mapping set to be filtered.
     :return: The filtered mapping set.
     """
-    node_ids_to_keep = list(nodes[COLUMN_DEFAULT_ID])
-    mapping_subset = mappings.query(
-        f"{COLUMN_SOURCE_ID} == @node_ids",
-        local_dict={"node_ids": node_ids_to_keep},
-        inplace=False,
+    mapping_subset = get_table_engine().filter_rows_for_values(
+        table=mappings, columns=[COLUMN_SOURCE_ID], values=nodes[COLUMN_DEFAULT_ID]
     )
     logger.info(
         f"Found {len(mapping_subset):,d} mappings (from total {len(mappings):,d}) " + f"for {len(nodes):,d} nodes."
@@ -424,7 +409,28 @@ def filter_mappings_for_node_set(nodes: DataFrame, mappings: DataFrame) -> DataF
     return mapping_subset
 
 
-def produce_self_merges_for_seed_nodes(seed_id: str, nodes: DataFrame, nodes_obsolete: DataFrame) -> NamedTable:
+def filter_mappings_for_node_mask(
+        node_mask: np.ndarray, node_id_dictionary: NodeIdDictionary, mappings: DataFrame
+) -> DataFrame:
+    """Filter a mapping set such that the source node IDs must be set in a node mask.
+
+    :param node_mask: The boolean mask of the permitted source node IDs, indexed by node ID code.
+    :param node_id_dictionary: The node ID dictionary that defines the node ID codes.
+    :param mappings: The input mapping set to be filtered.
+    :return: The filtered mapping set.
+    """
+    source_id_codes = node_id_dictionary.get_codes(node_ids=mappings[COLUMN_SOURCE_ID])
+    mapping_subset = mappings[(source_id_codes != -1) & node_mask[source_id_codes]]
+    logger.info(
+        f"Found {len(mapping_subset):,d} mappings (from total {len(mappings):,d}) "
+        + f"for {np.count_nonzero(node_mask):,d} nodes."
+    )
+    return mapping_subset
+
+
+def produce_self_merges_for_seed_nodes(
+        seed_id: str, nodes: DataFrame, nodes_obsolete: DataFrame, namespace_index: Optional[NamespaceIndex] = None
+) -> NamedTable:
     """Produce a set of (self) merges for the seed ontology.
 
     In the result each source and target node ID are the same.
@@ -433,27 +439,20 @@ def produce_self_merges_for_seed_nodes(seed_id: str, nodes: DataFrame, nodes_obs
     :param seed_id: The seed ontology name.
     :param nodes: The set of all nodes.
     :param nodes_obsolete: The set of obsolete nodes.
+    :param namespace_index: The namespace index of the node table, if available.
     :return: The merged table.
     """
     # get only seed nodes
-    df = produce_table_with_namespace_column_for_node_ids(table=nodes)
-    df.query(
-        f"{get_namespace_column_name_for_column(COLUMN_DEFAULT_ID)} == '{seed_id}'",
-        inplace=True,
-    )
+    df = filter_nodes_for_namespace(nodes=nodes, namespace=seed_id, namespace_index=namespace_index).copy()
     df.rename(
         columns={COLUMN_DEFAULT_ID: COLUMN_SOURCE_ID},
         inplace=True,
     )
 
     # filter out obsolete nodes
-    nodes_obsolete_ids = list(nodes_obsolete[COLUMN_DEFAULT_ID])
-    df.query(
-        f"{COLUMN_SOURCE_ID} != @node_ids",
-        local_dict={"node_ids": nodes_obsolete_ids},
-        inplace=True,
-    )
-    df = df[[COLUMN_SOURCE_ID]]
+    df = get_table_engine().filter_rows_for_values(
+        table=df, columns=[COLUMN_SOURCE_ID], values=nodes_obsolete[COLUMN_DEFAULT_ID], keep=False
+    )[[COLUMN_SOURCE_ID]].copy()
 
     # produce self merges
     df[COLUMN_TARGET_ID] = df[COLUMN_SOURCE_ID].apply(lambda x: x)
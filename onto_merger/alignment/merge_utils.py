@@ -1,16 +1,17 @@
 """Helper methods for producing the node merge table."""
 
-from typing import List, Optional
+from typing import Dict, List
 
 import numpy as np
 import pandas as pd
-from networkx import connected_components
 from pandas import DataFrame
 
-from onto_merger.alignment import networkx_utils
+from onto_merger.alignment import union_find_utils
 from onto_merger.analyser import analysis_utils
+from onto_merger.analyser.table_engine import get_table_engine
 from onto_merger.data.constants import (
     COLUMN_DEFAULT_ID,
+    COLUMN_IS_SEED_SELF_MERGE,
     COLUMN_MAPPING_TYPE_GROUP,
     COLUMN_PROVENANCE,
     COLUMN_RELATION,
@@ -81,29 +82,40 @@ def _produce_named_table_aggregated_merges(merges: DataFrame, alignment_priority
 
     In aggregated merges the target ID is always the canonical ID for a given merge cluster
     (e.g. A -> B, B -> C becomes A -> C and B -> C, where the priority order is C, B, A).
+    If a cluster has several nodes of the highest priority namespace, the smallest node ID
+    is the canonical ID.
 
     :param merges: The set of input merges.
     :param alignment_priority_order: The alignment priority order that defines the
     canonical node.
     :return: The set of aggregated merges.
     """
-    graph = networkx_utils.create_networkx_graph(edges=merges[SCHEMA_EDGE_SOURCE_TO_TARGET_IDS])
-    sub_graphs = list(graph.subgraph(c) for c in connected_components(graph))
-    clusters = [list(sub.nodes) for sub in sub_graphs]
-    merges_aggregated = pd.DataFrame([[i] for i in np.array(clusters, dtype=object)])
-    merges_aggregated.columns = [COLUMN_SOURCE_ID]
-
-    # canonical node according to the priority order
-    merges_aggregated[COLUMN_TARGET_ID] = merges_aggregated.apply(
-        lambda x: _get_canonical_node_for_merge_cluster(
-            merge_cluster=x[COLUMN_SOURCE_ID],
-            alignment_priority_order=alignment_priority_order,
-        ),
-        axis=1,
+    # integer node codes, in order of first appearance in the merge table
+    node_id_codes, node_ids = pd.factorize(merges[SCHEMA_EDGE_SOURCE_TO_TARGET_IDS].to_numpy(dtype=object).ravel())
+    node_ids = node_ids.astype(object)
+    labels = union_find_utils.produce_component_labels(
+        source_codes=node_id_codes[0::2],
+        target_codes=node_id_codes[1::2],
+        node_count=len(node_ids),
+    )
+
+    # canonical node according to the priority order (ties are broken by the node ID)
+    priority_ranks = _produce_node_priority_ranks(node_ids=node_ids, alignment_priority_order=alignment_priority_order)
+    node_id_ranks = np.empty(len(node_ids), dtype=np.int64)
+    node_id_ranks[np.argsort(node_ids, kind="stable")] = np.arange(len(node_ids))
+    canonical_node_codes = union_find_utils.produce_component_representatives(
+        labels=labels, node_ranks=priority_ranks * len(node_ids) + node_id_ranks
+    )[labels]
+    has_canonical_node = priority_ranks[canonical_node_codes] < len(alignment_priority_order)
+    canonical_node_ids = np.full(len(node_ids), None, dtype=object)
+    canonical_node_ids[has_canonical_node] = node_ids[canonical_node_codes[has_canonical_node]]
+    merges_aggregated = pd.DataFrame(
+        {COLUMN_SOURCE_ID: node_ids, COLUMN_TARGET_ID: canonical_node_ids},
+        index=union_find_utils.produce_component_numbers(labels=labels),
     )
 
     # convert to merge table
-    merges_aggregated = merges_aggregated.explode(column=COLUMN_SOURCE_ID).sort_values(
+    merges_aggregated = merges_aggregated.sort_values(
         [COLUMN_TARGET_ID, COLUMN_SOURCE_ID]
     )[SCHEMA_EDGE_SOURCE_TO_TARGET_IDS]
     merges_aggregated.query(expr=f"{COLUMN_SOURCE_ID} != {COLUMN_TARGET_ID}", inplace=True)
@@ -143,7 +155,9 @@ def _produce_named_table_merged_to_seed_nodes(merges_aggregated: DataFrame, seed
 def _produce_named_table_merged_to_other_nodes(
         merged_nodes: DataFrame, merged_to_seed_nodes: DataFrame
 ) -> NamedTable:
-    df = pd.concat([merged_nodes, merged_to_seed_nodes, merged_to_seed_nodes]).drop_duplicates(keep=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=merged_nodes, tables_to_remove=[merged_to_seed_nodes], columns=[COLUMN_DEFAULT_ID]
+    )
     logger.info(
         f"Out of {len(merged_nodes):,d} merged nodes, {len(df):,d} "
         + f"({((len(df) / len(merged_nodes)) * 100):.2f}%) are merged to other than seed nodes."
@@ -178,12 +192,9 @@ def _produce_table_seed_nodes(nodes: DataFrame, seed_id: str) -> DataFrame:
 def _produce_named_table_unmapped_nodes_post_alignment(
         nodes: DataFrame, merged_nodes: DataFrame, seed_nodes: DataFrame
 ) -> NamedTable:
-    df = pd.concat([
-        nodes[SCHEMA_NODE_ID_LIST_TABLE],
-        merged_nodes[SCHEMA_NODE_ID_LIST_TABLE],
-        merged_nodes[SCHEMA_NODE_ID_LIST_TABLE],
-        seed_nodes[SCHEMA_NODE_ID_LIST_TABLE],
-    ]).drop_duplicates(keep=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=nodes, tables_to_remove=[merged_nodes, seed_nodes], columns=SCHEMA_NODE_ID_LIST_TABLE
+    )
     df = df.sort_values([COLUMN_DEFAULT_ID], ascending=True)
     logger.info(
         f"Out of {len(nodes):,d} nodes, "
@@ -215,6 +226,66 @@ def produce_named_table_merges_with_alignment_meta_data(
     )
 
 
+class MergeTableAccumulator:
+    """Append-only accumulator of the merges produced by the alignment steps.
+
+    The merges of each step are kept as a separate chunk, and the merge table is only
+    produced once (after the last step), instead of copying the growing table at each
+    step. The seed self merges are flagged, and left out of the produced table.
+    """
+
+    def __init__(self):
+        """Initialise the MergeTableAccumulator class."""
+        self._chunks: List[DataFrame] = []
+
+    def __len__(self) -> int:
+        """Return the number of accumulated merges (including the seed self merges).
+
+        :return: The number of merges.
+        """
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def append(self, merges: DataFrame, is_seed_self_merge: bool = False) -> None:
+        """Add the merges of an alignment step.
+
+        :param merges: The merges of the step.
+        :param is_seed_self_merge: If True the merges are the seed self merges.
+        :return:
+        """
+        chunk = merges.copy(deep=False)
+        chunk[COLUMN_IS_SEED_SELF_MERGE] = is_seed_self_merge
+        self._chunks.append(chunk)
+
+    def clear(self) -> None:
+        """Remove every accumulated merge.
+
+        :return:
+        """
+        self._chunks = []
+
+    def produce_named_table(self) -> NamedTable:
+        """Produce the merge table with alignment meta data, without the seed self merges.
+
+        The merges of the latest step are first, as in the table produced by merging the
+        merges of each step into the merge table.
+
+        :return: The merge named table.
+        """
+        chunks = [chunk for chunk in reversed(self._chunks) if len(chunk) > 0]
+        if len(chunks) == 0:
+            return NamedTable(
+                name=TABLE_MERGES_WITH_META_DATA,
+                dataframe=pd.DataFrame([], columns=list(SCHEMA_MERGE_TABLE_WITH_META_DATA)),
+            )
+        all_merges = pd.concat(chunks, ignore_index=True)
+        merges = all_merges[~all_merges[COLUMN_IS_SEED_SELF_MERGE].astype(bool)].reindex(
+            columns=SCHEMA_MERGE_TABLE_WITH_META_DATA
+        )
+        merges = merges.drop_duplicates(keep="first").reset_index(drop=True)
+        logger.info(f"Filtered out seed self merges ({len(all_merges):,d} -> {len(merges):,d})")
+        return NamedTable(name=TABLE_MERGES_WITH_META_DATA, dataframe=merges)
+
+
 def produce_named_table_domain_nodes(nodes: DataFrame, merged_nodes: DataFrame, ) -> NamedTable:
     """Produce the domain merges named table ready for distribution by removing merged nodes from input.
 
@@ -222,13 +293,9 @@ def produce_named_table_domain_nodes(nodes: DataFrame, merged_nodes: DataFrame,
     :param merged_nodes: The node merges.
     :return: The domain nodes named table.
     """
-    df = pd.concat([
-        nodes[SCHEMA_NODE_ID_LIST_TABLE],
-        merged_nodes[SCHEMA_NODE_ID_LIST_TABLE],
-        merged_nodes[SCHEMA_NODE_ID_LIST_TABLE]
-    ]) \
-        .drop_duplicates(keep=False) \
-        .sort_values(by=SCHEMA_NODE_ID_LIST_TABLE, ascending=True, inplace=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=nodes, tables_to_remove=[merged_nodes], columns=SCHEMA_NODE_ID_LIST_TABLE
+    ).sort_values(by=SCHEMA_NODE_ID_LIST_TABLE, ascending=True, inplace=False)
     return NamedTable(TABLE_NODES_DOMAIN, df)
 
 
@@ -253,8 +320,9 @@ def produce_table_unmapped_nodes(nodes: DataFrame, merges: DataFrame) -> DataFra
     :return: The set of unmapped nodes.
     """
     merged_nodes = _produce_table_merged_nodes(merges=merges)
-    df = pd.concat([nodes[[COLUMN_DEFAULT_ID]], merged_nodes, merged_nodes]) \
-        .drop_duplicates(keep=False)
+    df = get_table_engine().produce_table_set_difference(
+        table=nodes, tables_to_remove=[merged_nodes], columns=[COLUMN_DEFAULT_ID]
+    )
     logger.info(
         f"Out of {len(nodes):,d} nodes, {len(df):,d} "
         + f"({((len(df) / len(nodes)) * 100):.2f}%) are unmapped."
@@ -262,18 +330,22 @@ def produce_table_unmapped_nodes(nodes: DataFrame, merges: DataFrame) -> DataFra
     return df
 
 
-def _get_canonical_node_for_merge_cluster(
-        merge_cluster: List[str], alignment_priority_order: List[str]
-) -> Optional[str]:
-    """Return the canonical node ID for a given merge cluster.
+def _produce_node_priority_ranks(node_ids: np.ndarray, alignment_priority_order: List[str]) -> np.ndarray:
+    """Produce the alignment priority rank of each node ID from its namespace.
 
-    :param merge_cluster: The merge cluster, i.e. nodes that form a merge chain.
+    :param node_ids: The node IDs.
     :param alignment_priority_order: The alignment priority order that defines the
     canonical node.
-    :return: The canonical node ID if it can be determined, otherwise None.
+    :return: The rank array, nodes of namespaces outside the priority order have the
+    rank len(alignment_priority_order).
     """
-    merge_cluster_ns_to_id = {analysis_utils.get_namespace_for_node_id(node_id): node_id for node_id in merge_cluster}
-    for source_id in alignment_priority_order:
-        if source_id in merge_cluster_ns_to_id:
-            return merge_cluster_ns_to_id.get(source_id)
-    return None
+    namespace_ranks: Dict[str, int] = {}
+    for rank, source_id in enumerate(alignment_priority_order):
+        namespace_ranks.setdefault(source_id, rank)
+    return np.array(
+        [
+            namespace_ranks.get(analysis_utils.get_namespace_for_node_id(node_id), len(alignment_priority_order))
+            for node_id in node_ids
+        ],
+        dtype=np.int64,
+    )
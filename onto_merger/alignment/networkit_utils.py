@@ -2,14 +2,20 @@
 
 # mypy: ignore-errors
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import networkit as nk
+import numpy as np
+import pandas as pd
 from networkit import Graph
 from pandas import DataFrame
-from tqdm import tqdm
 
-from onto_merger.data.constants import COLUMN_SOURCE_ID, COLUMN_TARGET_ID
+from onto_merger.data.constants import (
+    COLUMN_SOURCE_ID,
+    COLUMN_TARGET_ID,
+    CONNECTIVITY_PATH_SEARCH_A_STAR,
+    CONNECTIVITY_PATH_SEARCH_SHORTEST_PATH_TREE,
+)
 from onto_merger.logger.log import get_logger
 
 logger = get_logger(__name__)
@@ -23,19 +29,37 @@ class NetworkitGraph:
     node_index_to_id_map: Dict[int, str]
     root_nodes = List[str]
     search_heuristic: List[int]
+    shortest_path_tree: Optional[np.ndarray]
 
-    def __init__(self, edges: DataFrame):
-        """Initialise the Graph class."""
+    def __init__(self, edges: DataFrame, path_search: str = CONNECTIVITY_PATH_SEARCH_A_STAR):
+        """Initialise the Graph class.
+
+        :param edges: The hierarchy edge table (source is the child, target is the parent node).
+        :param path_search: The path search method, either an A* search per root for each node,
+        or a single shortest path tree (produced for all nodes at initialisation).
+        """
         logger.info(f"Started initialising hierarchy graph from {len(edges):,d} edges...")
-        src_ids = edges[COLUMN_SOURCE_ID].tolist()
-        trg_ids = edges[COLUMN_TARGET_ID].tolist()
-        node_ids = list(set(src_ids + trg_ids))
-        self.root_nodes = [node_id for node_id in node_ids if node_id not in src_ids]
         logger.info("Producing node ID lookup maps..")
+        edge_node_ids = np.concatenate(
+            [edges[COLUMN_SOURCE_ID].to_numpy(dtype=object), edges[COLUMN_TARGET_ID].to_numpy(dtype=object)]
+        )
+        node_indices, node_ids = pd.factorize(edge_node_ids)
+        node_ids = node_ids.tolist()
+        source_indices, target_indices = node_indices[: len(edges)], node_indices[len(edges) :]
+        is_root = np.ones(len(node_ids), dtype=bool)
+        is_root[source_indices] = False
+        self.root_nodes = [node_ids[node_index] for node_index in np.flatnonzero(is_root)]
         self.node_id_to_index_map, self.node_index_to_id_map = NetworkitGraph._produce_node_id_maps(node_ids=node_ids)
         logger.info("Adding edges..")
-        self.graph = self._create_networkit_graph(edges=edges, node_id_to_index=self.node_id_to_index_map)
-        self.search_heuristic = [0 for _ in range(self.graph.upperNodeIdBound())]
+        self.graph = self._create_networkit_graph(
+            source_indices=source_indices, target_indices=target_indices, node_count=len(node_ids)
+        )
+        self.search_heuristic = [0] * self.graph.upperNodeIdBound()
+        self.shortest_path_tree = None
+        if path_search == CONNECTIVITY_PATH_SEARCH_SHORTEST_PATH_TREE:
+            self.shortest_path_tree = self._produce_shortest_path_tree(
+                source_indices=source_indices, target_indices=target_indices
+            )
         logger.info(
             f"Hierarchy graph initialised with {self.graph.numberOfNodes():,d} nodes "
             + f"({len(self.root_nodes)} possible root(s)) and {self.graph.numberOfEdges():,d} edges"
@@ -54,7 +78,17 @@ class NetworkitGraph:
             for node_index in self._get_path_for_node_index(node_index=self.node_id_to_index_map[node_id])
         ]
 
+    def get_path_for_node_index(self, node_index: int) -> List[int]:
+        """Get the shortest path (to root) for a node, as node indices.
+
+        :param node_index: The node index.
+        :return: The shortest path.
+        """
+        return self._get_path_for_node_index(node_index=node_index)
+
     def _get_path_for_node_index(self, node_index: int) -> List[int]:
+        if self.shortest_path_tree is not None:
+            return self._get_path_for_node_index_from_tree(node_index=node_index)
         for root_node_id in self.root_nodes:
             root_node_index = self.node_id_to_index_map[root_node_id]
             a_star = nk.distance.AStar(self.graph, self.search_heuristic, node_index, root_node_index)
@@ -64,28 +98,84 @@ class NetworkitGraph:
                 return [node_index] + path + [root_node_index]
         return []
 
+    def _get_path_for_node_index_from_tree(self, node_index: int) -> List[int]:
+        """Walk the shortest path tree from a node to its root.
+
+        :param node_index: The node index.
+        :return: The path (node and root included), or an empty list if the node is a root
+        or cannot reach any root.
+        """
+        super_root_index = len(self.shortest_path_tree)
+        if self.shortest_path_tree[node_index] in (-1, super_root_index):
+            return []
+        path = [node_index]
+        while self.shortest_path_tree[path[-1]] != super_root_index:
+            path.append(int(self.shortest_path_tree[path[-1]]))
+        return path
+
+    def _produce_shortest_path_tree(self, source_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+        """Produce the shortest path tree from every node to the closest root.
+
+        A breadth first search is run on the reversed (parent to child) edges, from a virtual
+        super root connected to all roots, so each node is reached once via one of its
+        shortest paths. The tree is stored as parent pointers: the next node on the path to
+        the root, the super root index (node count) for roots, and -1 for nodes that cannot
+        reach a root.
+
+        :param source_indices: The source (child) node index of each edge.
+        :param target_indices: The target (parent) node index of each edge.
+        :return: The parent pointer array, indexed by node index.
+        """
+        node_count = len(self.node_id_to_index_map)
+        super_root_index = node_count
+        child_indices = source_indices.astype(np.int64)
+        parent_indices = target_indices.astype(np.int64)
+
+        # reversed adjacency (CSR): the children of each parent node
+        edge_order = np.argsort(parent_indices, kind="stable")
+        children = child_indices[edge_order]
+        offsets = np.searchsorted(parent_indices[edge_order], np.arange(node_count + 1))
+
+        # ties are broken by node ID (rather than node index) to keep the paths deterministic
+        node_id_ranks = np.empty(node_count, dtype=np.int64)
+        node_id_ranks[np.argsort(np.array([self.node_index_to_id_map[i] for i in range(node_count)]))] = np.arange(
+            node_count
+        )
+        tree = np.full(node_count, -1, dtype=np.int64)
+        frontier = np.unique([self.node_id_to_index_map[node_id] for node_id in self.root_nodes]).astype(np.int64)
+        tree[frontier] = super_root_index
+        while len(frontier) > 0:
+            # expand the frontier: all children of the frontier nodes, with the frontier node as parent
+            child_counts = offsets[frontier + 1] - offsets[frontier]
+            child_starts = np.repeat(offsets[frontier] - np.cumsum(child_counts) + child_counts, child_counts)
+            child_positions = child_starts + np.arange(child_counts.sum())
+            candidate_children = children[child_positions]
+            candidate_parents = np.repeat(frontier, child_counts)
+            is_unvisited = tree[candidate_children] == -1
+            candidate_children = candidate_children[is_unvisited]
+            candidate_parents = candidate_parents[is_unvisited]
+            # a child reached via several parents keeps the one with the smallest node ID
+            candidate_order = np.lexsort((node_id_ranks[candidate_parents], candidate_children))
+            frontier, first_positions = np.unique(candidate_children[candidate_order], return_index=True)
+            tree[frontier] = candidate_parents[candidate_order][first_positions]
+        logger.info(f"Produced shortest path tree, {np.count_nonzero(tree != -1):,d} node(s) can reach a root.")
+        return tree
+
     @staticmethod
-    def _create_networkit_graph(edges: DataFrame, node_id_to_index: dict) -> Graph:
-        """Produce a networkit graph object from a hierarchy edge table.
+    def _create_networkit_graph(source_indices: np.ndarray, target_indices: np.ndarray, node_count: int) -> Graph:
+        """Produce a networkit graph object from hierarchy edges given as COO arrays.
 
-        :param node_id_to_index:
-        :param edges: The hierarchy edge table.
-        :return: The network x graph.
+        :param source_indices: The source (child) node index of each edge.
+        :param target_indices: The target (parent) node index of each edge.
+        :param node_count: The number of nodes.
+        :return: The networkit graph.
         """
-        graph = nk.Graph(len(node_id_to_index), weighted=False, directed=True)
-        with tqdm(total=len(edges), desc="Adding edges to Networkit graph") as progress_bar:
-            for _, row in edges.iterrows():
-                graph.addEdge(node_id_to_index[row[COLUMN_SOURCE_ID]], node_id_to_index[row[COLUMN_TARGET_ID]])
-                progress_bar.update(1)
+        # the pinned networkit version has no bulk (COO) constructor
+        graph = nk.Graph(node_count, weighted=False, directed=True)
+        for source_index, target_index in zip(source_indices.tolist(), target_indices.tolist()):
+            graph.addEdge(source_index, target_index)
         return graph
 
     @staticmethod
     def _produce_node_id_maps(node_ids: List[str]) -> (Dict[str, int], Dict[int, str]):
-        node_id_to_index_map = dict()
-        node_index_to_id_map = dict()
-        with tqdm(total=len(node_ids), desc="Producing node ID lookup maps") as progress_bar:
-            for idx, node_id in enumerate(node_ids):
-                node_id_to_index_map[node_id] = idx
-                node_index_to_id_map[idx] = node_id
-                progress_bar.update(1)
-        return node_id_to_index_map, node_index_to_id_map
+        return dict(zip(node_ids, range(len(node_ids)))), dict(enumerate(node_ids))
@@ -0,0 +1,76 @@
+"""Helper methods to find connected components of integer coded edges with an array backed union-find."""
+
+import numpy as np
+
+from onto_merger.logger.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def produce_component_labels(source_codes: np.ndarray, target_codes: np.ndarray, node_count: int) -> np.ndarray:
+    """Label each node with the smallest node code of its connected component.
+
+    The edges are undirected. Labels are propagated along the edges (each node takes the
+    smallest label of its edges) and then compressed by pointer jumping, until every edge
+    connects nodes with the same label. Each label points to a node of the same component,
+    so the smallest node code of a component is the only fixed point of that component.
+
+    :param source_codes: The source node codes of the edges (0 <= code < node_count).
+    :param target_codes: The target node codes of the edges (0 <= code < node_count).
+    :param node_count: The number of nodes (nodes without edges form their own component).
+    :return: The component label array, indexed by node code.
+    """
+    labels = np.arange(node_count, dtype=np.int64)
+    iteration_count = 0
+    while True:
+        iteration_count += 1
+        edge_labels = np.minimum(labels[source_codes], labels[target_codes])
+        updated_labels = labels.copy()
+        np.minimum.at(updated_labels, source_codes, edge_labels)
+        np.minimum.at(updated_labels, target_codes, edge_labels)
+        updated_labels = _compress_labels(labels=updated_labels)
+        if np.array_equal(updated_labels, labels):
+            break
+        labels = updated_labels
+    logger.debug(f"Produced component labels for {node_count:,d} nodes in {iteration_count} iteration(s).")
+    return labels
+
+
+def produce_component_numbers(labels: np.ndarray) -> np.ndarray:
+    """Produce the component numbers, in the order of the smallest node code of each component.
+
+    :param labels: The component label array (as produced by produce_component_labels).
+    :return: The component number array (0..component_count-1), indexed by node code.
+    """
+    _, component_numbers = np.unique(labels, return_inverse=True)
+    return component_numbers
+
+
+def produce_component_representatives(labels: np.ndarray, node_ranks: np.ndarray) -> np.ndarray:
+    """Select the node with the smallest rank in each component.
+
+    :param labels: The component label array (as produced by produce_component_labels).
+    :param node_ranks: The rank of each node, ties must be broken by the caller (the first
+    node code wins otherwise).
+    :return: The representative node code array, indexed by component label.
+    """
+    node_order = np.lexsort((np.arange(len(labels)), node_ranks, labels))
+    sorted_labels = labels[node_order]
+    is_first_of_component = np.ones(len(node_order), dtype=bool)
+    is_first_of_component[1:] = sorted_labels[1:] != sorted_labels[:-1]
+    representatives = np.full(len(labels), -1, dtype=np.int64)
+    representatives[sorted_labels[is_first_of_component]] = node_order[is_first_of_component]
+    return representatives
+
+
+def _compress_labels(labels: np.ndarray) -> np.ndarray:
+    """Follow the label pointers until every label is a root (pointer jumping).
+
+    :param labels: The label array, where each label is a node code.
+    :return: The compressed label array.
+    """
+    while True:
+        jumped_labels = labels[labels]
+        if np.array_equal(jumped_labels, labels):
+            return labels
+        labels = jumped_labels
@@ -10,6 +10,18 @@ schema = {
         "seed_ontology_name": {"type": "string"},
         "force_through_failed_validation": {"type": "bool"},
         "image_format": {"type": "string", "pattern": "^(png|svg|html)$"},
+        "connectivity_path_search": {"type": "string", "pattern": "^(a_star|shortest_path_tree)$"},
+        "storage_format": {"type": "string", "pattern": "^(csv|parquet)$"},
+        "stage_cache_max_size_mb": {"type": "integer", "minimum": 0},
+        "validation_engine": {"type": "string", "pattern": "^(native|great_expectations)$"},
+        "profiling_sample_row_threshold": {"type": "integer", "minimum": 0},
+        "profiling_worker_count": {"type": "integer", "minimum": 1},
+        "stage_worker_count": {"type": "integer", "minimum": 1},
+        "trace_memory_allocations": {"type": "boolean"},
+        "skip_profiling": {"type": "boolean"},
+        "skip_validation": {"type": "boolean"},
+        "skip_report": {"type": "boolean"},
+        "table_engine": {"type": "string", "pattern": "^(pandas|polars|duckdb)$"},
         "mappings": {
             "type": "object",
             "required": ["type_groups"],
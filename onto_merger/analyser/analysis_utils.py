@@ -1,10 +1,12 @@
 """Helper methods for data file processing and analysis."""
 
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 import pandas as pd
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
+from onto_merger.analyser import table_engine
 from onto_merger.data.constants import (
     COLUMN_COUNT,
     COLUMN_DEFAULT_ID,
@@ -13,10 +15,9 @@ from onto_merger.data.constants import (
     COLUMN_SOURCE_ID,
     COLUMN_SOURCE_TO_TARGET,
     COLUMN_TARGET_ID,
-    NODE_ID_COLUMNS,
     SCHEMA_NODE_NAMESPACE_FREQUENCY_TABLE,
 )
-from onto_merger.data.dataclasses import NamedTable
+from onto_merger.data.dataclasses import NamedTable, NamespaceIndex
 from onto_merger.logger.log import get_logger
 
 logger = get_logger(__name__)
@@ -49,17 +50,25 @@ def produce_table_with_namespace_column_for_node_ids(table: DataFrame) -> DataFr
     :param table: The table to be appended with namespace column(s).
     :return: A new table with a corresponding namespace column for all node ID columns.
     """
-    if len(table) == 0:
-        return table
-    table_copy = table.copy()
-    table_node_id_columns = sorted([col_name for col_name in NODE_ID_COLUMNS if col_name in list(table_copy)])
-    for node_id_column in table_node_id_columns:
-        namespace_column_name = get_namespace_column_name_for_column(node_id_column=node_id_column)
-        if namespace_column_name not in list(table_copy):
-            table_copy[namespace_column_name] = table_copy[node_id_column].apply(
-                lambda node_id: get_namespace_for_node_id(str(node_id))
-            )
-    return table_copy
+    return table_engine.get_table_engine().produce_table_with_namespace_column_for_node_ids(table=table)
+
+
+def produce_namespace_column_for_node_ids(node_ids: Series) -> np.ndarray:
+    """Produce the namespace values for a node ID column.
+
+    The namespace is computed once per distinct node ID, so encoded (categorical) columns
+    are not expanded to strings, and only the node IDs present in the column are parsed.
+
+    :param node_ids: The node ID column.
+    :return: The namespace array, aligned with the node ID column.
+    """
+    codes, unique_node_ids = pd.factorize(node_ids)
+    # null node IDs are coded -1, i.e. they take the last element: the namespace of a missing ID
+    namespaces = np.array(
+        [get_namespace_for_node_id(str(node_id)) for node_id in unique_node_ids] + [str(np.nan)],
+        dtype=object,
+    )
+    return namespaces[codes]
 
 
 def produce_table_with_namespace_column_pair(table: DataFrame) -> DataFrame:
@@ -76,10 +85,10 @@ def produce_table_with_namespace_column_pair(table: DataFrame) -> DataFrame:
     if COLUMN_SOURCE_TO_TARGET in list(table):
         return table
     table_copy = table.copy()
-    table_copy[COLUMN_SOURCE_TO_TARGET] = table_copy.apply(
-        lambda x: f"{get_namespace_for_node_id(x[COLUMN_SOURCE_ID])}"
-                  + f" to {get_namespace_for_node_id(x[COLUMN_TARGET_ID])}",
-        axis=1,
+    table_copy[COLUMN_SOURCE_TO_TARGET] = (
+        produce_namespace_column_for_node_ids(node_ids=table_copy[COLUMN_SOURCE_ID])
+        + " to "
+        + produce_namespace_column_for_node_ids(node_ids=table_copy[COLUMN_TARGET_ID])
     )
     return table_copy
 
@@ -104,18 +113,25 @@ def add_namespace_column_to_loaded_tables(
     ]
 
 
-def filter_nodes_for_namespace(nodes: DataFrame, namespace: str) -> DataFrame:
+def filter_nodes_for_namespace(
+        nodes: DataFrame, namespace: str, namespace_index: Optional[NamespaceIndex] = None
+) -> DataFrame:
     """Filter a given node dataframe for a namespace.
 
     :param nodes: The node table to be filtered.
     :param namespace: The ontology ID.
+    :param namespace_index: The namespace index of the node table, if available: the rows
+    are then sliced from the index instead of scanning the namespace column.
     :return: The node dataframe where all nodes belong to the same ontology (namespace).
     """
-    nodes_copy = nodes.copy()
-    default_id_ns = get_namespace_column_name_for_column(COLUMN_DEFAULT_ID)
-    if default_id_ns not in list(nodes_copy):
-        nodes_copy = produce_table_with_namespace_column_for_node_ids(table=nodes_copy)
-    nodes_for_namespace = nodes_copy.query(f'{default_id_ns} == "{namespace}"', inplace=False)
+    if namespace_index is not None:
+        nodes_for_namespace = nodes.iloc[namespace_index.get_row_positions(namespace=namespace)]
+    else:
+        nodes_copy = nodes.copy()
+        default_id_ns = get_namespace_column_name_for_column(COLUMN_DEFAULT_ID)
+        if default_id_ns not in list(nodes_copy):
+            nodes_copy = produce_table_with_namespace_column_for_node_ids(table=nodes_copy)
+        nodes_for_namespace = nodes_copy.query(f'{default_id_ns} == "{namespace}"', inplace=False)
     logger.info(
         f"Found {len(nodes_for_namespace):,d} nodes for namespace " + f"{namespace} from total {len(nodes):,d} nodes."
     )
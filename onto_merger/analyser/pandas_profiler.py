@@ -1,42 +1,184 @@
 """Helper methods to use Pandas profiling."""
 
-from typing import List
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 
+import numpy as np
+import pandas as pd
+from pandas import CategoricalDtype, DataFrame, Series
 from pandas_profiling import ProfileReport
 
+from onto_merger.analyser.analysis_utils import get_namespace_column_name_for_column
+from onto_merger.data.constants import COLUMN_SOURCE_TO_TARGET, NODE_ID_COLUMNS
 from onto_merger.data.data_manager import DataManager
-from onto_merger.data.dataclasses import NamedTable
+from onto_merger.data.dataclasses import NamedTable, NodeIdDictionary
 from onto_merger.logger.log import get_logger
 
 logger = get_logger(__name__)
 
+# the seed of the profiling samples, so that the reports are reproducible
+PROFILING_SAMPLE_RANDOM_SEED = 42
 
-def profile_tables(tables: List[NamedTable], data_manager: DataManager) -> None:
+
+def profile_tables(
+    tables: List[NamedTable], data_manager: DataManager, sample_row_threshold: int = 0, worker_count: int = 1
+) -> None:
     """Run the Pandas profiling process for a list of tables.
 
+    Tables with more rows than the threshold are profiled on a stratified sample; the sampling
+    rate of each table is saved next to its report.
+
     :param tables: The tables to be profiled.
     :param data_manager: The data manager.
+    :param sample_row_threshold: The number of rows above which a table is sampled, 0 disables
+    sampling.
+    :param worker_count: The number of tables profiled concurrently (in separate processes).
     :return:
     """
     table_names = [table.name for table in tables]
     logger.info(f"Starting Pandas profiling for {len(tables)} tables: '{table_names}'")
+    profiled_tables = []
     for table in tables:
-        logger.info(f"Profiling table '{table.name}'")
-        report = produce_table_report(table=table)
-        report.to_file(output_file=data_manager.get_profiled_table_report_path(table_name=table.name))
+        profiled_table = produce_profiled_table(table=table, sample_row_threshold=sample_row_threshold)
+        data_manager.save_profiled_table_sampling(
+            table_name=table.name,
+            sampling={
+                "rows": len(table.dataframe),
+                "profiled_rows": len(profiled_table.dataframe),
+                "sampling_rate": len(profiled_table.dataframe) / len(table.dataframe) if len(table.dataframe) else 1.0,
+            },
+        )
+        profiled_tables.append(profiled_table)
+    report_paths = [data_manager.get_profiled_table_report_path(table_name=table.name) for table in profiled_tables]
+    if worker_count > 1 and len(profiled_tables) > 1:
+        # the workers are spawned (not forked), as the pipeline stages may run in several threads
+        with ProcessPoolExecutor(
+            max_workers=min(worker_count, len(profiled_tables)), mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            list(executor.map(_profile_table, profiled_tables, report_paths, [len(t.dataframe) for t in tables]))
+    else:
+        for profiled_table, report_path, table in zip(profiled_tables, report_paths, tables):
+            _profile_table(table=profiled_table, report_path=report_path, row_count=len(table.dataframe))
     logger.info(f"Finished Pandas profiling for tables '{table_names}'.")
 
 
-def produce_table_report(table: NamedTable) -> ProfileReport:
+def produce_table_report(table: NamedTable, row_count: Optional[int] = None) -> ProfileReport:
     """Run the Pandas profiling process for one named table.
 
     :param table: The named table to be profiled.
+    :param row_count: The number of rows of the full table, if the named table is a sample.
     :return:
     """
+    title = f"{table.name} Profiling Report"
+    if row_count is not None and row_count > len(table.dataframe):
+        title += f" (sample of {len(table.dataframe):,d} of {row_count:,d} rows)"
     return ProfileReport(
-        df=table.dataframe.reset_index(drop=True, inplace=False),
-        title=f"{table.name} Profiling Report",
+        df=NodeIdDictionary.decode_table(table=table.dataframe).reset_index(drop=True, inplace=False),
+        title=title,
         html={"style": {"logo": "../images/onto_merger_logo.jpg"}},
         minimal=True,
         n_freq_table_max=250,
     )
+
+
+def produce_profiled_table(table: NamedTable, sample_row_threshold: int) -> NamedTable:
+    """Produce the table that is profiled: the table itself, or its sample if it is too large.
+
+    :param table: The named table to be profiled.
+    :param sample_row_threshold: The number of rows above which the table is sampled, 0 disables
+    sampling.
+    :return: The named table to be profiled.
+    """
+    if sample_row_threshold <= 0 or len(table.dataframe) <= sample_row_threshold:
+        return table
+    sample = produce_stratified_sample(
+        table=table.dataframe,
+        sampling_rate=sample_row_threshold / len(table.dataframe),
+        strata=_produce_strata(table=table.dataframe),
+    )
+    logger.info(f"Profiling a sample of {len(sample):,d} of {len(table.dataframe):,d} rows of table '{table.name}'")
+    return NamedTable(name=table.name, dataframe=sample)
+
+
+def produce_stratified_sample(
+    table: DataFrame,
+    sampling_rate: float,
+    strata: Optional[np.ndarray] = None,
+    random_seed: int = PROFILING_SAMPLE_RANDOM_SEED,
+) -> DataFrame:
+    """Produce a reproducible stratified sample of a table.
+
+    Each stratum is sampled with the same rate (rounded up), so every stratum has at least
+    one row in the sample. The sample keeps the table order.
+
+    :param table: The table to be sampled.
+    :param sampling_rate: The sampling rate (0 < rate <= 1).
+    :param strata: The stratum code of each row, if None the table is one stratum.
+    :param random_seed: The seed of the row selection.
+    :return: The sample.
+    """
+    if strata is None:
+        strata = np.zeros(len(table), dtype=np.int64)
+    random_keys = np.random.default_rng(random_seed).random(len(table))
+    row_order = np.lexsort((random_keys, strata))
+    sorted_strata = strata[row_order]
+    is_stratum_start = np.ones(len(row_order), dtype=bool)
+    is_stratum_start[1:] = sorted_strata[1:] != sorted_strata[:-1]
+    stratum_starts = np.flatnonzero(is_stratum_start)
+    stratum_sizes = np.diff(np.append(stratum_starts, len(row_order)))
+    stratum_quotas = np.ceil(stratum_sizes * sampling_rate).astype(np.int64)
+    stratum_numbers = np.cumsum(is_stratum_start) - 1
+    rank_in_stratum = np.arange(len(row_order)) - stratum_starts[stratum_numbers]
+    sampled_rows = np.sort(row_order[rank_in_stratum < stratum_quotas[stratum_numbers]])
+    return table.iloc[sampled_rows]
+
+
+def _produce_strata(table: DataFrame) -> Optional[np.ndarray]:
+    """Produce the stratum codes of the rows: the namespace (pair) of the node IDs.
+
+    :param table: The table to be sampled.
+    :return: The stratum code array, or None if the table has no node ID column.
+    """
+    if COLUMN_SOURCE_TO_TARGET in table:
+        return pd.factorize(table[COLUMN_SOURCE_TO_TARGET])[0]
+    namespace_codes = [
+        (
+            pd.factorize(table[get_namespace_column_name_for_column(node_id_column=column)])[0]
+            if get_namespace_column_name_for_column(node_id_column=column) in table
+            else _produce_namespace_codes(node_ids=table[column])
+        )
+        for column in NODE_ID_COLUMNS
+        if column in table
+    ]
+    if not namespace_codes:
+        return None
+    # null node IDs (code -1) form their own stratum
+    strata = namespace_codes[0] + 1
+    for codes in namespace_codes[1:]:
+        strata = strata * (codes.max(initial=-1) + 2) + codes + 1
+    return strata
+
+
+def _produce_namespace_codes(node_ids: Series) -> np.ndarray:
+    """Produce the namespace code of each node ID (namespaces are split once per category).
+
+    :param node_ids: The node ID column.
+    :return: The namespace code array (null node IDs have the code -1).
+    """
+    if isinstance(node_ids.dtype, CategoricalDtype):
+        category_namespace_codes = pd.factorize(Series(node_ids.cat.categories).str.split(":").str[0])[0]
+        return np.append(category_namespace_codes, -1)[node_ids.cat.codes.to_numpy()]
+    return pd.factorize(node_ids.astype(str).str.split(":").str[0])[0]
+
+
+def _profile_table(table: NamedTable, report_path: str, row_count: int) -> None:
+    """Profile a table and save the report HTML.
+
+    :param table: The named table (or its sample) to be profiled.
+    :param report_path: The report HTML path.
+    :param row_count: The number of rows of the full table.
+    :return:
+    """
+    logger.info(f"Profiling table '{table.name}'")
+    produce_table_report(table=table, row_count=row_count).to_file(output_file=report_path)
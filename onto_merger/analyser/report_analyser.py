@@ -3,8 +3,7 @@
 Produce data and figures are presented in the report.
 """
 
-from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pandas import DataFrame
 
@@ -24,6 +23,7 @@ from onto_merger.data.constants import (
     DIRECTORY_ANALYSIS,
     DIRECTORY_INTERMEDIATE,
     DIRECTORY_OUTPUT,
+    STORAGE_FORMAT_CSV,
     TABLE_ALIGNMENT_STEPS_REPORT,
     TABLE_CONNECTIVITY_STEPS_REPORT,
     TABLE_EDGES_HIERARCHY,
@@ -45,9 +45,9 @@ from onto_merger.data.dataclasses import (
     AlignmentConfig,
     DataRepository,
     NamedTable,
+    ResourceUsage,
     RuntimeData,
     convert_runtime_steps_to_named_table,
-    format_datetime,
 )
 from onto_merger.logger.log import get_logger
 from onto_merger.report.constants import (
@@ -83,7 +83,7 @@ class ReportAnalyser:
         self._data_manager = data_manager
         self._data_repo = data_repo
         self._runtime_data = runtime_data
-        self._start_date_time = datetime.now()
+        self._start_resource_usage = ResourceUsage.measure(data_repo=data_repo)
 
     # MAIN #
     def produce_report_data(self) -> None:
@@ -242,7 +242,9 @@ class ReportAnalyser:
                     report_analyser_utils.produce_hierarchy_edge_path_analysis(
                         hierarchy_edges_paths=self._data_manager.load_table(
                             table_name="connectivity_hierarchy_edges_paths",
-                            process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}/{DIRECTORY_ANALYSIS}"
+                            process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}/{DIRECTORY_ANALYSIS}",
+                            columns=["connected_node_ns", "length_original_path", "length_produced_path"],
+                            storage_format=STORAGE_FORMAT_CSV,
                         ),
                     )
                 )
@@ -276,8 +278,11 @@ class ReportAnalyser:
             tables=tables
         )
 
-    def _produce_data_testing_analysis(self) -> DataFrame:
+    def _produce_data_testing_analysis(self) -> Optional[DataFrame]:
         section_dataset_name = SECTION_DATA_TESTS
+        if not self._data_manager.has_data_test_results():
+            logger.info(f"Skipped report section '{section_dataset_name}' analysis, the data was not tested.")
+            return None
         logger.info(f"Producing report section '{section_dataset_name}' analysis...")
         merged_test_stats, dataset_stat_tables = report_analyser_utils.produce_data_testing_table_stats(
             data_manager=self._data_manager
@@ -292,8 +297,11 @@ class ReportAnalyser:
         )
         return merged_test_stats
 
-    def _produce_data_profiling_analysis(self) -> DataFrame:
+    def _produce_data_profiling_analysis(self) -> Optional[DataFrame]:
         section_dataset_name = SECTION_DATA_PROFILING
+        if not self._data_manager.has_profiled_table_reports():
+            logger.info(f"Skipped report section '{section_dataset_name}' analysis, the data was not profiled.")
+            return None
         logger.info(f"Producing report section '{section_dataset_name}' analysis...")
         merged_profiling_stats, dataset_profiling_tables = report_analyser_utils.produce_data_profiling_table_stats(
             data_manager=self._data_manager
@@ -309,8 +317,8 @@ class ReportAnalyser:
         return merged_profiling_stats
 
     def _produce_overview_analysis(self,
-                                   data_profiling_stats: DataFrame,
-                                   data_test_stats: DataFrame) -> None:
+                                   data_profiling_stats: Optional[DataFrame],
+                                   data_test_stats: Optional[DataFrame]) -> None:
         section_dataset_name = SECTION_OVERVIEW
         logger.info(f"Producing report section '{section_dataset_name}' analysis...")
 
@@ -324,11 +332,15 @@ class ReportAnalyser:
                 data_manager=self._data_manager,
                 data_repo=self._data_repo,
             ),
-            report_analyser_utils.produce_validation_overview_analyses(
-                data_profiling_stats=data_profiling_stats,
-                data_test_stats=data_test_stats,
-            )
         ]
+        # the validation overview needs both the profiling and the data test results
+        if data_profiling_stats is not None and data_test_stats is not None:
+            tables.append(
+                report_analyser_utils.produce_validation_overview_analyses(
+                    data_profiling_stats=data_profiling_stats,
+                    data_test_stats=data_test_stats,
+                )
+            )
         tables.extend(
             [
                 NamedTable(f"hierarchy_edge_{table.name}", table.dataframe)
@@ -340,12 +352,10 @@ class ReportAnalyser:
         )
 
         # runtime
-        end_date_time = datetime.now()
-        analysis_runtime = RuntimeData(
+        analysis_runtime = RuntimeData.from_resource_usage(
             task="ANALYSIS",
-            start=format_datetime(self._start_date_time),
-            end=format_datetime(end_date_time),
-            elapsed=(end_date_time - self._start_date_time).total_seconds()
+            start=self._start_resource_usage,
+            end=ResourceUsage.measure(data_repo=self._data_repo),
         )
         self._runtime_data.append(analysis_runtime)
         run_time_table = convert_runtime_steps_to_named_table(steps=self._runtime_data)
@@ -359,6 +369,12 @@ class ReportAnalyser:
                 data_repo=self._data_repo,
             )
         )
+        tables.append(
+            report_analyser_utils.produce_resource_usage_table(
+                table_name=TABLE_PIPELINE_STEPS_REPORT,
+                data_repo=self._data_repo,
+            )
+        )
 
         # save produced
         self._data_manager.save_analysis_named_tables(
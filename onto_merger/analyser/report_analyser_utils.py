@@ -9,10 +9,10 @@ from typing import List, Tuple
 
 import pandas as pd
 from pandas import DataFrame
-from pandas_profiling import __version__ as pandas_profiling_version
 
-from onto_merger.alignment import hierarchy_utils
-from onto_merger.analyser import analysis_utils, plotly_utils
+# the plotting, graph and profiling libraries are imported by the functions that use them, so the
+# data test result parsing (used by the validation stages) does not load them
+from onto_merger.analyser import analysis_utils
 from onto_merger.analyser.constants import (
     ANALYSIS_GENERAL,
     COLUMN_FREQ,
@@ -36,6 +36,7 @@ from onto_merger.data.constants import (
     DIRECTORY_OUTPUT,
     DOMAIN_SUFFIX,
     SCHEMA_NODE_ID_LIST_TABLE,
+    SCHEMA_RESOURCE_USAGE_COLUMNS,
     TABLE_ALIGNMENT_STEPS_REPORT,
     TABLE_CONNECTIVITY_STEPS_REPORT,
     TABLE_EDGES_HIERARCHY,
@@ -66,6 +67,7 @@ from onto_merger.data.constants import (
     TABLES_MAPPING,
     TABLES_MERGE,
     TABLES_NODE,
+    VALIDATION_ENGINE_GREAT_EXPECTATIONS,
 )
 from onto_merger.data.data_manager import DataManager
 from onto_merger.data.dataclasses import DataRepository, NamedTable
@@ -224,11 +226,13 @@ def produce_summary_data_tests(data_repo: DataRepository,
     :param data_repo: The data repository containing the produced tables.
     :return: The summary as a named table.
     """""
+    is_great_expectations_engine = (stats["validation_engine"] == VALIDATION_ENGINE_GREAT_EXPECTATIONS).all()
     summary = [
         {"metric": "Process runtime",
          "values": _get_runtime_for_main_step(process_name="VALIDATION", data_repo=data_repo)},
         {"metric": "Data docs report",
-         "values": '<a href="data_docs/local_site/index.html" target="_blank">Link</a>'},
+         "values": '<a href="data_docs/local_site/index.html" target="_blank">Link</a>'
+         if is_great_expectations_engine else "Not produced (native validation engine)"},
         {"metric": "Number of tables tested", "values": len(stats)},
         {"metric": "Number of data tests run", "values": stats['nb_validations'].sum()},
         {"metric": "Number of failed tests (input data)",
@@ -241,7 +245,8 @@ def produce_summary_data_tests(data_repo: DataRepository,
          "values": stats.query(expr=f"directory == '{DIRECTORY_DOMAIN}'", inplace=False)
          ['nb_failed_validations'].sum()},
         {"metric": "Total failed tests", "values": stats['nb_failed_validations'].sum()},
-        {"metric": "Great Expectations package version", "values": f"<code>{stats['ge_version'].iloc[0]}</code>"},
+        {"metric": "Great Expectations package version", "values": f"<code>{stats['ge_version'].iloc[0]}</code>"}
+        if is_great_expectations_engine else {"metric": "Validation engine", "values": "<code>native</code>"},
     ]
     return NamedTable(
         TABLE_SECTION_SUMMARY,
@@ -257,13 +262,17 @@ def produce_summary_data_profiling(data_repo: DataRepository,
     :param data_repo: The data repository containing the produced tables.
     :return: The summary as a named table.
     """""
+    from pandas_profiling import __version__ as pandas_profiling_version
+
     summary = [
         {"metric": "Process runtime",
          "values": _get_runtime_for_main_step(process_name="PROFILING", data_repo=data_repo)},
         {"metric": "Data profiling reports (folder)",
          "values": '<a href="data_profile_reports/" target="_blank">Link</a>'},
         {"metric": "Number of tables profiled", "values": len(data_profiling_stats)},
-        {"metric": "Number of rows profiled", "values": data_profiling_stats['rows'].sum()},
+        {"metric": "Number of rows", "values": data_profiling_stats['rows'].sum()},
+        {"metric": "Number of rows profiled", "values": data_profiling_stats['profiled_rows'].sum()},
+        {"metric": "Number of sampled tables", "values": (data_profiling_stats['sampling_rate'] < 1.0).sum()},
         {"metric": "Total file size",
          "values": f"{data_profiling_stats['size_float'].sum() / float(1 << 20):,.3f}MB"},
         {"metric": "Pandas profiling version package version",
@@ -331,6 +340,8 @@ def produce_step_node_analysis_plot(
     :param b_start_value:
     :return:
     """
+    from onto_merger.analyser import plotly_utils
+
     col_step_counter = "step_counter"
     col_source = "step_counter"
     total_count = 0
@@ -371,6 +382,7 @@ def produce_data_testing_table_stats(
             ge_validation_report_map=ge_validation_report_map,
             validation_analysis=validation_analysis,
             directory=DIRECTORY_INPUT,
+            storage_format=data_manager.get_storage_format(process_directory=DIRECTORY_INPUT),
         )
     )
     intermediate_df = pd.DataFrame(
@@ -379,6 +391,7 @@ def produce_data_testing_table_stats(
             ge_validation_report_map=ge_validation_report_map,
             validation_analysis=validation_analysis,
             directory=DIRECTORY_INTERMEDIATE,
+            storage_format=data_manager.get_storage_format(process_directory=DIRECTORY_INTERMEDIATE),
         )
     )
     output_df = pd.DataFrame(
@@ -387,6 +400,7 @@ def produce_data_testing_table_stats(
             ge_validation_report_map=ge_validation_report_map,
             validation_analysis=validation_analysis,
             directory="domain",
+            storage_format=data_manager.get_storage_format(process_directory="domain"),
         )
     )
     return (
@@ -420,7 +434,10 @@ def _produce_ge_validation_analysis(data_manager: DataManager, ) -> dict:
                     "success_percent": validation_json['statistics']['success_percent'],
                     "nb_failed_validations": validation_json['statistics']['unsuccessful_expectations'],
                     "success": validation_json['success'],
-                    "ge_version": validation_json['meta']["great_expectations_version"],
+                    "ge_version": validation_json['meta'].get("great_expectations_version"),
+                    "validation_engine": validation_json['meta'].get(
+                        "validation_engine", VALIDATION_ENGINE_GREAT_EXPECTATIONS
+                    ),
                 }
             )
     data_dic = {
@@ -442,17 +459,19 @@ def produce_ge_validation_analysis_as_table(data_manager: DataManager, ) -> Data
 def _produce_data_test_stats_for_directory(tables: List[str],
                                            directory: str,
                                            ge_validation_report_map: dict,
-                                           validation_analysis: dict) -> List[dict]:
+                                           validation_analysis: dict,
+                                           storage_format: str) -> List[dict]:
     return [
         {
             "directory": directory,
             "type": _get_table_type_for_table_name(table_name=table),
-            "name": f'{table.replace("_domain", "")}.csv',
+            "name": f'{table.replace("_domain", "")}.{storage_format}',
             "report": ge_validation_report_map.get(table),
             "nb_validations": validation_analysis[f"{directory}_{table}"]["nb_validations"],
             "nb_failed_validations": validation_analysis[f"{directory}_{table}"]["nb_failed_validations"],
             "success_percent": validation_analysis[f"{directory}_{table}"]["success_percent"],
             "ge_version": validation_analysis[f"{directory}_{table}"]["ge_version"],
+            "validation_engine": validation_analysis[f"{directory}_{table}"]["validation_engine"],
         }
         for table in tables if "steps_report" not in table
     ]
@@ -504,30 +523,41 @@ def _produce_data_profiling_stats_for_directory(tables: List[NamedTable],
                                                 folder_path: str,
                                                 directory: str,
                                                 data_manager: DataManager) -> List[dict]:
+    storage_format = data_manager.get_storage_format(process_directory=directory)
     return [
         {
             "directory": directory,
             "type": _get_table_type_for_table_name(table_name=table.name),
-            "name": f'{table.name.replace("_domain", "")}.csv',
+            "name": f'{table.name.replace("_domain", "")}.{storage_format}',
             "rows": len(table.dataframe),
             "columns": len(list(table.dataframe)),
             "size": _get_file_size_in_mb_for_named_table(
                 table_name=table.name,
-                folder_path=folder_path
+                folder_path=folder_path,
+                storage_format=storage_format
             ),
             "size_float": _get_file_size_for_named_table(
                 table_name=table.name,
-                folder_path=folder_path
+                folder_path=folder_path,
+                storage_format=storage_format
             ),
             "report": data_manager.get_profiled_table_report_path(
                 table_name=table.name,
                 relative_path=True
-            )
+            ),
+            **_get_profiled_table_sampling(table=table, data_manager=data_manager),
         }
         for table in tables if "steps_report" not in table.name
     ]
 
 
+def _get_profiled_table_sampling(table: NamedTable, data_manager: DataManager) -> dict:
+    sampling = data_manager.load_profiled_table_sampling(table_name=table.name)
+    if sampling is None:
+        return {"profiled_rows": len(table.dataframe), "sampling_rate": 1.0}
+    return {"profiled_rows": sampling["profiled_rows"], "sampling_rate": sampling["sampling_rate"]}
+
+
 # NODE ANALYSIS #
 def produce_node_analyses(
         node_table: NamedTable, mappings: DataFrame, edges_hierarchy: DataFrame
@@ -772,6 +802,8 @@ def _process_node_status_table_and_plot(
         data: List[list], total_count: int, section_dataset_name: str,
         data_manager: DataManager, is_one_bar: bool = True,
 ) -> DataFrame:
+    from onto_merger.analyser import plotly_utils
+
     node_status_table = _produce_and_save_node_status_table(
         data=data,
         total_count=total_count,
@@ -956,6 +988,8 @@ def produce_connectivity_hierarchy_edge_overview_analyses(
     :param data_manager: The data manager instance.
     :return: The analysis result tables.
     """
+    from onto_merger.analyser import plotly_utils
+
     seed_ns = data_manager.load_alignment_config().base_config.seed_ontology_name
     edge_analysis_for_mapped_nss = produce_hierarchy_edge_analysis_for_connected_nss(edges=edges_output)
     rows = []
@@ -1052,6 +1086,8 @@ def produce_overview_hierarchy_edge_comparison(
     :param data_repo: The data repository containing the produced tables.
     :return: The analysis result tables.
     """
+    from onto_merger.alignment import hierarchy_utils
+
     # input
     input_edges = analysis_utils.produce_table_with_namespace_column_for_node_ids(
         table=data_repo.get(TABLE_EDGES_HIERARCHY).dataframe)
@@ -1164,7 +1200,7 @@ def _get_hierarchy_edge_input_children_count_descriptions(
 def _get_child_counts(hierarchy_edges: DataFrame) -> DataFrame:
     df = hierarchy_edges.copy()
     df = df[[COLUMN_TARGET_ID, COLUMN_SOURCE_ID]] \
-        .groupby([COLUMN_TARGET_ID]) \
+        .groupby([COLUMN_TARGET_ID], observed=True) \
         .agg(children_count=(COLUMN_SOURCE_ID, lambda x: len(set(x))),
              children=(COLUMN_SOURCE_ID, lambda x: set(x))) \
         .reset_index() \
@@ -1210,6 +1246,8 @@ def produce_merge_cluster_analysis(merges_aggregated: DataFrame, data_manager: D
     :param data_manager: The data manager instance.
     :return: The analysis result tables
     """
+    from onto_merger.analyser import plotly_utils
+
     column_cluster_size = 'cluster_size'
     column_many_to_one_nss = 'many_to_one_nss'
     column_many_to_one_nss_size = f"{column_many_to_one_nss}_size"
@@ -1218,7 +1256,7 @@ def produce_merge_cluster_analysis(merges_aggregated: DataFrame, data_manager: D
     df = merges_aggregated.copy()
     df = df[[COLUMN_TARGET_ID, COLUMN_SOURCE_ID,
              COLUMN_NAMESPACE_TARGET_ID, COLUMN_NAMESPACE_SOURCE_ID]] \
-        .groupby([COLUMN_TARGET_ID, COLUMN_NAMESPACE_TARGET_ID]) \
+        .groupby([COLUMN_TARGET_ID, COLUMN_NAMESPACE_TARGET_ID], observed=True) \
         .agg(cluster_size=(COLUMN_SOURCE_ID, lambda x: len(list(x)) + 1),
              merged_nss_unique_count=(COLUMN_NAMESPACE_SOURCE_ID, lambda x: len(set(x))),
              merged_nss_count=(COLUMN_NAMESPACE_SOURCE_ID, lambda x: len(list(x))),
@@ -1286,15 +1324,18 @@ def produce_merge_cluster_analysis(merges_aggregated: DataFrame, data_manager: D
 
 # HELPERS: FILE SIZE ANALYSIS #
 def _get_file_size_in_mb_for_named_table(table_name: str,
-                                         folder_path: str) -> str:
-    f_size = _get_file_size_for_named_table(table_name=table_name, folder_path=folder_path)
+                                         folder_path: str,
+                                         storage_format: str) -> str:
+    f_size = _get_file_size_for_named_table(table_name=table_name, folder_path=folder_path,
+                                            storage_format=storage_format)
     return f"{f_size / float(1 << 20):,.3f}MB"
 
 
 def _get_file_size_for_named_table(table_name: str,
-                                   folder_path: str) -> float:
+                                   folder_path: str,
+                                   storage_format: str) -> float:
     table_name_for_file_store = table_name.replace(DOMAIN_SUFFIX, "")
-    return os.path.getsize(os.path.abspath(f"{folder_path}/{table_name_for_file_store}.csv"))
+    return os.path.getsize(os.path.abspath(f"{folder_path}/{table_name_for_file_store}.{storage_format}"))
 
 
 # HELPERS: ... #
@@ -1325,6 +1366,8 @@ def produce_runtime_tables(
     :param data_repo: The data repository containing the produced tables.
     :return: The analysis result tables.
     """
+    from onto_merger.analyser import plotly_utils
+
     # table
     runtime_table = _add_elapsed_seconds_column_to_runtime(
         runtime=data_repo.get(table_name=table_name).dataframe
@@ -1344,6 +1387,20 @@ def produce_runtime_tables(
     ]
 
 
+def produce_resource_usage_table(table_name: str, data_repo: DataRepository) -> NamedTable:
+    """Produce the resource usage table of the pipeline steps.
+
+    :param table_name: The runtime table name.
+    :param data_repo: The data repository containing the produced tables.
+    :return: The resource usage analysis table.
+    """
+    runtime = data_repo.get(table_name=table_name).dataframe
+    return NamedTable(
+        "pipeline_steps_report_resource_usage",
+        runtime[["task", "elapsed"] + SCHEMA_RESOURCE_USAGE_COLUMNS + ["dataframe_memory_delta_mb", "top_allocations"]],
+    )
+
+
 def _produce_runtime_overview_named_table(runtime_table: DataFrame) -> NamedTable:
     runtime_overview = [
         ("Number of steps", len(runtime_table)),
@@ -1351,6 +1408,8 @@ def _produce_runtime_overview_named_table(runtime_table: DataFrame) -> NamedTabl
         ("Start", runtime_table["start"].iloc[0]),
         ("End", runtime_table["end"].iloc[len(runtime_table) - 1]),
     ]
+    if "peak_rss_mb" in runtime_table.columns:
+        runtime_overview.append(("Peak memory (RSS)", f"{runtime_table['peak_rss_mb'].max():.1f} MB"))
     runtime_overview_df = pd.DataFrame(runtime_overview, columns=["metric", "value"])
     return NamedTable("pipeline_steps_report_runtime_overview", runtime_overview_df)
 
@@ -0,0 +1,550 @@
+"""Table engines that run the heavy table operations of the alignment and connectivity process.
+
+The engines take and return Pandas dataframes, so the callers do not depend on the engine: the
+Pandas engine (default) runs the operations in process, the Polars engine (requires the ``polars``
+and ``pyarrow`` packages) runs them as lazy, multi-threaded queries. The engine is selected with
+the ``table_engine`` configuration property.
+"""
+
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import CategoricalDtype, DataFrame
+
+from onto_merger.analyser import analysis_utils
+from onto_merger.data.constants import (
+    COLUMN_SOURCE_ID,
+    COLUMN_TARGET_ID,
+    NODE_ID_COLUMNS,
+    SCHEMA_MAPPING_TABLE,
+    TABLE_ENGINE_DUCKDB,
+    TABLE_ENGINE_PANDAS,
+    TABLE_ENGINE_POLARS,
+)
+from onto_merger.data.dataclasses import NodeIdDictionary
+from onto_merger.logger.log import get_logger
+
+logger = get_logger(__name__)
+
+# the column of the row positions in Polars queries
+_COLUMN_ROW_POSITION = "_row_position"
+
+
+class PandasTableEngine:
+    """Run the table operations with Pandas.
+
+    Other engines subclass this engine, and override the operations they implement.
+    """
+
+    name = TABLE_ENGINE_PANDAS
+
+    def produce_table_with_namespace_column_for_node_ids(self, table: DataFrame) -> DataFrame:
+        """Produce a table with a namespace column for all node ID columns.
+
+        :param table: The table to be appended with namespace column(s).
+        :return: A new table with a corresponding namespace column for all node ID columns.
+        """
+        if len(table) == 0:
+            return table
+        table_copy = table.copy()
+        for node_id_column in _get_node_id_columns(table=table_copy):
+            namespace_column_name = analysis_utils.get_namespace_column_name_for_column(node_id_column=node_id_column)
+            if namespace_column_name not in table_copy:
+                table_copy[namespace_column_name] = analysis_utils.produce_namespace_column_for_node_ids(
+                    node_ids=table_copy[node_id_column]
+                )
+        return table_copy
+
+    def filter_rows_for_values(
+        self, table: DataFrame, columns: List[str], values: Iterable, keep: bool = True
+    ) -> DataFrame:
+        """Filter a table for the rows where the given columns hold one of the values.
+
+        :param table: The table to be filtered.
+        :param columns: The compared columns.
+        :param values: The values (e.g. node IDs or mapping relations).
+        :param keep: If True the rows where every column holds one of the values are kept, if
+        False the rows where any column holds one of the values are dropped.
+        :return: The filtered table.
+        """
+        masks = [table[column].isin(values).to_numpy() for column in columns]
+        if keep:
+            return table[np.logical_and.reduce(masks)]
+        return table[~np.logical_or.reduce(masks)]
+
+    def filter_mappings_for_namespace_match(self, mappings: DataFrame, same_namespace: bool) -> DataFrame:
+        """Filter a mapping set for the mappings between nodes of the same (or of different) namespace.
+
+        :param mappings: The mapping set to be filtered.
+        :param same_namespace: If True the mappings between nodes of the same namespace are
+        kept, otherwise the mappings between nodes of different namespaces.
+        :return: The filtered mapping set.
+        """
+        if len(mappings) == 0:
+            return mappings[SCHEMA_MAPPING_TABLE]
+        df = self.produce_table_with_namespace_column_for_node_ids(table=mappings)
+        is_same_namespace = (
+            df[analysis_utils.get_namespace_column_name_for_column(COLUMN_SOURCE_ID)].to_numpy()
+            == df[analysis_utils.get_namespace_column_name_for_column(COLUMN_TARGET_ID)].to_numpy()
+        )
+        return df[is_same_namespace == same_namespace][SCHEMA_MAPPING_TABLE]
+
+    def orient_mappings_to_namespace(
+        self,
+        required_target_id_namespace: str,
+        mappings: DataFrame,
+        node_id_dictionary: Optional[NodeIdDictionary] = None,
+    ) -> DataFrame:
+        """Update a mapping so the target node is always of the specified ontology (namespace).
+
+        :param required_target_id_namespace: The ontology namespace for the target node ID.
+        :param mappings: The input mapping set to be updated.
+        :param node_id_dictionary: The node ID dictionary, if available: the namespaces are then
+        looked up by node ID code instead of being parsed from the node IDs.
+        :return: The updated mapping set.
+        """
+        if len(mappings) == 0:
+            return mappings
+        is_source_of_namespace = _produce_namespace_mask(
+            node_ids=mappings[COLUMN_SOURCE_ID],
+            namespace=required_target_id_namespace,
+            node_id_dictionary=node_id_dictionary,
+        )
+        is_target_of_namespace = _produce_namespace_mask(
+            node_ids=mappings[COLUMN_TARGET_ID],
+            namespace=required_target_id_namespace,
+            node_id_dictionary=node_id_dictionary,
+        )
+        df = mappings[SCHEMA_MAPPING_TABLE].copy()
+        df[COLUMN_SOURCE_ID] = _select_node_ids(
+            condition=is_source_of_namespace,
+            node_ids_if_true=mappings[COLUMN_TARGET_ID],
+            node_ids_if_false=mappings[COLUMN_SOURCE_ID],
+        )
+        df[COLUMN_TARGET_ID] = _select_node_ids(
+            condition=is_target_of_namespace,
+            node_ids_if_true=mappings[COLUMN_TARGET_ID],
+            node_ids_if_false=mappings[COLUMN_SOURCE_ID],
+        )
+        return df
+
+    def partition_mappings_for_source_multiplicity(self, mappings: DataFrame) -> Tuple[DataFrame, DataFrame]:
+        """Partition a mapping set according to the number of target nodes of each source node, in a single pass.
+
+        :param mappings: The input mapping set.
+        :return: The mappings of the source nodes with exactly one target node, and the mappings
+        of the source nodes with many target nodes.
+        """
+        if len(mappings) == 0:
+            return mappings, mappings
+        has_one_target = self._produce_has_one_target_mask(mappings=mappings)
+        # mappings without source node are not grouped, i.e. they are kept in both partitions
+        has_no_source = mappings[COLUMN_SOURCE_ID].isna().to_numpy()
+        return mappings[has_one_target | has_no_source], mappings[~has_one_target | has_no_source]
+
+    def _produce_has_one_target_mask(self, mappings: DataFrame) -> np.ndarray:
+        """Produce the mask of the mappings whose source node has exactly one (distinct) target node.
+
+        :param mappings: The input mapping set.
+        :return: The boolean mask array.
+        """
+        target_counts = mappings.groupby(COLUMN_SOURCE_ID, observed=True, sort=False)[COLUMN_TARGET_ID].transform(
+            "nunique", dropna=False
+        )
+        return (target_counts == 1).to_numpy()
+
+    def update_mappings_with_current_node_ids(
+        self, mappings_internal_obsolete_to_current_node_id: DataFrame, mappings: DataFrame
+    ) -> DataFrame:
+        """Update a mapping set with current node IDs.
+
+        :param mappings_internal_obsolete_to_current_node_id: The obsolete-to-current node ID mappings.
+        :param mappings: The input mapping set to be updated.
+        :return: The updated mapping set.
+        """
+        # src
+        df = pd.merge(
+            mappings[SCHEMA_MAPPING_TABLE],
+            mappings_internal_obsolete_to_current_node_id[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]].rename(
+                columns={COLUMN_TARGET_ID: "new_src"},
+                inplace=False,
+            ),
+            how="left",
+            on=COLUMN_SOURCE_ID,
+        )
+
+        # trg
+        df = pd.merge(
+            df,
+            mappings_internal_obsolete_to_current_node_id[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]].rename(
+                columns={COLUMN_TARGET_ID: "new_trg", COLUMN_SOURCE_ID: COLUMN_TARGET_ID},
+                inplace=False,
+            ),
+            how="left",
+            on=COLUMN_TARGET_ID,
+        )
+        # clean df
+        df["src"] = df["new_src"].mask(pd.isnull, df[COLUMN_SOURCE_ID])
+        df["trg"] = df["new_trg"].mask(pd.isnull, df[COLUMN_TARGET_ID])
+        df.drop([COLUMN_SOURCE_ID, COLUMN_TARGET_ID], axis=1, inplace=True)
+        df.rename(
+            columns={"src": COLUMN_SOURCE_ID, "trg": COLUMN_TARGET_ID},
+            inplace=True,
+        )
+        return df[SCHEMA_MAPPING_TABLE]
+
+    def produce_table_set_difference(
+        self, table: DataFrame, tables_to_remove: List[DataFrame], columns: List[str]
+    ) -> DataFrame:
+        """Produce the rows of a table that are unique in the table, and are not in any of the other tables.
+
+        :param table: The table to be filtered (e.g. a node table).
+        :param tables_to_remove: The tables of the rows to be removed.
+        :param columns: The compared columns, the result only contains these columns.
+        :return: The filtered table.
+        """
+        tables_to_remove_twice = [table_to_remove[columns] for table_to_remove in tables_to_remove for _ in range(2)]
+        return pd.concat([table[columns]] + tables_to_remove_twice).drop_duplicates(keep=False)
+
+
+class PolarsTableEngine(PandasTableEngine):
+    """Run the table operations as lazy, multi-threaded Polars queries.
+
+    Row selections are evaluated as boolean masks, and applied to the input table, so the results
+    keep the index and the data types of the input. Categorical (encoded) node ID columns are
+    decoded to strings in the queries, and encoded again in the results.
+    """
+
+    name = TABLE_ENGINE_POLARS
+
+    def __init__(self):
+        """Initialise the PolarsTableEngine class.
+
+        Raises an ImportError if Polars is not installed.
+        """
+        # Polars is an optional dependency
+        import polars
+
+        self._pl = polars
+
+    def produce_table_with_namespace_column_for_node_ids(self, table: DataFrame) -> DataFrame:
+        """Produce a table with a namespace column for all node ID columns.
+
+        :param table: The table to be appended with namespace column(s).
+        :return: A new table with a corresponding namespace column for all node ID columns.
+        """
+        if len(table) == 0:
+            return table
+        table_copy = table.copy()
+        node_id_columns = [
+            node_id_column
+            for node_id_column in _get_node_id_columns(table=table_copy)
+            if analysis_utils.get_namespace_column_name_for_column(node_id_column=node_id_column) not in table_copy
+        ]
+        if not node_id_columns:
+            return table_copy
+        namespaces = (
+            self._to_lazy_frame(table=table_copy[node_id_columns])
+            .select(
+                [
+                    self._produce_namespace_expression(column=node_id_column).alias(
+                        analysis_utils.get_namespace_column_name_for_column(node_id_column=node_id_column)
+                    )
+                    for node_id_column in node_id_columns
+                ]
+            )
+            .collect()
+        )
+        for namespace_column_name in namespaces.columns:
+            table_copy[namespace_column_name] = namespaces[namespace_column_name].to_numpy()
+        return table_copy
+
+    def filter_rows_for_values(
+        self, table: DataFrame, columns: List[str], values: Iterable, keep: bool = True
+    ) -> DataFrame:
+        """Filter a table for the rows where the given columns hold one of the values.
+
+        :param table: The table to be filtered.
+        :param columns: The compared columns.
+        :param values: The values (e.g. node IDs or mapping relations).
+        :param keep: If True the rows where every column holds one of the values are kept, if
+        False the rows where any column holds one of the values are dropped.
+        :return: The filtered table.
+        """
+        pl = self._pl
+        value_series = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values.astype(object)
+        if len(table) == 0 or len(value_series) == 0:
+            return table if not keep else table.iloc[0:0]
+        value_set = pl.from_pandas(value_series).cast(pl.Utf8)
+        is_in_expressions = [pl.col(column).cast(pl.Utf8).is_in(value_set).fill_null(False) for column in columns]
+        if keep:
+            expression = pl.all_horizontal(is_in_expressions)
+        else:
+            expression = ~pl.any_horizontal(is_in_expressions)
+        return table[self._produce_mask(table=table[columns], expression=expression)]
+
+    def filter_mappings_for_namespace_match(self, mappings: DataFrame, same_namespace: bool) -> DataFrame:
+        """Filter a mapping set for the mappings between nodes of the same (or of different) namespace.
+
+        :param mappings: The mapping set to be filtered.
+        :param same_namespace: If True the mappings between nodes of the same namespace are
+        kept, otherwise the mappings between nodes of different namespaces.
+        :return: The filtered mapping set.
+        """
+        if len(mappings) == 0:
+            return mappings[SCHEMA_MAPPING_TABLE]
+        is_same_namespace = self._produce_namespace_expression(
+            column=COLUMN_SOURCE_ID
+        ) == self._produce_namespace_expression(column=COLUMN_TARGET_ID)
+        mask = self._produce_mask(
+            table=mappings[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]],
+            expression=is_same_namespace if same_namespace else ~is_same_namespace,
+        )
+        return mappings[mask][SCHEMA_MAPPING_TABLE]
+
+    def orient_mappings_to_namespace(
+        self,
+        required_target_id_namespace: str,
+        mappings: DataFrame,
+        node_id_dictionary: Optional[NodeIdDictionary] = None,
+    ) -> DataFrame:
+        """Update a mapping so the target node is always of the specified ontology (namespace).
+
+        :param required_target_id_namespace: The ontology namespace for the target node ID.
+        :param mappings: The input mapping set to be updated.
+        :param node_id_dictionary: Not used, the namespaces are parsed by a Polars expression.
+        :return: The updated mapping set.
+        """
+        pl = self._pl
+        if len(mappings) == 0:
+            return mappings
+        source_id, target_id = pl.col(COLUMN_SOURCE_ID), pl.col(COLUMN_TARGET_ID)
+        is_source_of_namespace = (
+            self._produce_namespace_expression(column=COLUMN_SOURCE_ID) == required_target_id_namespace
+        )
+        is_target_of_namespace = (
+            self._produce_namespace_expression(column=COLUMN_TARGET_ID) == required_target_id_namespace
+        )
+        oriented_node_ids = (
+            self._to_lazy_frame(table=mappings[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]])
+            .select(
+                [
+                    pl.when(is_source_of_namespace).then(target_id).otherwise(source_id).alias(COLUMN_SOURCE_ID),
+                    pl.when(is_target_of_namespace).then(target_id).otherwise(source_id).alias(COLUMN_TARGET_ID),
+                ]
+            )
+            .collect()
+        )
+        df = mappings[SCHEMA_MAPPING_TABLE].copy()
+        for column in [COLUMN_SOURCE_ID, COLUMN_TARGET_ID]:
+            df[column] = _restore_data_type(values=oriented_node_ids[column].to_numpy(), dtype=mappings[column].dtype)
+        return df
+
+    def _produce_has_one_target_mask(self, mappings: DataFrame) -> np.ndarray:
+        """Produce the mask of the mappings whose source node has exactly one (distinct) target node.
+
+        :param mappings: The input mapping set.
+        :return: The boolean mask array.
+        """
+        pl = self._pl
+        return self._produce_mask(
+            table=mappings[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]],
+            expression=pl.col(COLUMN_TARGET_ID).n_unique().over(COLUMN_SOURCE_ID) == 1,
+        )
+
+    def update_mappings_with_current_node_ids(
+        self, mappings_internal_obsolete_to_current_node_id: DataFrame, mappings: DataFrame
+    ) -> DataFrame:
+        """Update a mapping set with current node IDs.
+
+        :param mappings_internal_obsolete_to_current_node_id: The obsolete-to-current node ID mappings.
+        :param mappings: The input mapping set to be updated.
+        :return: The updated mapping set.
+        """
+        pl = self._pl
+        node_id_updates = self._to_lazy_frame(
+            table=mappings_internal_obsolete_to_current_node_id[[COLUMN_SOURCE_ID, COLUMN_TARGET_ID]]
+        )
+        df = (
+            self._to_lazy_frame(table=mappings[SCHEMA_MAPPING_TABLE])
+            .with_row_index(_COLUMN_ROW_POSITION)
+            .join(node_id_updates.rename({COLUMN_TARGET_ID: "new_src"}), on=COLUMN_SOURCE_ID, how="left")
+            .join(
+                node_id_updates.rename({COLUMN_SOURCE_ID: COLUMN_TARGET_ID, COLUMN_TARGET_ID: "new_trg"}),
+                on=COLUMN_TARGET_ID,
+                how="left",
+            )
+            .sort(_COLUMN_ROW_POSITION, maintain_order=True)
+            .with_columns(
+                [
+                    pl.coalesce(["new_src", COLUMN_SOURCE_ID]).alias(COLUMN_SOURCE_ID),
+                    pl.coalesce(["new_trg", COLUMN_TARGET_ID]).alias(COLUMN_TARGET_ID),
+                ]
+            )
+            .select(SCHEMA_MAPPING_TABLE)
+            .collect()
+            .to_pandas()
+        )
+        for column in [COLUMN_SOURCE_ID, COLUMN_TARGET_ID]:
+            df[column] = _restore_data_type(values=df[column].to_numpy(), dtype=mappings[column].dtype)
+        return df
+
+    def produce_table_set_difference(
+        self, table: DataFrame, tables_to_remove: List[DataFrame], columns: List[str]
+    ) -> DataFrame:
+        """Produce the rows of a table that are unique in the table, and are not in any of the other tables.
+
+        :param table: The table to be filtered (e.g. a node table).
+        :param tables_to_remove: The tables of the rows to be removed.
+        :param columns: The compared columns, the result only contains these columns.
+        :return: The filtered table.
+        """
+        pl = self._pl
+        rows = (
+            self._to_lazy_frame(table=table[columns])
+            .with_row_index(_COLUMN_ROW_POSITION)
+            .filter(~pl.struct(columns).is_duplicated())
+        )
+        tables_to_remove = [table_to_remove for table_to_remove in tables_to_remove if len(table_to_remove) > 0]
+        if tables_to_remove:
+            rows_to_remove = pl.concat(
+                [self._to_lazy_frame(table=table_to_remove[columns]) for table_to_remove in tables_to_remove],
+                how="vertical_relaxed",
+            ).unique()
+            rows = rows.join(rows_to_remove, on=columns, how="anti")
+        row_positions = rows.select(_COLUMN_ROW_POSITION).collect().to_series().sort().to_numpy()
+        return table[columns].iloc[row_positions]
+
+    def _to_lazy_frame(self, table: DataFrame):
+        """Convert a table to a Polars lazy frame, with the node ID columns as strings.
+
+        :param table: The table to be converted.
+        :return: The lazy frame.
+        """
+        pl = self._pl
+        return (
+            pl.from_pandas(NodeIdDictionary.decode_table(table=table))
+            .lazy()
+            .with_columns(pl.col(pl.Null).cast(pl.Utf8))
+        )
+
+    def _produce_mask(self, table: DataFrame, expression) -> np.ndarray:
+        """Evaluate a boolean expression for each row of a table.
+
+        :param table: The table the expression refers to (only the referenced columns are required).
+        :param expression: The Polars expression.
+        :return: The boolean mask array.
+        """
+        return self._to_lazy_frame(table=table).select(expression.fill_null(False)).collect().to_series().to_numpy()
+
+    def _produce_namespace_expression(self, column: str):
+        """Produce the Polars expression of the namespace of a node ID column (null node IDs have the 'nan' namespace).
+
+        :param column: The node ID column.
+        :return: The expression.
+        """
+        pl = self._pl
+        return pl.col(column).cast(pl.Utf8).str.split(":").list.first().fill_null(str(np.nan))
+
+
+# the engine used by the alignment, connectivity and analysis helper methods
+_table_engine: PandasTableEngine = PandasTableEngine()
+
+
+def set_table_engine(table_engine_name: str) -> None:
+    """Set the engine that runs the table operations.
+
+    The DuckDB engine runs the mapping operations of the alignment out-of-core (see
+    DuckDBMappingStore), and every other table operation with Pandas.
+
+    :param table_engine_name: The engine name (pandas, polars or duckdb).
+    :return:
+    """
+    global _table_engine
+    if table_engine_name == _table_engine.name:
+        return
+    if table_engine_name in [TABLE_ENGINE_PANDAS, TABLE_ENGINE_DUCKDB]:
+        _table_engine = PandasTableEngine()
+    elif table_engine_name == TABLE_ENGINE_POLARS:
+        _table_engine = PolarsTableEngine()
+    else:
+        raise ValueError(f"Unknown table engine '{table_engine_name}'.")
+    logger.info(f"Table operations are run with the '{table_engine_name}' engine.")
+
+
+def get_table_engine() -> PandasTableEngine:
+    """Return the engine that runs the table operations.
+
+    :return: The table engine.
+    """
+    return _table_engine
+
+
+def _get_node_id_columns(table: DataFrame) -> List[str]:
+    return sorted([col_name for col_name in NODE_ID_COLUMNS if col_name in list(table)])
+
+
+def _restore_data_type(values: np.ndarray, dtype) -> Union[np.ndarray, pd.Categorical]:
+    """Convert the values of a query result to the data type of the input column (e.g. encode node IDs).
+
+    :param values: The value array.
+    :param dtype: The data type of the input column.
+    :return: The converted values.
+    """
+    if isinstance(dtype, CategoricalDtype):
+        return pd.Categorical(values, dtype=dtype)
+    return values
+
+
+def _produce_namespace_mask(
+    node_ids: pd.Series, namespace: str, node_id_dictionary: Optional[NodeIdDictionary] = None
+) -> np.ndarray:
+    """Produce the mask of the node IDs of a namespace (null node IDs are not of any namespace).
+
+    With a node ID dictionary the namespace code of each node ID is compared with the code of
+    the namespace, otherwise the namespace is parsed once per distinct node ID.
+
+    :param node_ids: The node ID column.
+    :param namespace: The ontology namespace.
+    :param node_id_dictionary: The node ID dictionary, if available.
+    :return: The boolean mask array.
+    """
+    if node_id_dictionary is not None:
+        namespace_code = node_id_dictionary.get_namespace_code(namespace=namespace)
+        if namespace_code == -1:
+            return np.zeros(len(node_ids), dtype=bool)
+        return node_id_dictionary.get_namespace_codes(node_ids=node_ids) == namespace_code
+    codes, unique_node_ids = pd.factorize(node_ids)
+    is_of_namespace = np.append(
+        pd.Index(unique_node_ids.astype(str)).str.split(":").str[0].to_numpy() == namespace, False
+    )
+    return is_of_namespace[codes]
+
+
+def _select_node_ids(
+    condition: np.ndarray, node_ids_if_true: pd.Series, node_ids_if_false: pd.Series
+) -> Union[np.ndarray, pd.Categorical]:
+    """Select the node ID of each row from one of two node ID columns.
+
+    Columns encoded with the same dictionary are selected by their codes, so the node IDs are
+    not decoded.
+
+    :param condition: The boolean mask, where True selects the first column.
+    :param node_ids_if_true: The node IDs selected where the condition holds.
+    :param node_ids_if_false: The node IDs selected where the condition does not hold.
+    :return: The selected node IDs.
+    """
+    dtype, other_dtype = node_ids_if_false.dtype, node_ids_if_true.dtype
+    # categorical data types are compared by their categories, as comparing them with '==' hashes
+    # every category
+    if (
+        isinstance(dtype, CategoricalDtype)
+        and isinstance(other_dtype, CategoricalDtype)
+        and (other_dtype is dtype or other_dtype.categories.equals(dtype.categories))
+    ):
+        return pd.Categorical.from_codes(
+            np.where(condition, node_ids_if_true.cat.codes.to_numpy(), node_ids_if_false.cat.codes.to_numpy()),
+            dtype=dtype,
+        )
+    return np.where(condition, node_ids_if_true.to_numpy(dtype=object), node_ids_if_false.to_numpy(dtype=object))
@@ -5,6 +5,8 @@ from typing import List
 
 FILE_NAME_CONFIG_JSON = "config.json"
 FILE_NAME_LOG = "onto-merger.logger"
+FILE_NAME_ALIGNMENT_DATABASE = "alignment.duckdb"
+FILE_NAME_STAGE_TABLES = "pipeline_stage_tables.json"
 
 # PROCESS DIRECTORIES
 DIRECTORY_INPUT = "input"
@@ -18,6 +20,7 @@ DIRECTORY_PROFILED_DATA = "data_profile_reports"
 DIRECTORY_DATA_TESTS = "data_tests"
 DIRECTORY_LOGS = "logs"
 DIRECTORY_ANALYSIS = "analysis"
+DIRECTORY_CACHE = "cache"
 
 # COLUMNS
 COLUMN_DEFAULT_ID = "default_id"
@@ -35,6 +38,7 @@ COLUMN_COUNT = "count"
 COLUMN_FREQUENCY = "frequency"
 COLUMN_COUNT_UNMAPPED_NODES = "count_unmapped_nodes"
 COLUMN_SOURCE = "source"
+COLUMN_IS_SEED_SELF_MERGE = "is_seed_self_merge"
 NODE_ID_COLUMNS = [COLUMN_DEFAULT_ID, COLUMN_SOURCE_ID, COLUMN_TARGET_ID]
 
 # COLUMN VALUES
@@ -185,6 +189,12 @@ SCHEMA_NODE_NAMESPACE_FREQUENCY_TABLE: List[str] = [
     COLUMN_FREQUENCY,
 ]
 SCHEMA_DATA_REPO_SUMMARY: List[str] = ["Table", "Count", "Columns"]
+# the resource usage columns of the step report tables (CPU seconds and peak RSS of the process)
+SCHEMA_RESOURCE_USAGE_COLUMNS: List[str] = [
+    "cpu_user",
+    "cpu_system",
+    "peak_rss_mb",
+]
 SCHEMA_ALIGNMENT_STEPS_TABLE: List[str] = [
     COLUMN_MAPPING_TYPE_GROUP,
     COLUMN_SOURCE,
@@ -198,7 +208,7 @@ SCHEMA_ALIGNMENT_STEPS_TABLE: List[str] = [
     "start_date_time",
     "end",
     "elapsed",
-]
+] + SCHEMA_RESOURCE_USAGE_COLUMNS
 SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE: List[str] = [
     COLUMN_STEP_COUNTER,
     COLUMN_SOURCE,
@@ -212,13 +222,20 @@ SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE: List[str] = [
     "start_date_time",
     "end",
     "elapsed",
-]
-SCHEMA_PIPELINE_STEPS_REPORT_TABLE: List[str] = [
-    "task",
-    "start",
-    "end",
-    "elapsed",
-]
+] + SCHEMA_RESOURCE_USAGE_COLUMNS
+SCHEMA_PIPELINE_STEPS_REPORT_TABLE: List[str] = (
+    [
+        "task",
+        "start",
+        "end",
+        "elapsed",
+    ]
+    + SCHEMA_RESOURCE_USAGE_COLUMNS
+    + [
+        "dataframe_memory_delta_mb",
+        "top_allocations",
+    ]
+)
 TABLE_NAME_TO_TABLE_SCHEMA_MAP = {
     TABLE_NODES: list(SCHEMA_NODE_ID_LIST_TABLE),
     TABLE_NODES_SEED: list(SCHEMA_NODE_ID_LIST_TABLE),
@@ -248,3 +265,48 @@ TABLE_NAME_TO_TABLE_SCHEMA_MAP = {
 # MAPPING_TYPE_GROUPS
 MAPPING_TYPE_GROUP_EQV = "equivalence"
 MAPPING_TYPE_GROUP_XREF = "database_reference"
+
+# PIPELINE STAGES
+STAGE_INPUT = "input"
+STAGE_VALIDATION_INPUT = "validation_input"
+STAGE_ALIGNMENT = "alignment"
+STAGE_ALIGNMENT_POST_PROCESSING = "alignment_post_processing"
+STAGE_CONNECTIVITY = "connectivity"
+STAGE_FINALISE_OUTPUTS = "finalise_outputs"
+STAGE_VALIDATION_INTERMEDIATE = "validation_intermediate"
+STAGE_VALIDATION_OUTPUT = "validation_output"
+STAGE_REPORT = "report"
+PIPELINE_STAGES = [
+    STAGE_INPUT,
+    STAGE_VALIDATION_INPUT,
+    STAGE_ALIGNMENT,
+    STAGE_ALIGNMENT_POST_PROCESSING,
+    STAGE_CONNECTIVITY,
+    STAGE_FINALISE_OUTPUTS,
+    STAGE_VALIDATION_INTERMEDIATE,
+    STAGE_VALIDATION_OUTPUT,
+    STAGE_REPORT,
+]
+
+# SKIPPABLE STEPS (configuration properties)
+SKIP_PROFILING = "skip_profiling"
+SKIP_VALIDATION = "skip_validation"
+SKIP_REPORT = "skip_report"
+SKIPPABLE_STEPS = [SKIP_PROFILING, SKIP_VALIDATION, SKIP_REPORT]
+
+# CONNECTIVITY PATH SEARCH
+CONNECTIVITY_PATH_SEARCH_A_STAR = "a_star"
+CONNECTIVITY_PATH_SEARCH_SHORTEST_PATH_TREE = "shortest_path_tree"
+
+# STORAGE FORMATS
+STORAGE_FORMAT_CSV = "csv"
+STORAGE_FORMAT_PARQUET = "parquet"
+
+# VALIDATION ENGINES
+VALIDATION_ENGINE_NATIVE = "native"
+VALIDATION_ENGINE_GREAT_EXPECTATIONS = "great_expectations"
+
+# TABLE ENGINES
+TABLE_ENGINE_PANDAS = "pandas"
+TABLE_ENGINE_POLARS = "polars"
+TABLE_ENGINE_DUCKDB = "duckdb"
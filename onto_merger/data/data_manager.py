@@ -5,7 +5,7 @@ import os
 import shutil
 import typing
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 import pandas as pd
 from pandas import DataFrame
@@ -13,6 +13,7 @@ from pandas import DataFrame
 from onto_merger.alignment import merge_utils
 from onto_merger.data.constants import (
     DIRECTORY_ANALYSIS,
+    DIRECTORY_CACHE,
     DIRECTORY_DATA_TESTS,
     DIRECTORY_DOMAIN_ONTOLOGY,
     DIRECTORY_DROPPED_MAPPINGS,
@@ -23,12 +24,16 @@ from onto_merger.data.constants import (
     DIRECTORY_PROFILED_DATA,
     DIRECTORY_REPORT,
     DOMAIN_SUFFIX,
+    FILE_NAME_ALIGNMENT_DATABASE,
     FILE_NAME_CONFIG_JSON,
     FILE_NAME_LOG,
+    FILE_NAME_STAGE_TABLES,
     SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
     SCHEMA_HIERARCHY_EDGE_TABLE,
     SCHEMA_MAPPING_TABLE,
     SCHEMA_MERGE_TABLE_WITH_META_DATA,
+    STORAGE_FORMAT_CSV,
+    STORAGE_FORMAT_PARQUET,
     TABLE_EDGES_HIERARCHY,
     TABLE_EDGES_HIERARCHY_DOMAIN,
     TABLE_EDGES_HIERARCHY_POST,
@@ -48,6 +53,7 @@ from onto_merger.data.dataclasses import (
     AlignmentConfigMappingTypeGroups,
     DataRepository,
     NamedTable,
+    NodeIdDictionary,
 )
 from onto_merger.logger.log import get_logger
 
@@ -70,6 +76,7 @@ class DataManager:
             self._clear_output_directory()
         self._create_output_directory_structure()
         self.config = self.load_alignment_config()
+        self.node_id_dictionary: Optional[NodeIdDictionary] = None
 
     # CONFIG #
     def load_alignment_config(self) -> AlignmentConfig:
@@ -130,31 +137,99 @@ class DataManager:
         if os.path.exists(output_path):
             shutil.rmtree(output_path, ignore_errors=True)
 
+    # STORAGE FORMAT #
+    def get_storage_format(self, process_directory: str) -> str:
+        """Return the storage format of the tables of a process directory.
+
+        Input tables are always CSV-s, every other table is stored in the configured format.
+
+        :param process_directory: The process directory (input or output).
+        :return: The storage format (csv or parquet).
+        """
+        if process_directory == DIRECTORY_INPUT:
+            return STORAGE_FORMAT_CSV
+        return self.config.base_config.storage_format
+
+    @staticmethod
+    def _read_table(file_path: str, storage_format: str, columns: Optional[List[str]] = None) -> DataFrame:
+        """Read a table file.
+
+        :param file_path: The table file path.
+        :param storage_format: The storage format (csv or parquet).
+        :param columns: The columns to read, all columns are read if not specified.
+        :return: The table as a dataframe.
+        """
+        if storage_format == STORAGE_FORMAT_PARQUET:
+            return pd.read_parquet(file_path, columns=columns)
+        return pd.read_csv(file_path, usecols=columns)
+
+    @staticmethod
+    def _write_table(table: DataFrame, file_path: str, storage_format: str, index: bool = False) -> None:
+        """Write a table file.
+
+        The columns of parquet files are dictionary encoded (pyarrow default), so each node ID,
+        relation or provenance string is stored once per column chunk.
+
+        :param table: The table to be written.
+        :param file_path: The table file path.
+        :param storage_format: The storage format (csv or parquet).
+        :param index: Write the index if True, otherwise write it without index.
+        :return:
+        """
+        if storage_format == STORAGE_FORMAT_PARQUET:
+            table.to_parquet(file_path, index=index)
+        else:
+            table.to_csv(file_path, index=index)
+
     # LOADING #
-    def load_table(self, table_name: str, process_directory: str) -> DataFrame:
+    def load_table(
+            self,
+            table_name: str,
+            process_directory: str,
+            columns: Optional[List[str]] = None,
+            storage_format: Optional[str] = None,
+    ) -> DataFrame:
         """Load a table as a data frame.
 
         :param process_directory: The process directory (input or output).
         :param table_name: The name of the table.
+        :param columns: The columns to load, all columns are loaded (and duplicate rows are dropped)
+        if not specified.
+        :param storage_format: The storage format, the process directory format is used if not specified.
         :return: The loaded table.
         """
-        file_path = self.get_table_path(process_directory=process_directory, table_name=table_name)
-        df = pd.read_csv(file_path).drop_duplicates(keep="first", ignore_index=True)
+        storage_format = storage_format or self.get_storage_format(process_directory=process_directory)
+        file_path = self.get_table_path(
+            process_directory=process_directory, table_name=table_name, storage_format=storage_format
+        )
+        df = self._read_table(file_path=file_path, storage_format=storage_format, columns=columns)
+        # a projected row is not a full row, so only full (unprojected) rows are de-duplicated
+        if columns is None:
+            df = df.drop_duplicates(keep="first", ignore_index=True)
         logger.info(f"Loaded table '{table_name}' with {len(df):,d} row(s).")
         return df
 
     def load_input_tables(self) -> List[NamedTable]:
         """Load the input csv-s into named tables.
 
+        The node ID dictionary is produced from the input tables, and the node ID
+        columns of the returned tables are encoded with it.
+
         :return: The input named tables.
         """
-        return [
+        tables = [
             NamedTable(
                 table_name,
                 self.load_table(table_name=table_name, process_directory=DIRECTORY_INPUT),
             )
             for table_name in TABLES_INPUT
         ]
+        self.node_id_dictionary = NodeIdDictionary.from_tables(tables=tables)
+        logger.info(f"Produced node ID dictionary with {len(self.node_id_dictionary):,d} node ID(s).")
+        return [
+            NamedTable(table.name, self.node_id_dictionary.encode_table(table=table.dataframe))
+            for table in tables
+        ]
 
     def load_output_tables(self) -> List[NamedTable]:
         """Load the output csv-s into named tables.
@@ -184,17 +259,19 @@ class DataManager:
             for table_name in TABLES_INTERMEDIATE
         ]
 
-    def load_specified_tables(self, table_names: List[str]) -> List[NamedTable]:
+    def load_specified_tables(self, table_names: List[str], columns: Optional[List[str]] = None) -> List[NamedTable]:
         """Load tables specified in the input.
 
         :param table_names: The list of tables to load.
+        :param columns: The columns to load, all columns are loaded if not specified.
         :return: The loaded named tables.
         """
         return [
             NamedTable(
                 table_name,
                 self.load_table(table_name=table_name,
-                                process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}"),
+                                process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}",
+                                columns=columns),
             )
             for table_name in table_names
         ]
@@ -203,12 +280,12 @@ class DataManager:
                                            section_name: str,
                                            table_name: str,
                                            rename_columns: Union[None, Dict[str, str]] = None) -> List[dict]:
-        """Load a CSV table as a list of dictionaries.
+        """Load an analysis report table as a list of dictionaries.
 
         :param section_name: The name of the report section (prefix of the file).
         :param table_name: The name of the report section (suffix of the file).
         :param rename_columns: Column renaming dictionary.
-        :return: The CSV loaded as a list of dictionaries.
+        :return: The table loaded as a list of dictionaries.
         """
         # todo fix this hack
         df = self.load_analysis_report_table(section_name=section_name, table_name=table_name)
@@ -231,11 +308,11 @@ class DataManager:
         :param table_name: The name of the report section (suffix of the file).
         :return: The loaded table as a dataframe if the table exists, otherwise None.
         """
-        file_name = f"{section_name}_{table_name}.csv"
-        logger.info(f"load_analysis_report_table {os.path.join(self.get_analysis_folder_path(), file_name)}")
-        file_path = os.path.join(self.get_analysis_folder_path(), file_name)
+        storage_format = self.get_storage_format(process_directory=DIRECTORY_ANALYSIS)
+        file_path = self.get_analysis_table_path(file_name=f"{section_name}_{table_name}")
+        logger.info(f"load_analysis_report_table {file_path}")
         try:
-            df = pd.read_csv(file_path)
+            df = self._read_table(file_path=file_path, storage_format=storage_format)
             return df
         except FileNotFoundError as e:
             logger.error(f"Data table missing: {e}")
@@ -245,17 +322,27 @@ class DataManager:
     def save_table(
             self, table: NamedTable, process_directory: str = f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}"
     ) -> None:
-        """Save a given Pandas dataframe as a CSV.
+        """Save a given Pandas dataframe in the storage format of the process directory.
+
+        Encoded node ID columns are written as node ID strings.
 
         :return:
         """
         # only output tables are saved
-        file_path = self.get_table_path(process_directory=process_directory, table_name=table.name)
-        logger.info(f"Saving table '{f'{table.name}.csv'}' with {len(table.dataframe):,d} " + f"row(s) to {file_path}.")
-        table.dataframe.to_csv(file_path, index=False)
+        storage_format = self.get_storage_format(process_directory=process_directory)
+        file_path = self.get_table_path(
+            process_directory=process_directory, table_name=table.name, storage_format=storage_format
+        )
+        logger.info(f"Saving table '{os.path.basename(file_path)}' with {len(table.dataframe):,d} "
+                    + f"row(s) to {file_path}.")
+        self._write_table(
+            table=NodeIdDictionary.decode_table(table=table.dataframe),
+            file_path=file_path,
+            storage_format=storage_format,
+        )
 
     def save_tables(self, tables: List[NamedTable], process_directory: Union[None, str] = None) -> None:
-        """Save a list of named tables Pandas dataframe part as CSVs.
+        """Save a list of named tables Pandas dataframe part as CSVs (or parquet files).
 
         :param tables: The tables to be saved.
         :param process_directory: The process directory where the tables are saved to.
@@ -295,11 +382,12 @@ class DataManager:
         :param index: Save with index if True, otherwise save it without index.
         :return:
         """
-        analysis_table.to_csv(
-            os.path.join(
-                self.get_analysis_folder_path(),
-                f"{dataset}_{analysed_table_name}_{analysis_table_suffix}.csv"
+        self._write_table(
+            table=analysis_table,
+            file_path=self.get_analysis_table_path(
+                file_name=f"{dataset}_{analysed_table_name}_{analysis_table_suffix}"
             ),
+            storage_format=self.get_storage_format(process_directory=DIRECTORY_ANALYSIS),
             index=index
         )
 
@@ -315,18 +403,17 @@ class DataManager:
         :return:
         """
         for table in tables:
-            table.dataframe.to_csv(
-                path_or_buf=os.path.join(
-                    self.get_analysis_folder_path(),
-                    f"{dataset}_{table.name}.csv"
-                ),
+            self._write_table(
+                table=table.dataframe,
+                file_path=self.get_analysis_table_path(file_name=f"{dataset}_{table.name}"),
+                storage_format=self.get_storage_format(process_directory=DIRECTORY_ANALYSIS),
                 index=index
             )
 
     def save_dropped_mappings_table(
             self, table: DataFrame, step_count: int, source_id: str, mapping_type: str
     ) -> None:
-        """Save a dropped mapping dataframe as a CSV, with meta data in the file name.
+        """Save a dropped mapping dataframe as a CSV (or parquet file), with meta data in the file name.
 
         :param table: The dataframe to be saved.
         :param step_count: The alignment step number.
@@ -335,14 +422,62 @@ class DataManager:
         :return:
         """
         if len(table) > 0:
-            table.to_csv(
-                path_or_buf=os.path.join(
+            storage_format = self.get_storage_format(process_directory=DIRECTORY_DROPPED_MAPPINGS)
+            self._write_table(
+                table=NodeIdDictionary.decode_table(table=table),
+                file_path=os.path.join(
                     self.get_dropped_mappings_path(),
-                    f"{mapping_type}_{str(step_count)}_{source_id}.csv",
+                    f"{mapping_type}_{str(step_count)}_{source_id}.{storage_format}",
                 ),
-                index=False,
+                storage_format=storage_format,
             )
 
+    def save_profiled_table_sampling(self, table_name: str, sampling: dict) -> None:
+        """Save the sampling details (row counts and sampling rate) of a Pandas profile report.
+
+        :param table_name: The name of the profiled table.
+        :param sampling: The sampling details.
+        :return:
+        """
+        with open(self.get_profiled_table_sampling_path(table_name=table_name), "w") as f:
+            json.dump(sampling, f)
+
+    def load_profiled_table_sampling(self, table_name: str) -> Optional[dict]:
+        """Load the sampling details of a Pandas profile report.
+
+        :param table_name: The name of the profiled table.
+        :return: The sampling details, or None if the table was not profiled.
+        """
+        file_path = self.get_profiled_table_sampling_path(table_name=table_name)
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path) as f:
+            return json.load(f)
+
+    def save_stage_table_names(self, stage_table_names: Dict[str, List[str]]) -> None:
+        """Save the names of the tables produced by each pipeline stage (used when resuming).
+
+        The file is replaced atomically, so it is never read half written.
+
+        :param stage_table_names: The table names by stage name.
+        :return:
+        """
+        file_path = self.get_stage_table_names_file_path()
+        with open(f"{file_path}.tmp", "w") as f:
+            json.dump(stage_table_names, f)
+        os.replace(f"{file_path}.tmp", file_path)
+
+    def load_stage_table_names(self) -> Optional[Dict[str, List[str]]]:
+        """Load the names of the tables produced by each pipeline stage.
+
+        :return: The table names by stage name, or None if no stage was run.
+        """
+        file_path = self.get_stage_table_names_file_path()
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path) as f:
+            return json.load(f)
+
     def save_merged_ontology_report(self, content: str, template_search_path: str) -> str:
         """Save the analysis report HTML content.
 
@@ -382,9 +517,12 @@ class DataManager:
         ]
 
     def move_data_docs_to_reports(self) -> None:
-        """Move the data doc files to the report folder."""
+        """Move the data doc files to the report folder (data docs are only produced by Great Expectations)."""
         from_path = os.path.join(self.get_data_tests_path(), "uncommitted/data_docs")
+        if not os.path.isdir(from_path):
+            return
         to_path = os.path.join(self._project_folder_path, DIRECTORY_OUTPUT, DIRECTORY_REPORT, "data_docs")
+        shutil.rmtree(to_path, ignore_errors=True)
         shutil.copytree(from_path, to_path)
 
     # PATHS #
@@ -475,14 +613,44 @@ class DataManager:
         """
         return os.path.abspath(path)
 
-    def get_table_path(self, process_directory: str, table_name: str) -> str:
+    def get_table_path(self, process_directory: str, table_name: str, storage_format: Optional[str] = None) -> str:
         """Produce a path (in the appropriate project sub folder) for a given table.
 
         :param process_directory: The process directory (input or output).
         :param table_name: The name of the table.
+        :param storage_format: The storage format, the process directory format is used if not specified.
         :return: The project folder path of the given table.
         """
-        return os.path.join(self._project_folder_path, process_directory, f"{table_name}.csv")
+        storage_format = storage_format or self.get_storage_format(process_directory=process_directory)
+        return os.path.join(self._project_folder_path, process_directory, f"{table_name}.{storage_format}")
+
+    def get_analysis_table_path(self, file_name: str) -> str:
+        """Produce a path (in the analysis folder) for a given analysis table.
+
+        :param file_name: The file name of the table without extension.
+        :return: The path as a string.
+        """
+        return os.path.join(
+            self.get_analysis_folder_path(),
+            f"{file_name}.{self.get_storage_format(process_directory=DIRECTORY_ANALYSIS)}"
+        )
+
+    def has_profiled_table_reports(self) -> bool:
+        """Check whether any table was profiled (profiling may be skipped).
+
+        :return: True if the profile reports folder contains a report, otherwise False.
+        """
+        report_folder_path = self._get_profiled_report_directory_path()
+        return os.path.isdir(report_folder_path) and any(
+            file_name.endswith("_report.html") for file_name in os.listdir(report_folder_path)
+        )
+
+    def has_data_test_results(self) -> bool:
+        """Check whether any table was tested (validation may be skipped).
+
+        :return: True if the validation results folder contains a result JSON, otherwise False.
+        """
+        return any(Path(self.get_ge_json_validations_folder_path()).rglob("*.json"))
 
     def _get_profiled_report_directory_path(self) -> str:
         """Produce the path for the Pandas profile reports directory."""
@@ -501,6 +669,22 @@ class DataManager:
         """Produce the path for the domain ontology folder."""
         return os.path.join(self._project_folder_path, DIRECTORY_OUTPUT, DIRECTORY_DOMAIN_ONTOLOGY)
 
+    def get_stage_cache_folder_path(self) -> str:
+        """Produce the path for the stage cache directory (kept between runs)."""
+        return os.path.join(self._project_folder_path, DIRECTORY_CACHE)
+
+    def get_alignment_database_path(self) -> str:
+        """Produce the path for the alignment database file (deleted after the alignment)."""
+        return os.path.join(
+            self._project_folder_path, DIRECTORY_OUTPUT, DIRECTORY_INTERMEDIATE, FILE_NAME_ALIGNMENT_DATABASE
+        )
+
+    def get_stage_table_names_file_path(self) -> str:
+        """Produce the path for the file that lists the tables produced by each pipeline stage."""
+        return os.path.join(
+            self._project_folder_path, DIRECTORY_OUTPUT, DIRECTORY_INTERMEDIATE, FILE_NAME_STAGE_TABLES
+        )
+
     def get_dropped_mappings_path(self) -> str:
         """Produce the path for a dropped mapping."""
         return os.path.join(
@@ -514,6 +698,10 @@ class DataManager:
             return os.path.join(DIRECTORY_PROFILED_DATA, table_html)
         return os.path.join(self._get_profiled_report_directory_path(), table_html)
 
+    def get_profiled_table_sampling_path(self, table_name: str) -> str:
+        """Produce the path for the Pandas profile report sampling details JSON."""
+        return os.path.join(self._get_profiled_report_directory_path(), f"{table_name}_report_sampling.json")
+
     def get_log_file_path(self) -> str:
         """Produce the path for log file."""
         return os.path.join(
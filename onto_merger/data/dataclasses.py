@@ -1,27 +1,44 @@
 """Data classes and helper methods."""
 
 import dataclasses
+import os
+import sys
+import tracemalloc
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from dataclasses_json import dataclass_json
-from pandas import DataFrame
+from pandas import CategoricalDtype, DataFrame, Series
 
 from onto_merger.data.constants import (
+    CONNECTIVITY_PATH_SEARCH_A_STAR,
+    NODE_ID_COLUMNS,
     SCHEMA_ALIGNMENT_STEPS_TABLE,
     SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE,
     SCHEMA_DATA_REPO_SUMMARY,
     SCHEMA_PIPELINE_STEPS_REPORT_TABLE,
+    STORAGE_FORMAT_CSV,
     TABLE_ALIGNMENT_STEPS_REPORT,
     TABLE_CONNECTIVITY_STEPS_REPORT,
+    TABLE_ENGINE_PANDAS,
     TABLE_PIPELINE_STEPS_REPORT,
     TABLES_DOMAIN,
     TABLES_INPUT,
     TABLES_INTERMEDIATE,
+    VALIDATION_ENGINE_NATIVE,
 )
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore
+
+# the number of allocation sites listed per pipeline step when the memory allocations are traced
+TOP_ALLOCATIONS_LIMIT = 5
+
 
 @dataclass_json
 @dataclass
@@ -56,6 +73,18 @@ class AlignmentConfigBase:
     domain_node_type: str
     seed_ontology_name: str
     force_through_failed_validation: bool = False
+    connectivity_path_search: str = CONNECTIVITY_PATH_SEARCH_A_STAR
+    storage_format: str = STORAGE_FORMAT_CSV
+    stage_cache_max_size_mb: int = 0
+    validation_engine: str = VALIDATION_ENGINE_NATIVE
+    profiling_sample_row_threshold: int = 0
+    profiling_worker_count: int = 1
+    stage_worker_count: int = 1
+    trace_memory_allocations: bool = False
+    skip_profiling: bool = False
+    skip_validation: bool = False
+    skip_report: bool = False
+    table_engine: str = TABLE_ENGINE_PANDAS
 
 
 @dataclass
@@ -76,12 +105,189 @@ class NamedTable:
     dataframe: DataFrame
 
 
+class NodeIdDictionary:
+    """Map node IDs (CURIEs) to dense integer codes, shared by every table of a pipeline run.
+
+    The dictionary is stored as a Pandas categorical data type: node ID columns encoded with it
+    hold one integer code per row, while the node ID strings are stored only once. Codes follow
+    the lexicographic order of the node IDs, so sorting encoded columns gives the same order as
+    sorting the strings.
+    """
+
+    def __init__(self, node_ids: Iterable[str]):
+        """Initialise the NodeIdDictionary class.
+
+        :param node_ids: The node IDs to be encoded (may contain duplicates).
+        """
+        unique_node_ids = pd.unique(pd.Series(node_ids, dtype=object).dropna().astype(str))
+        self.dtype = CategoricalDtype(categories=np.sort(unique_node_ids), ordered=False)
+        # the namespace of each node ID is parsed once, and stored as a code per node ID code
+        namespaces = [node_id.split(":")[0] for node_id in self.dtype.categories]
+        self.namespace_dtype = CategoricalDtype(categories=np.sort(pd.unique(namespaces)), ordered=False)
+        self.namespace_codes = pd.Categorical(namespaces, dtype=self.namespace_dtype).codes.astype(np.int32)
+
+    @classmethod
+    def from_tables(cls, tables: List[NamedTable]) -> "NodeIdDictionary":
+        """Produce the dictionary from all node ID columns of the given tables.
+
+        :param tables: The named tables (e.g. the input tables).
+        :return: The node ID dictionary.
+        """
+        node_id_columns = [
+            table.dataframe[column].to_numpy(dtype=object)
+            for table in tables
+            for column in NODE_ID_COLUMNS
+            if column in table.dataframe
+        ]
+        return cls(node_ids=np.concatenate(node_id_columns) if node_id_columns else [])
+
+    def __len__(self) -> int:
+        """Return the number of node IDs in the dictionary."""
+        return len(self.dtype.categories)
+
+    def is_encoded(self, node_ids: Series) -> bool:
+        """Check if a node ID series is encoded with the dictionary.
+
+        Categorical data types are compared by their categories, as comparing them with '=='
+        hashes every category.
+
+        :param node_ids: The node ID series.
+        :return: True if the series holds dictionary codes.
+        """
+        dtype = node_ids.dtype
+        if dtype is self.dtype:
+            return True
+        return isinstance(dtype, CategoricalDtype) and (
+            dtype.categories is self.dtype.categories or dtype.categories.equals(self.dtype.categories)
+        )
+
+    def get_codes(self, node_ids: Series) -> np.ndarray:
+        """Produce the integer codes for a node ID series (-1 for null or unknown node IDs).
+
+        :param node_ids: The node ID series, either encoded or as strings.
+        :return: The int32 code array.
+        """
+        if self.is_encoded(node_ids=node_ids):
+            return node_ids.cat.codes.to_numpy(dtype=np.int32)
+        return self.dtype.categories.get_indexer(node_ids).astype(np.int32)
+
+    def get_namespace_codes(self, node_ids: Series) -> np.ndarray:
+        """Produce the namespace codes for a node ID series (-1 for null or unknown node IDs).
+
+        :param node_ids: The node ID series, either encoded or as strings.
+        :return: The int32 namespace code array.
+        """
+        codes = self.get_codes(node_ids=node_ids)
+        return np.where(codes == -1, -1, self.namespace_codes[codes])
+
+    def get_namespace_code(self, namespace: str) -> int:
+        """Return the code of a namespace (-1 if no node ID has the namespace).
+
+        :param namespace: The ontology namespace.
+        :return: The namespace code.
+        """
+        return int(self.namespace_dtype.categories.get_indexer([namespace])[0])
+
+    def get_node_ids(self, codes: np.ndarray) -> np.ndarray:
+        """Produce the node IDs for an array of integer codes.
+
+        :param codes: The int32 code array.
+        :return: The node ID (string) array.
+        """
+        return self.dtype.categories.to_numpy()[codes]
+
+    def encode_table(self, table: DataFrame) -> DataFrame:
+        """Produce a table where the node ID columns hold dictionary codes.
+
+        Raises a ValueError if the table contains a node ID that is not in the dictionary.
+
+        :param table: The table to be encoded.
+        :return: The encoded table (the input table is not modified).
+        """
+        encoded_table = table.copy(deep=False)
+        for column in NODE_ID_COLUMNS:
+            if column not in encoded_table or self.is_encoded(node_ids=encoded_table[column]):
+                continue
+            encoded_column = pd.Categorical(encoded_table[column], dtype=self.dtype)
+            unknown_node_ids = (encoded_column.codes == -1) & encoded_table[column].notna().to_numpy()
+            if unknown_node_ids.any():
+                raise ValueError(
+                    f"Column '{column}' contains {unknown_node_ids.sum():,d} node ID(s) missing from the "
+                    + f"node ID dictionary, e.g. '{encoded_table[column][unknown_node_ids].iloc[0]}'."
+                )
+            encoded_table[column] = encoded_column
+        return encoded_table
+
+    @staticmethod
+    def decode_table(table: DataFrame) -> DataFrame:
+        """Produce a table where the encoded node ID columns hold node ID strings.
+
+        :param table: The table to be decoded.
+        :return: The decoded table (the input table is not modified).
+        """
+        decoded_table = table.copy(deep=False)
+        for column in NODE_ID_COLUMNS:
+            if column in decoded_table and isinstance(decoded_table[column].dtype, CategoricalDtype):
+                decoded_table[column] = decoded_table[column].astype(object)
+        return decoded_table
+
+
+class NamespaceIndex:
+    """Partition the rows of a table by the namespace of its node ID columns.
+
+    For each node ID column the rows are ordered by namespace code (keeping the table order
+    within a namespace), with the start offset of each namespace, so the rows of a namespace
+    are a slice rather than a scan of the full table.
+    """
+
+    def __init__(self, table: DataFrame, node_id_dictionary: NodeIdDictionary):
+        """Initialise the NamespaceIndex class.
+
+        :param table: The table to be indexed (node or edge table).
+        :param node_id_dictionary: The node ID dictionary that covers the table node IDs.
+        """
+        self._node_id_dictionary = node_id_dictionary
+        self.namespace_codes: Dict[str, np.ndarray] = {}
+        self._row_orders: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, np.ndarray] = {}
+        namespace_count = len(node_id_dictionary.namespace_dtype.categories)
+        for column in NODE_ID_COLUMNS:
+            if column not in table:
+                continue
+            namespace_codes = node_id_dictionary.get_namespace_codes(node_ids=table[column])
+            row_order = np.argsort(namespace_codes, kind="stable")
+            self.namespace_codes[column] = namespace_codes
+            self._row_orders[column] = row_order
+            self._offsets[column] = np.searchsorted(namespace_codes[row_order], np.arange(namespace_count + 1))
+
+    def get_row_positions(self, namespace: str, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Produce the (sorted) positions of the rows where any of the given columns has a node of the namespace.
+
+        :param namespace: The ontology namespace.
+        :param columns: The node ID columns to consider, defaults to all indexed columns.
+        :return: The row position array, to be used with DataFrame.iloc.
+        """
+        namespace_code = self._node_id_dictionary.get_namespace_code(namespace=namespace)
+        if namespace_code == -1:
+            return np.array([], dtype=np.int64)
+        row_positions = [
+            self._row_orders[column][self._offsets[column][namespace_code]: self._offsets[column][namespace_code + 1]]
+            for column in (columns or list(self._row_orders))
+        ]
+        if len(row_positions) == 1:
+            return np.sort(row_positions[0])
+        return np.unique(np.concatenate(row_positions))
+
+
 class DataRepository:
     """Store named tables in a dictionary and provides access and update convenience methods."""
 
     def __init__(self):
         """Initialise the DataRepository dataclass."""
         self.data: Dict[str, NamedTable] = {}
+        self.node_id_dictionary: Optional[NodeIdDictionary] = None
+        self._namespace_indices: Dict[str, NamespaceIndex] = {}
+        self._memory_usages: Dict[str, Tuple[int, Dict[int, int]]] = {}
 
     def get(self, table_name: str) -> NamedTable:
         """Return a named table for a given table identifier.
@@ -130,12 +336,42 @@ class DataRepository:
         :return:
         """
         if table:
-            self.data.update({table.name: table})
+            self.data.update({table.name: self._encode(table=table)})
+            self._namespace_indices.pop(table.name, None)
+            self._memory_usages.pop(table.name, None)
         elif tables:
-            [self.data.update({table.name: table}) for table in tables]
+            [self.data.update({table.name: self._encode(table=table)}) for table in tables]
+            [self._namespace_indices.pop(table.name, None) for table in tables]
+            [self._memory_usages.pop(table.name, None) for table in tables]
         else:
             pass
 
+    def get_namespace_index(self, table_name: str) -> Optional[NamespaceIndex]:
+        """Return the namespace index of a table, if the repository has a node ID dictionary.
+
+        The index is produced on first access, and kept until the table is updated.
+
+        :param table_name: The table identifier.
+        :return: The namespace index, or None if there is no node ID dictionary.
+        """
+        if self.node_id_dictionary is None:
+            return None
+        if table_name not in self._namespace_indices:
+            self._namespace_indices[table_name] = NamespaceIndex(
+                table=self.get(table_name=table_name).dataframe, node_id_dictionary=self.node_id_dictionary
+            )
+        return self._namespace_indices[table_name]
+
+    def _encode(self, table: NamedTable) -> NamedTable:
+        """Encode the node ID columns of a named table if the repository has a node ID dictionary.
+
+        :param table: The named table to be stored.
+        :return: The named table with encoded node ID columns.
+        """
+        if self.node_id_dictionary is None:
+            return table
+        return NamedTable(name=table.name, dataframe=self.node_id_dictionary.encode_table(table=table.dataframe))
+
     def get_repo_summary(self) -> DataFrame:
         """Produce a summary table of the data repository content (table names, counts and columns).
 
@@ -152,6 +388,116 @@ class DataRepository:
         summary_df = pd.DataFrame(data, columns=SCHEMA_DATA_REPO_SUMMARY)
         return summary_df
 
+    def get_memory_usage(self) -> int:
+        """Return the memory used by the tables of the repository in bytes.
+
+        The categories of categorical columns (e.g. the node ID dictionary) are shared by the
+        tables, so they are counted once. The memory usage of a table is measured once, and
+        kept until the table is updated. Concurrent stages may update (and drop the measurement
+        of) a table meanwhile, so the cache is read only once per table.
+
+        :return: The memory usage in bytes.
+        """
+        memory_usage = 0
+        categories_memory_usages: Dict[int, int] = {}
+        for table_name, table in list(self.data.items()):
+            table_memory_usages = self._memory_usages.get(table_name)
+            if table_memory_usages is None:
+                table_memory_usages = _measure_table_memory_usage(table=table.dataframe)
+                self._memory_usages[table_name] = table_memory_usages
+            table_memory_usage, table_categories_memory_usages = table_memory_usages
+            memory_usage += table_memory_usage
+            categories_memory_usages.update(table_categories_memory_usages)
+        return memory_usage + sum(categories_memory_usages.values())
+
+
+def _measure_table_memory_usage(table: DataFrame) -> Tuple[int, Dict[int, int]]:
+    """Measure the memory used by a table in bytes.
+
+    :param table: The table.
+    :return: The memory usage without the categories of categorical columns, and the memory
+    usage of each categories index (keyed by the index ID).
+    """
+    memory_usage = table.index.memory_usage()
+    categories_memory_usages = {}
+    for _, column in table.items():
+        if isinstance(column.dtype, CategoricalDtype):
+            memory_usage += column.cat.codes.nbytes
+            if id(column.cat.categories) not in categories_memory_usages:
+                categories_memory_usages[id(column.cat.categories)] = column.cat.categories.memory_usage(deep=True)
+        else:
+            memory_usage += column.memory_usage(index=False, deep=True)
+    return memory_usage, categories_memory_usages
+
+
+@dataclass
+class ResourceUsage:
+    """Represent the resource usage of the process at a point in time.
+
+    CPU times cover all threads of the process (but not the child processes), the peak RSS is
+    the high-water mark of the process so far.
+    """
+
+    date_time: datetime
+    cpu_user: float
+    cpu_system: float
+    peak_rss_mb: float
+    dataframe_memory_mb: float = 0.0
+    memory_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @classmethod
+    def measure(cls, data_repo: Optional[DataRepository] = None) -> "ResourceUsage":
+        """Measure the resource usage of the process.
+
+        The memory of the data repository tables, and the memory allocation snapshot (if
+        tracemalloc is tracing) are only measured if a data repository is given.
+
+        :param data_repo: The data repository.
+        :return: The resource usage.
+        """
+        cpu_times = os.times()
+        peak_rss_mb = 0.0
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # bytes on macOS, kilobytes on Linux
+            peak_rss_mb = max_rss / (1 << 20) if sys.platform == "darwin" else max_rss / (1 << 10)
+        resource_usage = cls(
+            date_time=datetime.now(),
+            cpu_user=cpu_times.user,
+            cpu_system=cpu_times.system,
+            peak_rss_mb=peak_rss_mb,
+        )
+        if data_repo is not None:
+            resource_usage.dataframe_memory_mb = data_repo.get_memory_usage() / (1 << 20)
+            if tracemalloc.is_tracing():
+                resource_usage.memory_snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__)]
+                )
+        return resource_usage
+
+
+def produce_top_allocations(start: ResourceUsage, end: ResourceUsage, limit: int = TOP_ALLOCATIONS_LIMIT) -> str:
+    """Produce the list of the source lines that allocated the most memory between two measurements.
+
+    :param start: The resource usage at the start of the step.
+    :param end: The resource usage at the end of the step.
+    :param limit: The number of source lines listed.
+    :return: The source lines with the allocated memory, or an empty string if the memory
+    allocations were not traced.
+    """
+    if start.memory_snapshot is None or end.memory_snapshot is None:
+        return ""
+    statistics = [
+        statistic for statistic in end.memory_snapshot.compare_to(start.memory_snapshot, key_type="lineno")
+        if statistic.size_diff > 0
+    ]
+    # the module paths are shortened to the package folder and the file name
+    return "; ".join(
+        f"{os.sep.join(statistic.traceback[0].filename.split(os.sep)[-2:])}:{statistic.traceback[0].lineno} "
+        + f"(+{statistic.size_diff / (1 << 20):.1f} MB)"
+        for statistic in statistics[:limit]
+    )
+
 
 @dataclass_json
 @dataclass
@@ -162,6 +508,11 @@ class RuntimeData:
     start: str
     end: str
     elapsed: float
+    cpu_user: float
+    cpu_system: float
+    peak_rss_mb: float
+    dataframe_memory_delta_mb: float
+    top_allocations: str
 
     def __init__(
             self,
@@ -169,6 +520,11 @@ class RuntimeData:
             start: str,
             end: str,
             elapsed: float,
+            cpu_user: float = 0.0,
+            cpu_system: float = 0.0,
+            peak_rss_mb: float = 0.0,
+            dataframe_memory_delta_mb: float = 0.0,
+            top_allocations: str = "",
     ):
         """Initialise the RuntimeData dataclass.
 
@@ -176,11 +532,42 @@ class RuntimeData:
         :param start: The task start date time string.
         :param end: The task end date time string.
         :param elapsed: The task elapsed seconds.
+        :param cpu_user: The CPU seconds spent in user mode.
+        :param cpu_system: The CPU seconds spent in system mode.
+        :param peak_rss_mb: The peak RSS of the process at the end of the task.
+        :param dataframe_memory_delta_mb: The change of the data repository table memory.
+        :param top_allocations: The source lines that allocated the most memory (if traced).
         """
         self.task = task
         self.start = start
         self.end = end
         self.elapsed = elapsed
+        self.cpu_user = cpu_user
+        self.cpu_system = cpu_system
+        self.peak_rss_mb = peak_rss_mb
+        self.dataframe_memory_delta_mb = dataframe_memory_delta_mb
+        self.top_allocations = top_allocations
+
+    @classmethod
+    def from_resource_usage(cls, task: str, start: ResourceUsage, end: ResourceUsage) -> "RuntimeData":
+        """Produce the runtime data of a task from the resource usage at its start and end.
+
+        :param task: The task name.
+        :param start: The resource usage at the start of the task.
+        :param end: The resource usage at the end of the task.
+        :return: The runtime data.
+        """
+        return cls(
+            task=task,
+            start=format_datetime(start.date_time),
+            end=format_datetime(end.date_time),
+            elapsed=(end.date_time - start.date_time).total_seconds(),
+            cpu_user=round(end.cpu_user - start.cpu_user, 3),
+            cpu_system=round(end.cpu_system - start.cpu_system, 3),
+            peak_rss_mb=round(end.peak_rss_mb, 1),
+            dataframe_memory_delta_mb=round(end.dataframe_memory_mb - start.dataframe_memory_mb, 1),
+            top_allocations=produce_top_allocations(start=start, end=end),
+        )
 
 
 @dataclass
@@ -199,6 +586,9 @@ class AlignmentStep:
     start_date_time: datetime
     end: str
     elapsed: float
+    cpu_user: float
+    cpu_system: float
+    peak_rss_mb: float
 
     def __init__(
             self,
@@ -216,7 +606,8 @@ class AlignmentStep:
         :param count_unmapped_nodes: The number of unmapped nodes at
         the start of the alignment step.
         """
-        self.start_date_time = datetime.now()
+        self._start_resource_usage = ResourceUsage.measure()
+        self.start_date_time = self._start_resource_usage.date_time
         self.start = format_datetime(date_time=self.start_date_time)
         self.task = f"Aligning {source} {mapping_type_group}"
         self.mapping_type_group = mapping_type_group
@@ -228,15 +619,16 @@ class AlignmentStep:
         self.count_merged_nodes = 0
         self.end = ""
         self.elapsed = 0
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.peak_rss_mb = 0.0
 
     def task_finished(self) -> None:
-        """Stop the task runtime counter.
+        """Stop the task runtime counter, and record the resource usage of the task.
 
         :return:
         """
-        end = datetime.now()
-        self.end = format_datetime(date_time=end)
-        self.elapsed = (end - self.start_date_time).total_seconds()
+        _finish_step(step=self)
 
 
 @dataclass
@@ -255,6 +647,9 @@ class ConnectivityStep:
     start_date_time: datetime
     end: str
     elapsed: float
+    cpu_user: float
+    cpu_system: float
+    peak_rss_mb: float
 
     def __init__(self, source_id: str, count_unmapped_node_ids: int):
         """Initialise the ConnectivityStep dataclass.
@@ -263,7 +658,8 @@ class ConnectivityStep:
         :param count_unmapped_node_ids: The number of dangling and unmapped nodes
         of the ontology at the start of the connectivity step.
         """
-        self.start_date_time = datetime.now()
+        self._start_resource_usage = ResourceUsage.measure()
+        self.start_date_time = self._start_resource_usage.date_time
         self.start = format_datetime(date_time=self.start_date_time)
         self.source_id = source_id
         self.task = f"Connecting {source_id}"
@@ -274,15 +670,32 @@ class ConnectivityStep:
         self.count_connected_nodes = 0
         self.end = ""
         self.elapsed = 0
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.peak_rss_mb = 0.0
 
     def task_finished(self) -> None:
-        """Stop the task runtime counter.
+        """Stop the task runtime counter, and record the resource usage of the task.
 
         :return:
         """
-        end = datetime.now()
-        self.end = format_datetime(date_time=end)
-        self.elapsed = (end - self.start_date_time).total_seconds()
+        _finish_step(step=self)
+
+
+def _finish_step(step) -> None:
+    """Record the end time and the resource usage of an alignment or connectivity step.
+
+    :param step: The alignment or connectivity step.
+    :return:
+    """
+    runtime_data = RuntimeData.from_resource_usage(
+        task=step.task, start=step._start_resource_usage, end=ResourceUsage.measure()
+    )
+    step.end = runtime_data.end
+    step.elapsed = runtime_data.elapsed
+    step.cpu_user = runtime_data.cpu_user
+    step.cpu_system = runtime_data.cpu_system
+    step.peak_rss_mb = runtime_data.peak_rss_mb
 
 
 def convert_runtime_steps_to_named_table(
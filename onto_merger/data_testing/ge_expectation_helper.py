@@ -1,8 +1,20 @@
 """GE Expectation configuration helper methods."""
 
-from typing import List, Union
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+try:
+    from great_expectations.core import ExpectationConfiguration
+except ImportError:  # the native validation engine does not require Great Expectations
+
+    @dataclass
+    class ExpectationConfiguration:  # type: ignore[no-redef]
+        """Expectation configuration (data test) evaluated by the native validation engine."""
+
+        expectation_type: str
+        kwargs: dict
+        meta: Optional[dict] = None
 
-from great_expectations.core import ExpectationConfiguration
 
 from onto_merger.analyser.analysis_utils import get_namespace_column_name_for_column
 from onto_merger.data.constants import (
@@ -21,6 +33,7 @@ from onto_merger.data.constants import (
     RELATION_RDFS_SUBCLASS_OF,
     SCHEMA_ALIGNMENT_STEPS_TABLE,
     SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE,
+    SCHEMA_RESOURCE_USAGE_COLUMNS,
     TABLE_ALIGNMENT_STEPS_REPORT,
     TABLE_CONNECTIVITY_STEPS_REPORT,
     TABLE_EDGES_HIERARCHY_DOMAIN,
@@ -100,9 +113,8 @@ def produce_edge_table_expectations(
                     column_name=get_namespace_column_name_for_column(node_id_column=node_column)
                 )
             )
-            expectations.extend(
-                produce_source_to_target_node_namespace_expectations(column_name=COLUMN_SOURCE_TO_TARGET)
-            )
+    if not is_domain_table(table_name=table_name):
+        expectations.extend(produce_source_to_target_node_namespace_expectations(column_name=COLUMN_SOURCE_TO_TARGET))
     if is_domain_table(table_name=table_name):
         expectations.extend(produce_node_short_id_expectations(column_name=COLUMN_TARGET_ID, is_node_table=False))
         if table_name == TABLE_MERGES_DOMAIN:
@@ -130,7 +142,7 @@ def get_column_set_for_edge_table(table_name: str) -> List[str]:
     """
     if table_name not in TABLE_NAME_TO_TABLE_SCHEMA_MAP:
         return []
-    column_set = TABLE_NAME_TO_TABLE_SCHEMA_MAP[table_name]
+    column_set = list(TABLE_NAME_TO_TABLE_SCHEMA_MAP[table_name])
     if not is_domain_table(table_name=table_name):
         column_set.extend(
             [
@@ -296,10 +308,11 @@ def produce_report_alignment_steps_expectations(alignment_config: AlignmentConfi
         decreasing=True,
     )
 
-    # add count columns with general settings
+    # add count columns with general settings (the resource usage columns are measurements, not counts)
     columns = list(
         set(list(SCHEMA_ALIGNMENT_STEPS_TABLE))
         - {COLUMN_MAPPING_TYPE_GROUP, COLUMN_COUNT_UNMAPPED_NODES, COLUMN_SOURCE}
+        - set(SCHEMA_RESOURCE_USAGE_COLUMNS)
     )
     for column_name in columns:
         expectations.extend(
@@ -333,8 +346,10 @@ def produce_report_connectivity_steps_expectations(alignment_config: AlignmentCo
         # )
     ]
 
-    # add count columns with general settings
-    columns = list(set(list(SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE)) - {COLUMN_SOURCE})
+    # add count columns with general settings (the resource usage columns are measurements, not counts)
+    columns = list(
+        set(list(SCHEMA_CONNECTIVITY_STEPS_REPORT_TABLE)) - {COLUMN_SOURCE} - set(SCHEMA_RESOURCE_USAGE_COLUMNS)
+    )
     for column_name in columns:
         expectations.extend(
             produce_count_column_expectations(
@@ -12,7 +12,7 @@ from onto_merger.analyser.report_analyser_utils import (
     produce_ge_validation_analysis_as_table,
 )
 from onto_merger.data.data_manager import DataManager
-from onto_merger.data.dataclasses import AlignmentConfig, NamedTable
+from onto_merger.data.dataclasses import AlignmentConfig, NamedTable, NodeIdDictionary
 from onto_merger.data_testing.ge_expectation_helper import (
     produce_expectations_for_table,
 )
@@ -161,7 +161,9 @@ class GERunner:
             self._ge_context.run_checkpoint(
                 checkpoint_name=self.checkpoint_name,
                 batch_request={
-                    "runtime_parameters": {"batch_data": loaded_table.dataframe},
+                    "runtime_parameters": {
+                        "batch_data": NodeIdDictionary.decode_table(table=loaded_table.dataframe)
+                    },
                     "batch_identifiers": {"default_identifier_name": "default_identifier_name"},
                 },
             )
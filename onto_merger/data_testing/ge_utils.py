@@ -1,20 +1,26 @@
 """Helper methods for creating and configuring a GE data test context."""
 
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from great_expectations.data_context import BaseDataContext
-from great_expectations.data_context.types.base import (
-    DataContextConfig,
-    FilesystemStoreBackendDefaults,
-)
+if TYPE_CHECKING:
+    from great_expectations.data_context import BaseDataContext
 
 
-def produce_ge_context(ge_base_directory: str) -> BaseDataContext:
+def produce_ge_context(ge_base_directory: str) -> "BaseDataContext":
     """Produce the GE context configured with the output directory path.
 
+    Great Expectations is imported here, so the naming helpers can be used by the native
+    validation engine without the package.
+
     :param ge_base_directory: The output directory for GE files.
     :return: The context.
     """
+    from great_expectations.data_context import BaseDataContext
+    from great_expectations.data_context.types.base import (
+        DataContextConfig,
+        FilesystemStoreBackendDefaults,
+    )
+
     context = BaseDataContext(
         project_config=DataContextConfig(
             store_backend_defaults=FilesystemStoreBackendDefaults(root_directory=ge_base_directory)
@@ -0,0 +1,377 @@
+"""Run the data tests with vectorised Pandas operations (without the Great Expectations framework)."""
+
+import json
+import os
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas import CategoricalDtype, DataFrame, Series
+
+from onto_merger.analyser.report_analyser_utils import (
+    produce_ge_validation_analysis_as_table,
+)
+from onto_merger.data.constants import NODE_ID_COLUMNS, VALIDATION_ENGINE_NATIVE
+from onto_merger.data.data_manager import DataManager
+from onto_merger.data.dataclasses import AlignmentConfig, NamedTable
+from onto_merger.data_testing.ge_expectation_helper import (
+    ExpectationConfiguration,
+    produce_expectations_for_table,
+)
+from onto_merger.data_testing.ge_utils import (
+    produce_data_asset_name_for_entity,
+    produce_datasource_name_for_entity,
+    produce_expectation_suite_name_for_entity,
+)
+from onto_merger.logger.log import get_logger
+
+logger = get_logger(__name__)
+
+# the number of unexpected values listed in the result of an expectation
+PARTIAL_UNEXPECTED_LIST_SIZE = 20
+
+
+class NativeValidator:
+    """Runs the data tests for the input & output tables without the Great Expectations framework.
+
+    The expectations (data tests) are the same as the ones run by the GERunner. Each expectation
+    is evaluated with vectorised operations, the string expectations (regex, value lengths) of
+    the categorical node ID columns are evaluated once per category. The expectation suites and
+    validation results are saved in the Great Expectations JSON layout, so the result analysis is
+    shared between the engines. Data docs are not produced.
+    """
+
+    def __init__(self, alignment_config: AlignmentConfig, data_tests_directory: str, data_manager: DataManager) -> None:
+        """Initialise the class.
+
+        :param alignment_config: The alignment process configuration dataclass.
+        :param data_tests_directory: The base directory of the data test configurations and results.
+        :param data_manager: The data manager instance.
+        """
+        self._alignment_config = alignment_config
+        self._data_tests_directory = data_tests_directory
+        self._data_manager = data_manager
+        self._category_masks: dict = {}
+
+    def run_data_tests(self, named_tables: List[NamedTable], data_origin: str) -> Union[DataFrame, None]:
+        """Run data tests for a list of named tables.
+
+        :param named_tables: The list of named tables.
+        :param data_origin: The origin of the tested data (INPUT|INTERMEDIATE|DOMAIN_ONTOLOGY).
+        :return: The aggregated result table, or None if there are no tables.
+        """
+        if len(named_tables) == 0:
+            return None
+        logger.info("Started native data tests...")
+        for named_table in named_tables:
+            expectations = produce_expectations_for_table(
+                table_name=named_table.name,
+                alignment_config=self._alignment_config,
+            )
+            self._save_expectation_suite(entity_name=named_table.name, expectations=expectations)
+            results = [
+                evaluate_expectation(
+                    table=named_table.dataframe, expectation=expectation, category_masks=self._category_masks
+                )
+                for expectation in expectations
+            ]
+            self._save_validation_result(entity_name=named_table.name, data_origin=data_origin, results=results)
+        results_df = produce_ge_validation_analysis_as_table(data_manager=self._data_manager)
+        logger.info("Finished running native data tests.")
+        return results_df
+
+    def _save_expectation_suite(self, entity_name: str, expectations: List[ExpectationConfiguration]) -> None:
+        """Save the expectation suite (data test configuration) of a table as a JSON.
+
+        :param entity_name: The name of the table.
+        :param expectations: The expectations of the table.
+        :return:
+        """
+        suite_name = produce_expectation_suite_name_for_entity(entity_name=entity_name)
+        _save_json(
+            content={
+                "expectation_suite_name": suite_name,
+                "expectations": [produce_expectation_as_dict(expectation=expectation) for expectation in expectations],
+                "meta": {"validation_engine": VALIDATION_ENGINE_NATIVE},
+            },
+            file_path=os.path.join(self._data_tests_directory, "expectations", f"{suite_name}.json"),
+        )
+
+    def _save_validation_result(self, entity_name: str, data_origin: str, results: List[dict]) -> None:
+        """Save the validation result of a table as a JSON (in the Great Expectations result layout).
+
+        :param entity_name: The name of the table.
+        :param data_origin: The origin of the tested data (INPUT|INTERMEDIATE|DOMAIN_ONTOLOGY).
+        :param results: The expectation results.
+        :return:
+        """
+        suite_name = produce_expectation_suite_name_for_entity(entity_name=entity_name)
+        data_asset_name = produce_data_asset_name_for_entity(entity_name=entity_name, data_origin=data_origin)
+        nb_successful = sum(result["success"] for result in results)
+        _save_json(
+            content={
+                "success": nb_successful == len(results),
+                "results": results,
+                "statistics": {
+                    "evaluated_expectations": len(results),
+                    "successful_expectations": nb_successful,
+                    "unsuccessful_expectations": len(results) - nb_successful,
+                    "success_percent": (100.0 * nb_successful / len(results)) if results else None,
+                },
+                "meta": {
+                    "validation_engine": VALIDATION_ENGINE_NATIVE,
+                    "expectation_suite_name": suite_name,
+                    "validation_time": datetime.now().strftime("%Y%m%dT%H%M%S.%fZ"),
+                    "active_batch_definition": {
+                        "datasource_name": produce_datasource_name_for_entity(entity_name=entity_name),
+                        "data_connector_name": "default_runtime_data_connector_name",
+                        "data_asset_name": data_asset_name,
+                    },
+                },
+            },
+            file_path=os.path.join(
+                self._data_tests_directory, "uncommitted", "validations", suite_name, f"{data_asset_name}.json"
+            ),
+        )
+
+
+def evaluate_expectation(
+    table: DataFrame, expectation: ExpectationConfiguration, category_masks: Optional[dict] = None
+) -> dict:
+    """Evaluate an expectation (data test) on a table.
+
+    Expectations of missing columns, or of values that cannot be compared, fail; null values
+    are ignored by the column value expectations (except for the not null expectation), and
+    column value expectations succeed if the ratio of expected values is at least 'mostly'
+    (all values if not set), i.e. as in Great Expectations.
+
+    :param table: The tested table.
+    :param expectation: The expectation configuration.
+    :param category_masks: The store of category masks (results of value rules on the categories of
+    categorical columns) that are reused across expectations, if None masks are not reused.
+    :return: The expectation result dictionary (success and result details).
+    """
+    kwargs = expectation.kwargs
+    expectation_type = expectation.expectation_type
+    result = {"success": False, "expectation_config": produce_expectation_as_dict(expectation=expectation)}
+    if expectation_type == "expect_table_columns_to_match_set":
+        result["success"] = set(table.columns) == set(kwargs["column_set"])
+        result["result"] = {"observed_value": list(table.columns)}
+    elif expectation_type == "expect_table_columns_to_match_ordered_list":
+        result["success"] = list(table.columns) == list(kwargs["column_list"])
+        result["result"] = {"observed_value": list(table.columns)}
+    elif kwargs["column"] not in table:
+        result["result"] = {}
+        result["exception_info"] = {
+            "raised_exception": expectation_type != "expect_column_to_exist",
+            "exception_message": f"The column '{kwargs['column']}' is not in the table.",
+        }
+    elif expectation_type == "expect_column_to_exist":
+        result["success"] = True
+        result["result"] = {}
+    elif expectation_type == "expect_column_values_to_be_of_type" and not _is_object_column(
+        table=table, column_name=kwargs["column"]
+    ):
+        # the values of typed columns are not checked one by one
+        observed_type = table[kwargs["column"]].dtype
+        result["success"] = observed_type == np.dtype(kwargs["type_"])
+        result["result"] = {"observed_value": str(observed_type)}
+    else:
+        column = table[kwargs["column"]]
+        try:
+            unexpected_mask = _produce_unexpected_mask(
+                column=column, expectation_type=expectation_type, kwargs=kwargs, category_masks=category_masks
+            )
+        except TypeError as error:
+            # e.g. range checks of string values
+            result["result"] = {}
+            result["exception_info"] = {"raised_exception": True, "exception_message": str(error)}
+            return result
+        result["success"] = _is_mostly_expected(
+            unexpected_count=int(unexpected_mask.sum()),
+            element_count=(
+                len(column) if expectation_type == "expect_column_values_to_not_be_null" else int(column.notna().sum())
+            ),
+            mostly=kwargs.get("mostly"),
+        )
+        result["result"] = _produce_column_values_result(column=column, unexpected_mask=unexpected_mask)
+    return result
+
+
+def produce_expectation_as_dict(expectation: ExpectationConfiguration) -> dict:
+    """Produce the JSON serialisable dictionary of an expectation configuration.
+
+    :param expectation: The expectation configuration.
+    :return: The expectation configuration dictionary.
+    """
+    return {
+        "expectation_type": expectation.expectation_type,
+        "kwargs": dict(expectation.kwargs),
+        "meta": expectation.meta,
+    }
+
+
+def _produce_unexpected_mask(
+    column: Series, expectation_type: str, kwargs: dict, category_masks: Optional[dict]
+) -> np.ndarray:
+    """Produce the mask of column values that do not meet the expectation.
+
+    :param column: The tested column.
+    :param expectation_type: The expectation type.
+    :param kwargs: The expectation arguments.
+    :param category_masks: The store of category masks, if None masks are not reused.
+    :return: The unexpected value mask.
+    """
+    if expectation_type == "expect_column_values_to_not_be_null":
+        return column.isna().to_numpy()
+    if expectation_type == "expect_column_values_to_be_unique":
+        return (column.notna() & column.duplicated(keep=False)).to_numpy()
+    if expectation_type == "expect_column_values_to_be_decreasing":
+        values = column.dropna().to_numpy()
+        unexpected_mask = np.zeros(len(column), dtype=bool)
+        unexpected_mask[np.flatnonzero(column.notna().to_numpy())[1:]] = values[1:] > values[:-1]
+        return unexpected_mask
+    return _produce_unexpected_value_mask(
+        column=column,
+        is_unexpected=_get_value_rule(expectation_type=expectation_type, kwargs=kwargs),
+        rule_key=f"{expectation_type}:{json.dumps({k: v for k, v in kwargs.items() if k != 'column'}, sort_keys=True)}",
+        category_masks=category_masks,
+    )
+
+
+def _get_value_rule(expectation_type: str, kwargs: dict) -> Callable[[Series], np.ndarray]:
+    """Produce the rule of a column value expectation, that marks the unexpected (non null) values.
+
+    :param expectation_type: The expectation type.
+    :param kwargs: The expectation arguments.
+    :return: The rule function.
+    """
+    if expectation_type == "expect_column_values_to_match_regex":
+        return lambda values: ~values.astype(str).str.contains(kwargs["regex"], regex=True).to_numpy(dtype=bool)
+    if expectation_type == "expect_column_values_to_be_in_set":
+        return lambda values: ~values.isin(kwargs["value_set"]).to_numpy()
+    if expectation_type == "expect_column_value_lengths_to_be_between":
+        return lambda values: _produce_out_of_range_mask(
+            values=values.astype(str).str.len(), min_value=kwargs.get("min_value"), max_value=kwargs.get("max_value")
+        )
+    if expectation_type == "expect_column_values_to_be_between":
+        return lambda values: _produce_out_of_range_mask(
+            values=values, min_value=kwargs.get("min_value"), max_value=kwargs.get("max_value")
+        )
+    if expectation_type == "expect_column_values_to_be_of_type":
+        expected_type = np.dtype(kwargs["type_"]).type
+        if expected_type is np.object_:
+            return lambda values: np.zeros(len(values), dtype=bool)
+        expected_types = (expected_type, type(expected_type(0).item()))
+        return lambda values: ~values.map(lambda value: isinstance(value, expected_types)).to_numpy(dtype=bool)
+    raise ValueError(f"Unsupported expectation type '{expectation_type}'.")
+
+
+def _produce_out_of_range_mask(values: Series, min_value: Union[None, int], max_value: Union[None, int]) -> np.ndarray:
+    """Produce the mask of values that are out of the (inclusive) range.
+
+    :param values: The tested values.
+    :param min_value: The minimum value, if None it is not checked.
+    :param max_value: The maximum value, if None it is not checked.
+    :return: The out of range mask.
+    """
+    out_of_range_mask = np.zeros(len(values), dtype=bool)
+    if min_value is not None:
+        out_of_range_mask |= (values < min_value).to_numpy()
+    if max_value is not None:
+        out_of_range_mask |= (values > max_value).to_numpy()
+    return out_of_range_mask
+
+
+def _produce_unexpected_value_mask(
+    column: Series, is_unexpected: Callable[[Series], np.ndarray], rule_key: str, category_masks: Optional[dict]
+) -> np.ndarray:
+    """Apply a value rule to the non null values of a column.
+
+    The rule is applied once per distinct value: to the categories of a categorical column, and
+    to the factorized values otherwise. The categories of the encoded node ID columns are the node
+    ID dictionary shared by all tables, so their masks are stored and reused for each table.
+
+    :param column: The tested column.
+    :param is_unexpected: The rule that marks the unexpected values.
+    :param rule_key: The rule identifier (expectation type and arguments).
+    :param category_masks: The store of category masks (by categories and rule), if None masks
+    are not reused.
+    :return: The unexpected value mask (null values are not unexpected).
+    """
+    if isinstance(column.dtype, CategoricalDtype):
+        codes, values = column.cat.codes.to_numpy(), column.cat.categories
+        memo_key = (id(values), rule_key)
+        if category_masks is not None and memo_key in category_masks:
+            return category_masks[memo_key][1][codes]
+    else:
+        codes, values = pd.factorize(column)
+        memo_key = None
+    # the last entry (False) is selected by the null code (-1)
+    value_is_unexpected = np.append(is_unexpected(Series(values)) if len(values) else [], False).astype(bool)
+    if category_masks is not None and memo_key is not None:
+        # the categories are stored to keep their ID unique
+        category_masks[memo_key] = (values, value_is_unexpected)
+    return value_is_unexpected[codes]
+
+
+def _is_mostly_expected(unexpected_count: int, element_count: int, mostly: Optional[float]) -> bool:
+    """Check if the ratio of expected values is at least 'mostly' (every value is expected if not set).
+
+    :param unexpected_count: The number of unexpected values.
+    :param element_count: The number of evaluated values.
+    :param mostly: The minimum ratio of expected values.
+    :return: True if the expectation is met, otherwise False.
+    """
+    if mostly is None:
+        return unexpected_count == 0
+    if element_count == 0:
+        return True
+    return (element_count - unexpected_count) / element_count >= mostly
+
+
+def _produce_column_values_result(column: Series, unexpected_mask: np.ndarray) -> dict:
+    """Produce the result details of a column values expectation.
+
+    :param column: The tested column.
+    :param unexpected_mask: The unexpected value mask.
+    :return: The result details.
+    """
+    element_count = len(column)
+    unexpected_count = int(unexpected_mask.sum())
+    return {
+        "element_count": element_count,
+        "missing_count": int(column.isna().sum()),
+        "unexpected_count": unexpected_count,
+        "unexpected_percent": (100.0 * unexpected_count / element_count) if element_count else 0.0,
+        "partial_unexpected_list": [
+            None if pd.isna(value) else value
+            for value in column[unexpected_mask].head(PARTIAL_UNEXPECTED_LIST_SIZE).astype(object).tolist()
+        ],
+    }
+
+
+def _is_object_column(table: DataFrame, column_name: str) -> bool:
+    """Check if a column holds objects as it is validated, i.e. encoded node ID columns hold strings.
+
+    :param table: The tested table.
+    :param column_name: The column name.
+    :return: True if the column holds objects, otherwise False.
+    """
+    column_dtype = table[column_name].dtype
+    if column_name in NODE_ID_COLUMNS and isinstance(column_dtype, CategoricalDtype):
+        return True
+    return column_dtype == np.dtype(object)
+
+
+def _save_json(content: dict, file_path: str) -> None:
+    """Save a dictionary as a JSON file (the folder is created if it does not exist).
+
+    :param content: The dictionary.
+    :param file_path: The JSON file path.
+    :return:
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as json_file:
+        json.dump(content, json_file, indent=2, default=str)
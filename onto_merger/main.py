@@ -5,7 +5,8 @@ After deduplication the nodes are connected to form a single directed acyclic hi
 i.e. an ontology class hierarchy.
 
 Usage:
-    main.py -f <FOLDER_PATH>
+    main.py -f <FOLDER_PATH> [--from-stage=<STAGE>] [--to-stage=<STAGE>] [--skip-profiling] [--skip-validation]
+            [--skip-report] [--fast]
     main.py -f EXAMPLE_DATASET
     main.py -f EXAMPLE_DATASET_LIGHT
     main.py (-h | --help)
@@ -19,27 +20,65 @@ Arguments:
 Options:
   -h --help         Show this screen.
   -f <FOLDER_PATH>  Run the OntoMerger alignemnt and connectivity process on the specified dataset.
+  --from-stage=<STAGE>  Start the process from a stage, the outputs of the earlier stages are loaded from the
+                        project output folder (instead of clearing it) [default: input].
+  --to-stage=<STAGE>    Stop the process after a stage [default: report].
+  --skip-profiling      Skip the data profiling (overrides the config).
+  --skip-validation     Skip the data tests, the input data is not checked (overrides the config).
+  --skip-report         Skip the HTML report, the pipeline steps report is still saved (overrides the config).
+  --fast                Skip the data profiling, the data tests and the HTML report, i.e. only produce the
+                        domain ontology tables.
   -v                Show version.
 
+Stages:
+    input, validation_input, alignment, alignment_post_processing, connectivity, finalise_outputs,
+    validation_intermediate, validation_output, report
+
 """
 
+from typing import List, Optional
+
 from docopt import docopt
 
-from onto_merger.pipeline import Pipeline
+from onto_merger.data.constants import (
+    SKIP_PROFILING,
+    SKIP_REPORT,
+    SKIP_VALIDATION,
+    SKIPPABLE_STEPS,
+    STAGE_INPUT,
+    STAGE_REPORT,
+)
 from onto_merger.version import __version__
 
 example_data_sets = {"EXAMPLE_DATASET": "../data/bikg_disease", "EXAMPLE_DATASET_LIGHT": "../tests/test_data"}
 FOLDER_PATH_ARG = "-f"
 VERSION_ARG = "-v"
+FROM_STAGE_ARG = "--from-stage"
+TO_STAGE_ARG = "--to-stage"
+SKIP_ARGS = {"--skip-profiling": SKIP_PROFILING, "--skip-validation": SKIP_VALIDATION, "--skip-report": SKIP_REPORT}
+FAST_ARG = "--fast"
 
 
-def main(project_folder_path: str) -> None:
+def main(
+    project_folder_path: str,
+    from_stage: str = STAGE_INPUT,
+    to_stage: str = STAGE_REPORT,
+    skipped_steps: Optional[List[str]] = None,
+) -> None:
     """Run the OntoMerger pipeline for the specified data set.
 
     :param project_folder_path: The data set path.
+    :param from_stage: The first stage to run.
+    :param to_stage: The last stage to run.
+    :param skipped_steps: The profiling, validation or report steps to skip (in addition to the config).
     :return:
     """
-    Pipeline(project_folder_path=project_folder_path).run_alignment_and_connection_process()
+    # the pipeline (and its data libraries) is only imported when it runs, so showing the version is fast
+    from onto_merger.pipeline import Pipeline
+
+    Pipeline(
+        project_folder_path=project_folder_path, from_stage=from_stage, to_stage=to_stage, skipped_steps=skipped_steps
+    ).run_alignment_and_connection_process()
 
 
 if __name__ == "__main__":
@@ -47,7 +86,13 @@ if __name__ == "__main__":
     if arguments[VERSION_ARG]:
         print(f"OntoMerger v. {__version__}")
     elif arguments[FOLDER_PATH_ARG]:
-        if arguments[FOLDER_PATH_ARG] in example_data_sets:
-            main(project_folder_path=example_data_sets[arguments[FOLDER_PATH_ARG]])
-        else:
-            main(project_folder_path=arguments[FOLDER_PATH_ARG])
+        main(
+            project_folder_path=example_data_sets.get(arguments[FOLDER_PATH_ARG], arguments[FOLDER_PATH_ARG]),
+            from_stage=arguments[FROM_STAGE_ARG],
+            to_stage=arguments[TO_STAGE_ARG],
+            skipped_steps=(
+                SKIPPABLE_STEPS
+                if arguments[FAST_ARG]
+                else [skipped_step for arg, skipped_step in SKIP_ARGS.items() if arguments[arg]]
+            ),
+        )
@@ -1,31 +1,101 @@
 """Runs the alignment and connection process, input and output validation and produces reports."""
-from datetime import datetime
-from typing import List
+import functools
+import os
+import threading
+import tracemalloc
+from typing import Callable, Dict, List, Optional
 
 from pandas import DataFrame
 
-from onto_merger.alignment import hierarchy_utils, merge_utils
-from onto_merger.alignment.alignment_manager import AlignmentManager
-from onto_merger.alignment.hierarchy_utils import HierarchyManager
+from onto_merger.alignment import merge_utils
+from onto_merger.alignment.alignment_manager import (
+    AlignmentManager,
+    produce_source_alignment_priority_order,
+)
 from onto_merger.alignment_config.validator import validate_alignment_configuration
-from onto_merger.analyser import analysis_utils, pandas_profiler
-from onto_merger.analyser.report_analyser import ReportAnalyser
+from onto_merger.analyser import analysis_utils, table_engine
 from onto_merger.data.constants import (
     DIRECTORY_DOMAIN_ONTOLOGY,
     DIRECTORY_INPUT,
     DIRECTORY_INTERMEDIATE,
+    DIRECTORY_OUTPUT,
+    PIPELINE_STAGES,
+    SCHEMA_RESOURCE_USAGE_COLUMNS,
+    SKIP_PROFILING,
+    SKIP_REPORT,
+    SKIP_VALIDATION,
+    SKIPPABLE_STEPS,
+    STAGE_ALIGNMENT,
+    STAGE_ALIGNMENT_POST_PROCESSING,
+    STAGE_CONNECTIVITY,
+    STAGE_FINALISE_OUTPUTS,
+    STAGE_INPUT,
+    STAGE_REPORT,
+    STAGE_VALIDATION_INPUT,
+    STAGE_VALIDATION_INTERMEDIATE,
+    STAGE_VALIDATION_OUTPUT,
+    TABLE_NODES,
+    TABLE_PIPELINE_STEPS_REPORT,
+    TABLES_INPUT,
+    TABLES_INTERMEDIATE,
+    VALIDATION_ENGINE_GREAT_EXPECTATIONS,
 )
 from onto_merger.data.data_manager import DataManager
 from onto_merger.data.dataclasses import (
     DataRepository,
     NamedTable,
+    NodeIdDictionary,
+    ResourceUsage,
     RuntimeData,
     convert_runtime_steps_to_named_table,
-    format_datetime,
 )
-from onto_merger.data_testing.ge_runner import GERunner
+from onto_merger.data_testing.native_validator import NativeValidator
 from onto_merger.logger.log import setup_logger
-from onto_merger.report import report_generator
+from onto_merger.pipeline.stage_cache import StageCache, StageCacheEntry
+from onto_merger.pipeline.stage_scheduler import StageScheduler
+
+# configuration properties that do not affect the outputs of the listed stages
+_STAGE_INDEPENDENT_CONFIG_PROPERTIES = {
+    "stage_cache_max_size_mb": PIPELINE_STAGES,
+    "image_format": [stage for stage in PIPELINE_STAGES if stage != STAGE_REPORT],
+    "connectivity_path_search": [
+        STAGE_INPUT, STAGE_VALIDATION_INPUT, STAGE_ALIGNMENT, STAGE_ALIGNMENT_POST_PROCESSING
+    ],
+    "validation_engine": [STAGE_ALIGNMENT, STAGE_ALIGNMENT_POST_PROCESSING, STAGE_CONNECTIVITY, STAGE_FINALISE_OUTPUTS],
+    "profiling_sample_row_threshold": [
+        STAGE_ALIGNMENT, STAGE_ALIGNMENT_POST_PROCESSING, STAGE_CONNECTIVITY, STAGE_FINALISE_OUTPUTS
+    ],
+    "profiling_worker_count": PIPELINE_STAGES,
+    "stage_worker_count": PIPELINE_STAGES,
+    "trace_memory_allocations": PIPELINE_STAGES,
+    SKIP_PROFILING: [
+        STAGE_INPUT, STAGE_ALIGNMENT, STAGE_ALIGNMENT_POST_PROCESSING, STAGE_CONNECTIVITY, STAGE_FINALISE_OUTPUTS
+    ],
+    SKIP_VALIDATION: [
+        STAGE_INPUT, STAGE_ALIGNMENT, STAGE_ALIGNMENT_POST_PROCESSING, STAGE_CONNECTIVITY, STAGE_FINALISE_OUTPUTS
+    ],
+    SKIP_REPORT: [stage for stage in PIPELINE_STAGES if stage != STAGE_REPORT],
+    "table_engine": PIPELINE_STAGES,
+}
+
+# the stages that must finish before a stage is started: the input validation only has to pass
+# before the domain ontology is produced, so it runs alongside the alignment and connectivity;
+# the intermediate and output validations share the data tests folder (and the GE data docs),
+# so they are run one after the other
+_STAGE_DEPENDENCIES = {
+    STAGE_INPUT: [],
+    STAGE_VALIDATION_INPUT: [STAGE_INPUT],
+    STAGE_ALIGNMENT: [STAGE_INPUT],
+    STAGE_ALIGNMENT_POST_PROCESSING: [STAGE_ALIGNMENT],
+    STAGE_CONNECTIVITY: [STAGE_ALIGNMENT_POST_PROCESSING],
+    STAGE_FINALISE_OUTPUTS: [STAGE_VALIDATION_INPUT, STAGE_CONNECTIVITY],
+    STAGE_VALIDATION_INTERMEDIATE: [STAGE_FINALISE_OUTPUTS],
+    STAGE_VALIDATION_OUTPUT: [STAGE_VALIDATION_INTERMEDIATE],
+    STAGE_REPORT: [STAGE_VALIDATION_INTERMEDIATE, STAGE_VALIDATION_OUTPUT],
+}
+
+# run time columns of the step report tables, these do not affect the outputs of any stage
+_STAGE_INDEPENDENT_COLUMNS = ["start", "start_date_time", "end", "elapsed"] + SCHEMA_RESOURCE_USAGE_COLUMNS
 
 
 class Pipeline:
@@ -35,19 +105,60 @@ class Pipeline:
      corresponding names (types)."""
     _data_repo: DataRepository = DataRepository()
 
-    def __init__(self, project_folder_path: str) -> None:
+    def __init__(
+            self,
+            project_folder_path: str,
+            from_stage: str = STAGE_INPUT,
+            to_stage: str = STAGE_REPORT,
+            skipped_steps: Optional[List[str]] = None,
+    ) -> None:
         """Initialise the Pipeline class.
 
+        When the pipeline is started from a later stage, the outputs of the earlier stages
+        are kept and loaded from the output folder.
+
         :param project_folder_path: The directory path where the project inputs are
         stored.
+        :param from_stage: The first stage to run.
+        :param to_stage: The last stage to run.
+        :param skipped_steps: The skip configuration properties (SKIP_PROFILING, SKIP_VALIDATION,
+        SKIP_REPORT) to switch on, in addition to the ones set in the alignment configuration.
         """
+        for stage_name in [from_stage, to_stage]:
+            if stage_name not in PIPELINE_STAGES:
+                raise ValueError(
+                    f"Unknown pipeline stage '{stage_name}', the stages are: {', '.join(PIPELINE_STAGES)}."
+                )
+        if PIPELINE_STAGES.index(from_stage) > PIPELINE_STAGES.index(to_stage):
+            raise ValueError(f"The first stage '{from_stage}' must not come after the last stage '{to_stage}'.")
+        self._stages = PIPELINE_STAGES[PIPELINE_STAGES.index(from_stage):PIPELINE_STAGES.index(to_stage) + 1]
         self._project_folder_path = DataManager.get_absolute_path(project_folder_path)
         self._short_project_name = self._project_folder_path.split("/")[-1]
-        self._data_manager = DataManager(project_folder_path=self._project_folder_path)
+        self._data_manager = DataManager(
+            project_folder_path=self._project_folder_path, clear_output_directory=(from_stage == STAGE_INPUT)
+        )
         self._alignment_config = self._data_manager.load_alignment_config()
+        for skipped_step in skipped_steps or []:
+            if skipped_step not in SKIPPABLE_STEPS:
+                raise ValueError(f"Unknown skipped step '{skipped_step}'.")
+            # the configuration dictionary is updated too, as it is part of the stage fingerprints
+            setattr(self._alignment_config.base_config, skipped_step, True)
+            self._alignment_config.as_dict[skipped_step] = True
         self.logger = setup_logger(module_name=__name__, file_name=self._data_manager.get_log_file_path())
+        table_engine.set_table_engine(table_engine_name=self._alignment_config.base_config.table_engine)
         self._alignment_priority_order: List[str] = []
         self._runtime_data: List[RuntimeData] = []
+        self._stage_cache: Optional[StageCache] = None
+        # the names of the tables produced by each stage (run or cached), saved so the tables of the
+        # earlier stages can be loaded when resuming, and the names of the tables loaded when resuming
+        self._stage_table_names: Dict[str, List[str]] = {}
+        self._stage_table_names_lock = threading.Lock()
+        self._loaded_table_names: List[str] = []
+        if self._alignment_config.base_config.stage_cache_max_size_mb > 0:
+            self._stage_cache = StageCache(
+                cache_folder_path=self._data_manager.get_stage_cache_folder_path(),
+                max_size_bytes=self._alignment_config.base_config.stage_cache_max_size_mb * (1 << 20),
+            )
 
     def run_alignment_and_connection_process(self) -> None:
         """Run the alignment and connectivity process, validate inputs and outputs, produce analysis.
@@ -59,33 +170,29 @@ class Pipeline:
         # (1) VALIDATE CONFIG
         self._validate_alignment_config()
 
-        # (2) LOAD AND CHECK INPUT DATA
-        self._process_input_data()
-
-        # (3) RUN ALIGNMENT & POST PROCESSING
-        self._align_nodes()
-        self._post_process_alignment_output()
-
-        # (4) RUN CONNECTIVITY & POST PROCESSING
-        self._connect_nodes()
-
-        # (5) FINALISE OUTPUTS
-        self._finalise_outputs()
-
-        # (6) VALIDATE & PROFILE: intermediate & output data
-        self._validate_and_profile_dataset(
-            data_origin=DIRECTORY_INTERMEDIATE,
-            data_runtime_name=DIRECTORY_INTERMEDIATE,
-            tables=self._data_repo.get_intermediate_tables()
-        )
-        self._validate_and_profile_dataset(
-            data_origin=DIRECTORY_DOMAIN_ONTOLOGY,
-            data_runtime_name="output",
-            tables=self._data_repo.get_domain_tables()
+        # when resuming, load the outputs of the earlier stages
+        if self._stages[0] != STAGE_INPUT:
+            self._load_outputs_of_earlier_stages()
+
+        # (2) - (7) LOAD AND VALIDATE INPUT DATA, RUN ALIGNMENT & CONNECTIVITY, FINALISE, VALIDATE OUTPUTS
+        # AND PRODUCE REPORT: independent stages are run concurrently
+        stage_scheduler = StageScheduler(worker_count=self._get_stage_worker_count())
+        for stage_name, stage in self._produce_stages().items():
+            stage_scheduler.add_stage(
+                stage_name=stage_name,
+                stage=functools.partial(self._run_stage, stage_name=stage_name, stage=stage),
+                dependencies=_STAGE_DEPENDENCIES[stage_name],
+            )
+        trace_memory_allocations = (
+            self._alignment_config.base_config.trace_memory_allocations and not tracemalloc.is_tracing()
         )
-
-        # (7) PRODUCE ANALYSIS & REPORT
-        self._produce_report()
+        if trace_memory_allocations:
+            tracemalloc.start()
+        try:
+            stage_scheduler.run()
+        finally:
+            if trace_memory_allocations:
+                tracemalloc.stop()
 
         self.logger.info("Finished running alignment and connection process for " + f"'{self._short_project_name}'")
 
@@ -97,17 +204,54 @@ class Pipeline:
         :return:
         """
         self.logger.info("Started validating alignment config...")
-        start_date_time = datetime.now()
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
         config_json_is_valid = validate_alignment_configuration(alignment_config=self._alignment_config.as_dict)
         if config_json_is_valid is False:
             raise Exception
-        self._record_runtime(start_date_time=start_date_time, task_name="VALIDATE CONFIG")
+        self._record_runtime(start_resource_usage=start_resource_usage, task_name="VALIDATE CONFIG")
         self.logger.info("Finished validating alignment config.")
 
+    def _produce_stages(self) -> Dict[str, Callable[[], object]]:
+        """Produce the stage methods in the pipeline stage order.
+
+        :return: The stage methods by stage name.
+        """
+        return {
+            STAGE_INPUT: self._process_input_data,
+            STAGE_VALIDATION_INPUT: self._validate_input_data,
+            STAGE_ALIGNMENT: self._align_nodes,
+            STAGE_ALIGNMENT_POST_PROCESSING: self._post_process_alignment_output,
+            STAGE_CONNECTIVITY: self._connect_nodes,
+            STAGE_FINALISE_OUTPUTS: self._finalise_outputs,
+            STAGE_VALIDATION_INTERMEDIATE: lambda: self._validate_and_profile_dataset(
+                data_origin=DIRECTORY_INTERMEDIATE,
+                data_runtime_name=DIRECTORY_INTERMEDIATE,
+                tables=self._data_repo.get_intermediate_tables()
+            ),
+            STAGE_VALIDATION_OUTPUT: lambda: self._validate_and_profile_dataset(
+                data_origin=DIRECTORY_DOMAIN_ONTOLOGY,
+                data_runtime_name="output",
+                tables=self._data_repo.get_domain_tables()
+            ),
+            STAGE_REPORT: self._produce_report,
+        }
+
+    def _get_stage_worker_count(self) -> int:
+        """Return the number of stages that are run concurrently.
+
+        The stages are run one after another when the stage cache is enabled, as the cache
+        attributes the written output files to a stage by comparing the output folder before and
+        after the stage.
+
+        :return: The stage worker count.
+        """
+        if self._stage_cache is not None:
+            return 1
+        return self._alignment_config.base_config.stage_worker_count
+
     def _process_input_data(self) -> None:
-        """Load, preprocess, profile and validate the input data.
+        """Load and preprocess the input data.
 
-        Raises an exception if the inputs are invalid (missing or fail data tests).
         Results (loaded tables) are stored in the data repository.
 
         :return:
@@ -115,28 +259,43 @@ class Pipeline:
         self.logger.info("Started processing input data...")
 
         # load  and preprocess input tables: add namespaces for downstream processing
-        self._data_repo.update(
-            tables=analysis_utils.add_namespace_column_to_loaded_tables(tables=self._data_manager.load_input_tables())
-        )
+        input_tables = self._data_manager.load_input_tables()
+        self._data_repo.node_id_dictionary = self._data_manager.node_id_dictionary
+        self._data_repo.update(tables=analysis_utils.add_namespace_column_to_loaded_tables(tables=input_tables))
+
+        self.logger.info("Finished processing input data.")
+
+    def _validate_input_data(self) -> None:
+        """Profile and validate the input data.
 
-        # profile input tables
+        Raises an exception if the inputs are invalid (fail data tests).
+
+        :return:
+        """
         results_df = self._validate_and_profile_dataset(
             data_origin=DIRECTORY_INPUT,
             data_runtime_name=DIRECTORY_INPUT,
             tables=self._data_repo.get_input_tables()
         )
-        errors = results_df["nb_failed_validations"].sum()
+        if results_df is None:
+            self.logger.warning("The INPUT data is not validated, as validation is skipped.")
+            return
+        # the results table covers every validation in the data tests folder, e.g. the intermediate
+        # validations of an earlier run when the pipeline is resumed
+        errors = results_df[results_df["directory_name"] == DIRECTORY_INPUT]["nb_failed_validations"].sum()
         if errors > 0:
+            if self._alignment_config.base_config.validation_engine == VALIDATION_ENGINE_GREAT_EXPECTATIONS:
+                report_path = self._data_manager.get_ge_data_docs_index_path_for_input()
+            else:
+                report_path = self._data_manager.get_ge_json_validations_folder_path()
             self.logger.error(f"The INPUT data validation found {errors} errors. Terminating process. "
                               + "Please resolve the errors, or force skipping errors in the config (see report "
-                              + f"'{self._data_manager.get_ge_data_docs_index_path_for_input()}').")
+                              + f"'{report_path}').")
             if self._alignment_config.base_config.force_through_failed_validation is False:
                 raise Exception
             else:
                 self.logger.info("Process will carry on due 'force_through_failed_validation' is ON")
 
-        self.logger.info("Finished processing input data.")
-
     def _align_nodes(self) -> None:
         """Run the alignment process.
 
@@ -145,7 +304,7 @@ class Pipeline:
         :return:
         """
         self.logger.info("Started aligning nodes...")
-        start_date_time = datetime.now()
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
         alignment_results, source_alignment_order = AlignmentManager(
             alignment_config=self._alignment_config,
             data_repo=self._data_repo,
@@ -154,7 +313,7 @@ class Pipeline:
         self._data_repo.update(tables=alignment_results.get_intermediate_tables())
         self._data_manager.save_tables(tables=alignment_results.get_intermediate_tables())
         self._alignment_priority_order.extend(source_alignment_order)
-        self._record_runtime(start_date_time=start_date_time, task_name="ALIGNMENT")
+        self._record_runtime(start_resource_usage=start_resource_usage, task_name="ALIGNMENT")
         self.logger.info("Finished aligning nodes.")
 
     def _post_process_alignment_output(self) -> None:
@@ -165,7 +324,7 @@ class Pipeline:
         :return:
         """
         self.logger.info("Started aggregating merges...")
-        start_date_time = datetime.now()
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
         tables = merge_utils.post_process_alignment_results(
             data_repo=self._data_repo,
             seed_id=self._alignment_config.base_config.seed_ontology_name,
@@ -173,7 +332,7 @@ class Pipeline:
         )
         self._data_repo.update(tables=tables)
         self._data_manager.save_tables(tables=tables)
-        self._record_runtime(start_date_time=start_date_time, task_name="ALIGNMENT postprocessing")
+        self._record_runtime(start_resource_usage=start_resource_usage, task_name="ALIGNMENT postprocessing")
         self.logger.info("Finished aggregating merges.")
 
     def _connect_nodes(self) -> None:
@@ -183,10 +342,13 @@ class Pipeline:
 
         :return:
         """
+        # the graph libraries are slow to import, they are only loaded when the stage runs
+        from onto_merger.alignment import hierarchy_utils
+
         self.logger.info("Started connecting nodes...")
-        start_date_time = datetime.now()
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
         self._data_repo.update(
-            tables=HierarchyManager(data_manager=self._data_manager).connect_nodes(
+            tables=hierarchy_utils.HierarchyManager(data_manager=self._data_manager).connect_nodes(
                 alignment_config=self._alignment_config,
                 source_alignment_order=self._alignment_priority_order,
                 data_repo=self._data_repo,
@@ -197,7 +359,8 @@ class Pipeline:
                 data_repo=self._data_repo,
             )
         )
-        self._record_runtime(start_date_time=start_date_time, task_name="CONNECTIVITY")
+        self._data_manager.save_tables(tables=self._data_repo.get_intermediate_tables())
+        self._record_runtime(start_resource_usage=start_resource_usage, task_name="CONNECTIVITY")
         self.logger.info("Finished connecting nodes.")
 
     def _finalise_outputs(self) -> None:
@@ -208,7 +371,7 @@ class Pipeline:
         :return:
         """
         self.logger.info("Started finalising outputs...")
-        start_date_time = datetime.now()
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
 
         #  add NS to all outputs
         self._data_repo.update(
@@ -224,31 +387,59 @@ class Pipeline:
         self._data_repo.update(tables=domain_tables)
         self._data_manager.save_domain_ontology_tables(tables=domain_tables)
 
-        self._record_runtime(start_date_time=start_date_time, task_name="FINALISING OUTPUTS")
+        self._record_runtime(start_resource_usage=start_resource_usage, task_name="FINALISING OUTPUTS")
         self.logger.info("Finished finalising outputs.")
 
     def _validate_and_profile_dataset(
             self, data_origin: str, data_runtime_name: str, tables: List[NamedTable]
-    ) -> DataFrame:
-        """Profile and validate a dataset.
+    ) -> Optional[DataFrame]:
+        """Profile and validate a dataset, unless profiling or validation is skipped.
 
-        :return:
+        :return: The data test results, or None if validation is skipped.
         """
         self.logger.info(f"Started validating {data_runtime_name} data...")
 
         # profile outputs
-        start_date_time = datetime.now()
-        pandas_profiler.profile_tables(tables=tables, data_manager=self._data_manager)
-        self._record_runtime(start_date_time=start_date_time, task_name=f"PROFILING {data_runtime_name} DATA")
+        if self._alignment_config.base_config.skip_profiling is True:
+            self.logger.info(f"Skipped profiling {data_runtime_name} data.")
+        else:
+            # Pandas profiling is slow to import, it is only loaded when the stage runs
+            from onto_merger.analyser import pandas_profiler
+
+            start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
+            pandas_profiler.profile_tables(
+                tables=tables,
+                data_manager=self._data_manager,
+                sample_row_threshold=self._alignment_config.base_config.profiling_sample_row_threshold,
+                worker_count=self._alignment_config.base_config.profiling_worker_count,
+            )
+            self._record_runtime(
+                start_resource_usage=start_resource_usage, task_name=f"PROFILING {data_runtime_name} DATA"
+            )
 
         # run data tests
-        start_date_time = datetime.now()
-        results_df = GERunner(
-            alignment_config=self._alignment_config,
-            ge_base_directory=self._data_manager.get_data_tests_path(),
-            data_manager=self._data_manager,
-        ).run_ge_tests(named_tables=tables, data_origin=data_origin)
-        self._record_runtime(start_date_time=start_date_time, task_name=f"VALIDATION {data_runtime_name} DATA")
+        if self._alignment_config.base_config.skip_validation is True:
+            self.logger.info(f"Skipped validating {data_runtime_name} data.")
+            return None
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
+        if self._alignment_config.base_config.validation_engine == VALIDATION_ENGINE_GREAT_EXPECTATIONS:
+            # Great Expectations is an optional dependency
+            from onto_merger.data_testing.ge_runner import GERunner
+
+            results_df = GERunner(
+                alignment_config=self._alignment_config,
+                ge_base_directory=self._data_manager.get_data_tests_path(),
+                data_manager=self._data_manager,
+            ).run_ge_tests(named_tables=tables, data_origin=data_origin)
+        else:
+            results_df = NativeValidator(
+                alignment_config=self._alignment_config,
+                data_tests_directory=self._data_manager.get_data_tests_path(),
+                data_manager=self._data_manager,
+            ).run_data_tests(named_tables=tables, data_origin=data_origin)
+        self._record_runtime(
+            start_resource_usage=start_resource_usage, task_name=f"VALIDATION {data_runtime_name} DATA"
+        )
 
         self.logger.info(f"Finished validating {data_runtime_name} data.")
         return results_df
@@ -262,6 +453,13 @@ class Pipeline:
         run_time_table = convert_runtime_steps_to_named_table(steps=self._runtime_data)
         self._data_repo.update(table=run_time_table)
         self._data_manager.save_table(table=run_time_table)
+        if self._alignment_config.base_config.skip_report is True:
+            self.logger.info("Skipped producing HTML report (the pipeline steps report is saved).")
+            return
+
+        # the plotting and templating libraries are slow to import, they are only loaded when the stage runs
+        from onto_merger.analyser.report_analyser import ReportAnalyser
+        from onto_merger.report import report_generator
 
         # move data docs to report folder
         self._data_manager.move_data_docs_to_reports()
@@ -277,13 +475,208 @@ class Pipeline:
 
         self.logger.info(f"Finished producing HTML report (saved to '{report_path}'.")
 
-    def _record_runtime(self, start_date_time: datetime, task_name: str) -> None:
-        end_date_time = datetime.now()
+    def _run_stage(self, stage_name: str, stage: Callable[[], object]) -> None:
+        """Run a pipeline stage, or load its outputs from the stage cache if its inputs are unchanged.
+
+        :param stage_name: The name of the stage.
+        :param stage: The stage method.
+        :return:
+        """
+        if stage_name not in self._stages:
+            return
+        if self._stage_cache is None:
+            self._run_stage_and_record_tables(stage_name=stage_name, stage=stage)
+            return
+        start_resource_usage = ResourceUsage.measure(data_repo=self._data_repo)
+        fingerprint = self._produce_stage_fingerprint(stage_name=stage_name)
+        cache_entry = self._stage_cache.load(stage_name=stage_name, fingerprint=fingerprint)
+        if cache_entry is not None:
+            self._restore_stage_outputs(cache_entry=cache_entry)
+            self._record_stage_table_names(
+                stage_name=stage_name, table_names=[table.name for table in cache_entry.tables]
+            )
+            self._record_runtime(
+                start_resource_usage=start_resource_usage, task_name=f"{stage_name.replace('_', ' ').upper()} (CACHED)"
+            )
+            self.logger.info(f"Loaded the outputs of stage '{stage_name}' from the stage cache.")
+            return
+
+        output_folder_path = os.path.join(self._project_folder_path, DIRECTORY_OUTPUT)
+        excluded_folder_paths = [os.path.dirname(self._data_manager.get_log_file_path())]
+        files_before = StageCache.produce_file_snapshot(
+            folder_path=output_folder_path, excluded_folder_paths=excluded_folder_paths
+        )
+        stage_tables = self._run_stage_and_record_tables(stage_name=stage_name, stage=stage)
+        self._stage_cache.save(
+            stage_name=stage_name,
+            fingerprint=fingerprint,
+            tables=stage_tables,
+            folder_path=output_folder_path,
+            files=StageCache.get_written_files(
+                snapshot_before=files_before,
+                snapshot_after=StageCache.produce_file_snapshot(
+                    folder_path=output_folder_path, excluded_folder_paths=excluded_folder_paths
+                ),
+            ),
+            state={"alignment_priority_order": self._alignment_priority_order},
+        )
+
+    def _run_stage_and_record_tables(self, stage_name: str, stage: Callable[[], object]) -> List[NamedTable]:
+        """Run a pipeline stage and record the tables it produced (added or replaced in the data repository).
+
+        The stages that run concurrently (the validation stages alongside the alignment and
+        connectivity) do not update the data repository, so the tables are attributed to the
+        right stage.
+
+        :param stage_name: The name of the stage.
+        :param stage: The stage method.
+        :return: The tables produced by the stage.
+        """
+        tables_before = {table_name: table.dataframe for table_name, table in list(self._data_repo.data.items())}
+        stage()
+        stage_tables = [
+            table for table_name, table in list(self._data_repo.data.items())
+            if tables_before.get(table_name) is not table.dataframe
+        ]
+        self._record_stage_table_names(stage_name=stage_name, table_names=[table.name for table in stage_tables])
+        return stage_tables
+
+    def _record_stage_table_names(self, stage_name: str, table_names: List[str]) -> None:
+        """Record the names of the tables produced by a stage, and save them to the output folder.
+
+        :param stage_name: The name of the stage.
+        :param table_names: The names of the tables produced by the stage.
+        :return:
+        """
+        with self._stage_table_names_lock:
+            self._stage_table_names[stage_name] = table_names
+            self._data_manager.save_stage_table_names(stage_table_names=self._stage_table_names)
+
+    def _load_outputs_of_earlier_stages(self) -> None:
+        """Rebuild the data repository from the input tables and the tables saved by the earlier stages.
+
+        The input tables are loaded without profiling and validation. Only the tables produced by
+        the earlier stages are loaded, the tables a previous run saved in the later stages are
+        out of date.
+
+        :return:
+        """
+        self.logger.info(f"Started loading the outputs of the stages before '{self._stages[0]}'...")
+        earlier_stages = PIPELINE_STAGES[:PIPELINE_STAGES.index(self._stages[0])]
+        stage_table_names = self._data_manager.load_stage_table_names() or {}
+        missing_stages = [stage_name for stage_name in earlier_stages if stage_name not in stage_table_names]
+        if missing_stages:
+            raise ValueError(
+                f"The stages {missing_stages} have not been run, the pipeline can not be resumed from "
+                + f"'{self._stages[0]}'."
+            )
+        self._stage_table_names.update({stage_name: stage_table_names[stage_name] for stage_name in earlier_stages})
+        earlier_stage_table_names = {
+            table_name for stage_name in earlier_stages for table_name in stage_table_names[stage_name]
+        }
+        input_tables = self._data_manager.load_input_tables()
+        self._data_repo.node_id_dictionary = self._data_manager.node_id_dictionary
+        loaded_tables = analysis_utils.add_namespace_column_to_loaded_tables(tables=input_tables)
+        loaded_tables.extend(
+            self._data_manager.load_specified_tables(
+                table_names=[
+                    table_name for table_name in TABLES_INTERMEDIATE
+                    if table_name != TABLE_PIPELINE_STEPS_REPORT and table_name in earlier_stage_table_names
+                ]
+            )
+        )
+        if STAGE_FINALISE_OUTPUTS in earlier_stages:
+            loaded_tables.extend(self._data_manager.load_output_tables())
+        self._data_repo.update(tables=loaded_tables)
+        if STAGE_ALIGNMENT in earlier_stages:
+            self._alignment_priority_order.extend(
+                produce_source_alignment_priority_order(
+                    seed_ontology_name=self._alignment_config.base_config.seed_ontology_name,
+                    nodes=self._data_repo.get(TABLE_NODES).dataframe,
+                )
+            )
+        self._loaded_table_names = [table.name for table in loaded_tables]
+        self.logger.info(f"Finished loading the outputs of the stages before '{self._stages[0]}'.")
+
+    def _produce_stage_fingerprint(self, stage_name: str) -> str:
+        """Produce the stage fingerprint from the code version, the configuration and the stage input tables.
+
+        The input stage reads the input CSV-s, every other stage reads the tables produced by the
+        stages it depends on (directly or indirectly) and the tables loaded when resuming.
+
+        :param stage_name: The name of the stage.
+        :return: The fingerprint.
+        """
+        config = {
+            config_property: value
+            for config_property, value in self._alignment_config.as_dict.items()
+            if stage_name not in _STAGE_INDEPENDENT_CONFIG_PROPERTIES.get(config_property, [])
+        }
+        input_file_paths = []
+        if stage_name == STAGE_INPUT:
+            input_file_paths = [
+                self._data_manager.get_table_path(process_directory=DIRECTORY_INPUT, table_name=table_name)
+                for table_name in TABLES_INPUT
+            ]
+        input_table_names = set(self._loaded_table_names)
+        for upstream_stage_name in _get_upstream_stages(stage_name=stage_name):
+            input_table_names.update(self._stage_table_names.get(upstream_stage_name, []))
+        assert self._stage_cache is not None
+        return self._stage_cache.produce_fingerprint(
+            stage_name=stage_name,
+            config=config,
+            tables=[table for table_name, table in self._data_repo.data.items() if table_name in input_table_names],
+            file_paths=input_file_paths,
+            ignored_columns=_STAGE_INDEPENDENT_COLUMNS,
+        )
+
+    def _restore_stage_outputs(self, cache_entry: StageCacheEntry) -> None:
+        """Restore the tables, output files and pipeline state of a cached stage.
+
+        :param cache_entry: The stage cache entry.
+        :return:
+        """
+        if cache_entry.stage_name == STAGE_INPUT:
+            # the node ID dictionary is produced from the input tables
+            self._data_manager.node_id_dictionary = NodeIdDictionary.from_tables(tables=cache_entry.tables)
+            self._data_repo.node_id_dictionary = self._data_manager.node_id_dictionary
+        self._data_repo.update(tables=cache_entry.tables)
+        assert self._stage_cache is not None
+        self._stage_cache.restore_files(
+            entry=cache_entry, folder_path=os.path.join(self._project_folder_path, DIRECTORY_OUTPUT)
+        )
+        self._alignment_priority_order[:] = cache_entry.state["alignment_priority_order"]
+
+    def _record_runtime(self, start_resource_usage: ResourceUsage, task_name: str) -> None:
+        """Record the run time and the resource usage of a task.
+
+        When stages run concurrently, the CPU times and the table memory delta include the
+        concurrent stages.
+
+        :param start_resource_usage: The resource usage at the start of the task.
+        :param task_name: The task name.
+        :return:
+        """
         self._runtime_data.append(
-            RuntimeData(
+            RuntimeData.from_resource_usage(
                 task=task_name,
-                start=format_datetime(start_date_time),
-                end=format_datetime(end_date_time),
-                elapsed=(end_date_time - start_date_time).total_seconds()
+                start=start_resource_usage,
+                end=ResourceUsage.measure(data_repo=self._data_repo),
             )
         )
+
+
+def _get_upstream_stages(stage_name: str) -> List[str]:
+    """Return the stages a stage depends on, directly or indirectly.
+
+    :param stage_name: The name of the stage.
+    :return: The names of the upstream stages.
+    """
+    upstream_stages: List[str] = []
+    stages_to_visit = list(_STAGE_DEPENDENCIES[stage_name])
+    while stages_to_visit:
+        upstream_stage = stages_to_visit.pop()
+        if upstream_stage not in upstream_stages:
+            upstream_stages.append(upstream_stage)
+            stages_to_visit.extend(_STAGE_DEPENDENCIES[upstream_stage])
+    return upstream_stages
@@ -0,0 +1,338 @@
+"""Content-addressed cache of pipeline stage outputs, with a size bounded LRU eviction policy."""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+from pandas import CategoricalDtype, DataFrame, Index
+
+from onto_merger.data.dataclasses import NamedTable, NodeIdDictionary
+from onto_merger.logger.log import get_logger
+from onto_merger.version import __version__
+
+logger = get_logger(__name__)
+
+_FILE_NAME_META_DATA = "meta_data.json"
+_DIRECTORY_TABLES = "tables"
+_DIRECTORY_FILES = "files"
+
+
+@dataclass
+class StageCacheEntry:
+    """Represent the cached outputs of a pipeline stage."""
+
+    stage_name: str
+    fingerprint: str
+    tables: List[NamedTable]
+    files: List[str]
+    state: dict
+
+
+class StageCache:
+    """Store the outputs of pipeline stages, addressed by the fingerprint of the stage inputs.
+
+    A stage fingerprint covers the code version, the configuration properties and the input
+    tables (or input files) of the stage. An entry holds the tables the stage produced, the
+    output files it wrote and additional pipeline state (e.g. the alignment priority order).
+    When the total size of the entries exceeds the limit, the least recently used entries
+    are deleted.
+    """
+
+    def __init__(self, cache_folder_path: str, max_size_bytes: int):
+        """Initialise the StageCache class.
+
+        :param cache_folder_path: The folder where the cache entries are stored.
+        :param max_size_bytes: The maximum total size of the cache entries.
+        """
+        self._cache_folder_path = cache_folder_path
+        self._max_size_bytes = max_size_bytes
+        self._table_digests: Dict[Tuple[int, tuple], Tuple[weakref.ref, str]] = {}
+        self._categories_digests: Dict[int, Tuple[weakref.ref, str]] = {}
+        Path(self._cache_folder_path).mkdir(parents=True, exist_ok=True)
+
+    # FINGERPRINTS #
+    def produce_fingerprint(
+        self,
+        stage_name: str,
+        config: dict,
+        tables: List[NamedTable],
+        file_paths: Optional[List[str]] = None,
+        ignored_columns: Optional[List[str]] = None,
+    ) -> str:
+        """Produce the fingerprint of a stage from its inputs.
+
+        :param stage_name: The name of the stage.
+        :param config: The configuration properties the stage depends on.
+        :param tables: The tables the stage reads.
+        :param file_paths: The files the stage reads (e.g. the input CSV-s).
+        :param ignored_columns: Columns that do not affect the stage outputs (e.g. run times).
+        :return: The fingerprint as a hexadecimal string.
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update(
+            json.dumps(
+                {"stage": stage_name, "code": _produce_code_version(), "config": config}, sort_keys=True
+            ).encode()
+        )
+        for table in sorted(tables, key=lambda named_table: named_table.name):
+            fingerprint.update(table.name.encode())
+            fingerprint.update(self._get_table_digest(table=table.dataframe, ignored_columns=ignored_columns).encode())
+        for file_path in sorted(file_paths or []):
+            fingerprint.update(os.path.basename(file_path).encode())
+            fingerprint.update(_produce_file_digest(file_path=file_path).encode())
+        return fingerprint.hexdigest()
+
+    def _get_table_digest(self, table: DataFrame, ignored_columns: Optional[List[str]]) -> str:
+        """Return the content digest of a table.
+
+        Digests are kept for the lifetime of the table, as the data repository replaces
+        tables instead of modifying them.
+
+        :param table: The table.
+        :param ignored_columns: Columns excluded from the digest.
+        :return: The digest as a hexadecimal string.
+        """
+        digest_key = (id(table), tuple(ignored_columns or []))
+        if digest_key in self._table_digests and self._table_digests[digest_key][0]() is table:
+            return self._table_digests[digest_key][1]
+        hashed_table = table.drop(columns=[column for column in (ignored_columns or []) if column in table])
+        digest = hashlib.sha256(json.dumps(list(hashed_table.columns.astype(str))).encode())
+        # categorical (e.g. node ID) columns are hashed as codes, with the digest of their categories
+        categorical_columns = [
+            column for column in hashed_table if isinstance(hashed_table[column].dtype, CategoricalDtype)
+        ]
+        for column in categorical_columns:
+            digest.update(self._get_categories_digest(categories=hashed_table[column].cat.categories).encode())
+        hashed_table = hashed_table.assign(**{column: hashed_table[column].cat.codes for column in categorical_columns})
+        try:
+            row_hashes = pd.util.hash_pandas_object(hashed_table, index=False)
+        except TypeError:
+            # unhashable cell values (e.g. lists)
+            row_hashes = pd.util.hash_pandas_object(hashed_table.astype(str), index=False)
+        digest.update(row_hashes.to_numpy().tobytes())
+        _remember_digest(digests=self._table_digests, digest_key=digest_key, obj=table, digest=digest.hexdigest())
+        return digest.hexdigest()
+
+    def _get_categories_digest(self, categories: Index) -> str:
+        """Return the content digest of the categories of a categorical column (e.g. the node ID dictionary).
+
+        :param categories: The categories.
+        :return: The digest as a hexadecimal string.
+        """
+        if id(categories) in self._categories_digests and self._categories_digests[id(categories)][0]() is categories:
+            return self._categories_digests[id(categories)][1]
+        digest = hashlib.sha256(pd.util.hash_pandas_object(categories).to_numpy().tobytes()).hexdigest()
+        _remember_digest(digests=self._categories_digests, digest_key=id(categories), obj=categories, digest=digest)
+        return digest
+
+    # ENTRIES #
+    def load(self, stage_name: str, fingerprint: str) -> Optional[StageCacheEntry]:
+        """Load the cached outputs of a stage.
+
+        :param stage_name: The name of the stage.
+        :param fingerprint: The stage fingerprint.
+        :return: The cache entry, or None if the stage outputs are not cached.
+        """
+        entry_path = self._get_entry_path(fingerprint=fingerprint)
+        meta_data_path = os.path.join(entry_path, _FILE_NAME_META_DATA)
+        if not os.path.isfile(meta_data_path):
+            logger.info(f"Stage '{stage_name}' is not cached (fingerprint {fingerprint[:12]}).")
+            return None
+        with open(meta_data_path) as json_file:
+            meta_data = json.load(json_file)
+        tables = [
+            NamedTable(
+                name=table_name,
+                dataframe=pd.read_pickle(os.path.join(entry_path, _DIRECTORY_TABLES, f"{table_name}.pkl")),
+            )
+            for table_name in meta_data["tables"]
+        ]
+        # the modification time of the meta data file is the last use time of the entry
+        os.utime(meta_data_path)
+        logger.info(f"Loaded cached outputs of stage '{stage_name}' (fingerprint {fingerprint[:12]}).")
+        return StageCacheEntry(
+            stage_name=stage_name,
+            fingerprint=fingerprint,
+            tables=tables,
+            files=meta_data["files"],
+            state=meta_data["state"],
+        )
+
+    def restore_files(self, entry: StageCacheEntry, folder_path: str) -> None:
+        """Copy the cached output files of a stage to the output folder.
+
+        :param entry: The cache entry.
+        :param folder_path: The output folder the files were written to by the stage.
+        :return:
+        """
+        files_path = os.path.join(self._get_entry_path(fingerprint=entry.fingerprint), _DIRECTORY_FILES)
+        for file_path in entry.files:
+            Path(os.path.join(folder_path, file_path)).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(os.path.join(files_path, file_path), os.path.join(folder_path, file_path))
+
+    def save(
+        self,
+        stage_name: str,
+        fingerprint: str,
+        tables: List[NamedTable],
+        folder_path: str,
+        files: List[str],
+        state: dict,
+    ) -> None:
+        """Save the outputs of a stage, then evict the least recently used entries if the cache is full.
+
+        The entry is written to a temporary folder first, so interrupted runs do not leave
+        incomplete entries behind.
+
+        :param stage_name: The name of the stage.
+        :param fingerprint: The stage fingerprint.
+        :param tables: The tables produced by the stage.
+        :param folder_path: The output folder the stage wrote its files to.
+        :param files: The output file paths (relative to the output folder) written by the stage.
+        :param state: Additional (JSON serialisable) pipeline state produced by the stage.
+        :return:
+        """
+        entry_path = self._get_entry_path(fingerprint=fingerprint)
+        temporary_entry_path = f"{entry_path}.tmp"
+        shutil.rmtree(temporary_entry_path, ignore_errors=True)
+        Path(os.path.join(temporary_entry_path, _DIRECTORY_TABLES)).mkdir(parents=True)
+        for table in tables:
+            NodeIdDictionary.decode_table(table=table.dataframe).to_pickle(
+                os.path.join(temporary_entry_path, _DIRECTORY_TABLES, f"{table.name}.pkl")
+            )
+        for file_path in files:
+            Path(os.path.join(temporary_entry_path, _DIRECTORY_FILES, file_path)).parent.mkdir(
+                parents=True, exist_ok=True
+            )
+            shutil.copy2(
+                os.path.join(folder_path, file_path), os.path.join(temporary_entry_path, _DIRECTORY_FILES, file_path)
+            )
+        with open(os.path.join(temporary_entry_path, _FILE_NAME_META_DATA), "w") as json_file:
+            json.dump(
+                {
+                    "stage": stage_name,
+                    "fingerprint": fingerprint,
+                    "tables": [table.name for table in tables],
+                    "files": files,
+                    "state": state,
+                },
+                json_file,
+            )
+        shutil.rmtree(entry_path, ignore_errors=True)
+        os.replace(temporary_entry_path, entry_path)
+        logger.info(
+            f"Cached outputs of stage '{stage_name}' (fingerprint {fingerprint[:12]}, "
+            + f"{len(tables)} table(s), {len(files)} file(s))."
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the cache size is within the limit."""
+        entries = []
+        for entry_name in os.listdir(self._cache_folder_path):
+            meta_data_path = os.path.join(self._cache_folder_path, entry_name, _FILE_NAME_META_DATA)
+            if os.path.isfile(meta_data_path):
+                entries.append(
+                    (
+                        os.path.getmtime(meta_data_path),
+                        os.path.join(self._cache_folder_path, entry_name),
+                        _get_folder_size(folder_path=os.path.join(self._cache_folder_path, entry_name)),
+                    )
+                )
+        cache_size = sum(entry_size for _, _, entry_size in entries)
+        for _, entry_path, entry_size in sorted(entries):
+            if cache_size <= self._max_size_bytes:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            cache_size -= entry_size
+            logger.info(f"Evicted stage cache entry '{os.path.basename(entry_path)[:12]}' ({entry_size:,d} bytes).")
+
+    def _get_entry_path(self, fingerprint: str) -> str:
+        return os.path.join(self._cache_folder_path, fingerprint)
+
+    # OUTPUT FILES #
+    @staticmethod
+    def produce_file_snapshot(folder_path: str, excluded_folder_paths: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Produce the size and modification time of every file in a folder.
+
+        :param folder_path: The folder path.
+        :param excluded_folder_paths: Sub folders to be skipped (e.g. the log folder).
+        :return: The (size, modification time) pair of each file, keyed by the relative file path.
+        """
+        snapshot = {}
+        for directory_path, directory_names, file_names in os.walk(folder_path):
+            directory_names[:] = [
+                directory_name
+                for directory_name in directory_names
+                if os.path.join(directory_path, directory_name) not in excluded_folder_paths
+            ]
+            for file_name in file_names:
+                file_stat = os.stat(os.path.join(directory_path, file_name))
+                snapshot[os.path.relpath(os.path.join(directory_path, file_name), folder_path)] = (
+                    file_stat.st_size,
+                    file_stat.st_mtime_ns,
+                )
+        return snapshot
+
+    @staticmethod
+    def get_written_files(
+        snapshot_before: Dict[str, Tuple[int, int]], snapshot_after: Dict[str, Tuple[int, int]]
+    ) -> List[str]:
+        """Return the files that were created or modified between two snapshots.
+
+        :param snapshot_before: The snapshot taken before the stage.
+        :param snapshot_after: The snapshot taken after the stage.
+        :return: The relative file paths.
+        """
+        return sorted(
+            file_path for file_path, file_stat in snapshot_after.items() if snapshot_before.get(file_path) != file_stat
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def _produce_code_version() -> str:
+    """Produce the code version: the package version and the digest of the package files.
+
+    :return: The code version as a string.
+    """
+    package_path = Path(__file__).parent.parent
+    digest = hashlib.sha256()
+    for file_path in sorted(package_path.rglob("*")):
+        if file_path.is_file() and "__pycache__" not in file_path.parts:
+            digest.update(str(file_path.relative_to(package_path)).encode())
+            digest.update(file_path.read_bytes())
+    return f"{__version__}-{digest.hexdigest()}"
+
+
+def _remember_digest(digests: Dict[Any, Tuple[weakref.ref, str]], digest_key: Hashable, obj: Any, digest: str) -> None:
+    """Store the digest of an object without keeping the object alive.
+
+    The entry is dropped when the object is garbage collected, so replaced tables are released
+    and their IDs can not be mistaken for the IDs of new tables.
+
+    :param digests: The digest dictionary.
+    :param digest_key: The key of the object (based on its ID).
+    :param obj: The object (a table or an index).
+    :param digest: The digest of the object.
+    :return:
+    """
+    digests[digest_key] = (weakref.ref(obj, lambda _: digests.pop(digest_key, None)), digest)
+
+
+def _produce_file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(functools.partial(file.read, 1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_folder_size(folder_path: str) -> int:
+    return sum(file_path.stat().st_size for file_path in Path(folder_path).rglob("*") if file_path.is_file())
@@ -0,0 +1,88 @@
+"""Runs the pipeline stages as a dependency graph, independent stages run concurrently."""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from onto_merger.logger.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class StageScheduler:
+    """Run stages in dependency order on a thread pool.
+
+    Stages are started in the order they were added as soon as all of their dependencies have
+    finished. If a stage fails, no further stages are started, the running stages are waited for,
+    and the error is raised.
+    """
+
+    def __init__(self, worker_count: int = 1):
+        """Initialise the StageScheduler class.
+
+        :param worker_count: The number of stages run concurrently, 1 runs the stages one after
+        another in the order they were added.
+        """
+        self._worker_count = worker_count
+        self._stages: Dict[str, Callable[[], object]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+
+    def add_stage(self, stage_name: str, stage: Callable[[], object], dependencies: Optional[List[str]] = None) -> None:
+        """Add a stage to the graph, its dependencies must be added before the stage.
+
+        :param stage_name: The name of the stage.
+        :param stage: The stage method.
+        :param dependencies: The names of the stages that must finish before the stage starts.
+        :return:
+        """
+        if stage_name in self._stages:
+            raise ValueError(f"The stage '{stage_name}' is already added.")
+        unknown_dependencies = [dependency for dependency in dependencies or [] if dependency not in self._stages]
+        if unknown_dependencies:
+            raise ValueError(
+                f"The dependencies {unknown_dependencies} of stage '{stage_name}' must be added before the stage."
+            )
+        self._stages[stage_name] = stage
+        self._dependencies[stage_name] = list(dependencies or [])
+
+    def run(self) -> None:
+        """Run all stages.
+
+        :return:
+        """
+        if self._worker_count <= 1:
+            for stage in self._stages.values():
+                stage()
+            return
+        finished_stages: List[str] = []
+        running_stages: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self._worker_count, thread_name_prefix="stage") as executor:
+            while len(finished_stages) < len(self._stages):
+                for stage_name in self._get_ready_stages(
+                    finished_stages=finished_stages, running_stages=list(running_stages.values())
+                ):
+                    logger.info(f"Starting stage '{stage_name}'")
+                    running_stages[executor.submit(self._stages[stage_name])] = stage_name
+                done, _ = wait(running_stages, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage_name = running_stages.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        logger.error(f"Stage '{stage_name}' failed, waiting for the running stages to finish.")
+                        wait(running_stages)
+                        raise error
+                    finished_stages.append(stage_name)
+
+    def _get_ready_stages(self, finished_stages: List[str], running_stages: List[str]) -> List[str]:
+        """Return the stages that are not started yet, and all of their dependencies have finished.
+
+        :param finished_stages: The names of the finished stages.
+        :param running_stages: The names of the running stages.
+        :return: The names of the stages that can be started.
+        """
+        return [
+            stage_name
+            for stage_name, dependencies in self._dependencies.items()
+            if stage_name not in finished_stages
+            and stage_name not in running_stages
+            and all(dependency in finished_stages for dependency in dependencies)
+        ]
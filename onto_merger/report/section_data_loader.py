@@ -3,12 +3,13 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Sequence
 
 import pandas as pd
 
 from onto_merger.analyser.constants import TABLE_SECTION_SUMMARY, TABLE_STATS
 from onto_merger.data.constants import (
+    DIRECTORY_ANALYSIS,
     DIRECTORY_INPUT,
     DIRECTORY_INTERMEDIATE,
     DIRECTORY_OUTPUT,
@@ -65,16 +66,33 @@ def load_report_data(data_manager: DataManager) -> dict:
 
 
 # SECTIONS #
-def _produce_section(title: str, section_name: str, subsections: List[dict], data_manager: DataManager) -> dict:
+def _produce_section(
+        title: str, section_name: str, subsections: Sequence[Optional[dict]], data_manager: DataManager
+) -> dict:
     return {
         TITLE: title,
         LINK_TITLE: section_name,
         LOGO: _get_section_icon_file_name(section_name=section_name),
         SUBSECTIONS:
-            [_produce_section_summary_subsection(section_name=section_name, data_manager=data_manager)] + subsections
+            [_produce_section_summary_subsection(section_name=section_name, data_manager=data_manager)]
+            + [subsection for subsection in subsections if subsection is not None]
     }
 
 
+def _is_section_analysed(section_name: str, data_manager: DataManager) -> bool:
+    """Check whether the section analysis was produced (it is skipped if its inputs are missing).
+
+    :param section_name: The report section name.
+    :param data_manager: The data manager used for loading analysis files.
+    :return: True if the section summary table exists, otherwise False.
+    """
+    return _has_analysis_table(section_name=section_name, table_name=TABLE_SECTION_SUMMARY, data_manager=data_manager)
+
+
+def _has_analysis_table(section_name: str, table_name: str, data_manager: DataManager) -> bool:
+    return os.path.isfile(data_manager.get_analysis_table_path(file_name=f"{section_name}_{table_name}"))
+
+
 def _load_overview_section_data(data_manager: DataManager) -> dict:
     section_name = SECTION_OVERVIEW
     return _produce_section(
@@ -82,6 +100,7 @@ def _load_overview_section_data(data_manager: DataManager) -> dict:
         section_name=section_name,
         subsections=[
             _produce_runtime_info_subsection(section_name=section_name, data_manager=data_manager),
+            _produce_resource_usage_subsection(section_name=section_name, data_manager=data_manager),
             _produce_overview_nodes_subsection(section_name=section_name, data_manager=data_manager),
             _produce_overview_edges_subsection(section_name=section_name, data_manager=data_manager),
             _produce_overview_config_subsection(data_manager=data_manager),
@@ -153,8 +172,10 @@ def _load_output_section_data(data_manager: DataManager) -> dict:
     )
 
 
-def _load_data_profiling_section_data(data_manager: DataManager) -> dict:
+def _load_data_profiling_section_data(data_manager: DataManager) -> Optional[dict]:
     section_name = SECTION_DATA_PROFILING
+    if not _is_section_analysed(section_name=section_name, data_manager=data_manager):
+        return None
     return _produce_section(
         title="Data Profiling",
         section_name=section_name,
@@ -166,8 +187,10 @@ def _load_data_profiling_section_data(data_manager: DataManager) -> dict:
     )
 
 
-def _load_data_testing_section_data(data_manager: DataManager) -> dict:
+def _load_data_testing_section_data(data_manager: DataManager) -> Optional[dict]:
     section_name = SECTION_DATA_TESTS
+    if not _is_section_analysed(section_name=section_name, data_manager=data_manager):
+        return None
     return _produce_section(
         title="Data Tests",
         section_name=section_name,
@@ -220,6 +243,20 @@ def _produce_runtime_info_subsection(section_name: str, data_manager: DataManage
     return section_data
 
 
+def _produce_resource_usage_subsection(section_name: str, data_manager: DataManager) -> dict:
+    return {
+        TITLE: "Resource usage",
+        LINK_TITLE: "resource_usage",
+        DATASET: {
+            "resource_usage_table": data_manager.load_analysis_report_table_as_dict(
+                section_name=section_name,
+                table_name="pipeline_steps_report_resource_usage",
+            ),
+        },
+        TEMPLATE: "subsection_content/subsection-resource-usage.html"
+    }
+
+
 # SUBSECTIONS #
 def _produce_nodes_subsection(section_name: str, data_manager: DataManager, is_obsolete: bool) -> dict:
     table_name = "nodes_general_analysis" if is_obsolete is False else "nodes_obsolete_general_analysis"
@@ -320,7 +357,11 @@ def _produce_overview_config_subsection(data_manager: DataManager) -> dict:
     }
 
 
-def _produce_overview_validation_subsection(section_name: str, data_manager: DataManager) -> dict:
+def _produce_overview_validation_subsection(section_name: str, data_manager: DataManager) -> Optional[dict]:
+    if not _has_analysis_table(
+            section_name=section_name, table_name="data_profiling_and_tests_summary", data_manager=data_manager
+    ):
+        return None
     return {
         TITLE: "Profiling & Validation",
         LINK_TITLE: "profiling_and_validation",
@@ -573,11 +614,12 @@ def _produce_connectivity_node_subsection(section_name: str, data_manager: DataM
 
 
 def _produce_connectivity_edge_subsection(section_name: str, data_manager: DataManager) -> dict:
+    file_extension = f".{data_manager.get_storage_format(process_directory=DIRECTORY_ANALYSIS)}"
     available_path_overview_table_names = ["ALL"] + [
-        path.name.split("_")[-1].replace(".csv", "")
+        path.name.split("_")[-1].replace(file_extension, "")
         for path in Path(data_manager.get_analysis_folder_path())
-            .rglob('*connectivity_hierarchy_edges_paths_path_lengths_description_*.csv')
-        if "ALL.csv" not in path.name
+            .rglob(f'*connectivity_hierarchy_edges_paths_path_lengths_description_*{file_extension}')
+        if f"ALL{file_extension}" not in path.name
     ]
     available_path_overview_tables = [
         {
@@ -10,7 +10,6 @@ install_requires = [
     "pandas==1.3.5",
     "pandas-profiling==3.1.0",
     "dataclasses-json==0.5.7",
-    "great_expectations==0.15.2",
     "jinja2==3.0.3",
     "jsonschema==4.18.0",
     "networkx",
@@ -29,8 +28,13 @@ setup_requires = ["pytest-runner"]
 
 tests_require = ["pytest", "pytest-cov"]
 
+# the optional dependencies (as in requirements.txt) are required to run the whole test suite
 extras_require = {
-    "tests": tests_require,
+    "tests": tests_require + ["great_expectations==0.15.2", "pyarrow", "polars>=0.20.4", "duckdb>=0.10.0"],
+    "parquet": ["pyarrow"],
+    "polars": ["polars>=0.20.4", "pyarrow"],
+    "duckdb": ["duckdb>=0.10.0"],
+    "great_expectations": ["great_expectations==0.15.2"],
     "docs": [
         "sphinx",
         "sphinx-rtd-theme",
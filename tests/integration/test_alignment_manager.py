@@ -1,7 +1,8 @@
 """Tests for the AlignmentManager."""
 import os
-from typing import List
+from typing import Dict, List
 
+import pandas as pd
 import pytest
 
 from onto_merger.alignment.alignment_manager import AlignmentManager
@@ -12,11 +13,21 @@ from onto_merger.data.constants import (
     DIRECTORY_DROPPED_MAPPINGS,
     DIRECTORY_INTERMEDIATE,
     DIRECTORY_REPORT,
+    SCHEMA_ALIGNMENT_STEPS_TABLE,
     TABLE_ALIGNMENT_STEPS_REPORT,
+    TABLE_ENGINE_DUCKDB,
+    TABLE_MAPPINGS_FOR_INPUT_NODES,
+    TABLE_MAPPINGS_OBSOLETE_TO_CURRENT,
+    TABLE_MAPPINGS_UPDATED,
     TABLE_MERGES_WITH_META_DATA,
 )
 from onto_merger.data.data_manager import DataManager
-from onto_merger.data.dataclasses import AlignmentConfig, DataRepository, NamedTable
+from onto_merger.data.dataclasses import (
+    AlignmentConfig,
+    DataRepository,
+    NamedTable,
+    NodeIdDictionary,
+)
 from tests.fixtures import (
     TEST_FOLDER_OUTPUT_PATH,
     alignment_config,
@@ -57,3 +68,54 @@ def test_align_nodes(
         assert len(actual.dataframe) > 0
     assert source_alignment_order == source_alignment_priority_order
     assert isinstance(output_data_repo, DataRepository)
+
+
+def test_align_nodes_out_of_core(
+    alignment_config: AlignmentConfig,
+    data_repo: DataRepository,
+    data_manager: DataManager,
+):
+    pytest.importorskip("duckdb")
+    dropped_mappings_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE, DIRECTORY_DROPPED_MAPPINGS)
+    expected_data_repo, expected_source_alignment_order = AlignmentManager(
+        alignment_config=alignment_config,
+        data_repo=data_repo,
+        data_manager=data_manager,
+    ).align_nodes()
+    expected_dropped_mappings = _load_dropped_mapping_tables(folder_path=dropped_mappings_path)
+
+    alignment_config.base_config.table_engine = TABLE_ENGINE_DUCKDB
+    actual_data_repo, actual_source_alignment_order = AlignmentManager(
+        alignment_config=alignment_config,
+        data_repo=data_repo,
+        data_manager=data_manager,
+    ).align_nodes()
+
+    assert actual_source_alignment_order == expected_source_alignment_order
+    for table_name in [
+        TABLE_MERGES_WITH_META_DATA,
+        TABLE_MAPPINGS_UPDATED,
+        TABLE_MAPPINGS_FOR_INPUT_NODES,
+        TABLE_MAPPINGS_OBSOLETE_TO_CURRENT,
+    ]:
+        pd.testing.assert_frame_equal(
+            NodeIdDictionary.decode_table(actual_data_repo.get(table_name).dataframe).reset_index(drop=True),
+            NodeIdDictionary.decode_table(expected_data_repo.get(table_name).dataframe).reset_index(drop=True),
+            check_dtype=False,
+        )
+    # the step meta data without the run times
+    step_count_columns = SCHEMA_ALIGNMENT_STEPS_TABLE[:SCHEMA_ALIGNMENT_STEPS_TABLE.index("task")]
+    pd.testing.assert_frame_equal(
+        actual_data_repo.get(TABLE_ALIGNMENT_STEPS_REPORT).dataframe[step_count_columns],
+        expected_data_repo.get(TABLE_ALIGNMENT_STEPS_REPORT).dataframe[step_count_columns],
+    )
+    actual_dropped_mappings = _load_dropped_mapping_tables(folder_path=dropped_mappings_path)
+    assert actual_dropped_mappings.keys() == expected_dropped_mappings.keys()
+    for file_name, expected in expected_dropped_mappings.items():
+        pd.testing.assert_frame_equal(actual_dropped_mappings[file_name], expected)
+    # the database is only kept while the alignment runs
+    assert not os.path.exists(data_manager.get_alignment_database_path())
+
+
+def _load_dropped_mapping_tables(folder_path: str) -> Dict[str, pd.DataFrame]:
+    return {file_name: pd.read_csv(os.path.join(folder_path, file_name)) for file_name in os.listdir(folder_path)}
@@ -9,14 +9,30 @@ import pytest
 
 from onto_merger.data.constants import (
     DIRECTORY_DOMAIN_ONTOLOGY,
+    DIRECTORY_INPUT,
     DIRECTORY_INTERMEDIATE,
     DIRECTORY_OUTPUT,
     DIRECTORY_REPORT,
+    SKIP_PROFILING,
+    SKIP_VALIDATION,
+    SKIPPABLE_STEPS,
+    STAGE_ALIGNMENT_POST_PROCESSING,
+    STAGE_CONNECTIVITY,
+    TABLE_EDGES_HIERARCHY_POST,
+    TABLE_MERGES_WITH_META_DATA,
 )
 from onto_merger.pipeline.pipeline import Pipeline
 from tests.fixtures import TEST_FOLDER_OUTPUT_PATH, TEST_FOLDER_PATH
 
 
+@pytest.fixture()
+def clean_output_folder():
+    assert os.path.exists(TEST_FOLDER_OUTPUT_PATH) is False
+    yield
+    # the output is removed even if the test fails, so it does not break the next pipeline test
+    shutil.rmtree(TEST_FOLDER_OUTPUT_PATH, ignore_errors=True)
+
+
 def perform_evaluation_for_pipeline_run():
     assert os.path.exists(TEST_FOLDER_OUTPUT_PATH) is True
 
@@ -53,14 +69,14 @@ def perform_evaluation_for_pipeline_run():
         "nodes_unmapped.csv",
         "nodes_merged.csv",
         "pipeline_steps_report.csv",
+        "pipeline_stage_tables.json",
     }
     actual_outputs_intermediate = set(os.listdir(os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE)))
     assert len(actual_outputs_intermediate) > 0
     assert actual_outputs_intermediate == expected_outputs_intermediate
 
-    # report
+    # report (the test configuration uses the native validation engine, so there are no data docs)
     expected_outputs_report = {
-        "data_docs",
         "data_profile_reports",
         "images",
         "logs",
@@ -71,17 +87,89 @@ def perform_evaluation_for_pipeline_run():
     assert actual_outputs_report == expected_outputs_report
     check_report_data()
 
-    shutil.rmtree(TEST_FOLDER_OUTPUT_PATH)
-
-
-def test_run_alignment_and_connection_process():
-    assert os.path.exists(TEST_FOLDER_OUTPUT_PATH) is False
 
+def test_run_alignment_and_connection_process(clean_output_folder):
     Pipeline(project_folder_path=TEST_FOLDER_PATH).run_alignment_and_connection_process()
 
     perform_evaluation_for_pipeline_run()
 
 
+def test_run_alignment_and_connection_process_concurrent_stages(clean_output_folder):
+    pipeline = Pipeline(project_folder_path=TEST_FOLDER_PATH, skipped_steps=[SKIP_PROFILING])
+    pipeline._alignment_config.base_config.stage_worker_count = 2
+    pipeline.run_alignment_and_connection_process()
+
+    # the input validation runs alongside the alignment, the intermediate and output validations one after the other
+    validations_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE, "data_tests", "uncommitted")
+    validated_data_origins = {
+        data_origin
+        for _, _, file_names in os.walk(validations_path)
+        for file_name in file_names
+        for data_origin in (DIRECTORY_INPUT, DIRECTORY_INTERMEDIATE, DIRECTORY_DOMAIN_ONTOLOGY)
+        if file_name.startswith(f"{data_origin}_")
+    }
+    assert validated_data_origins == {DIRECTORY_INPUT, DIRECTORY_INTERMEDIATE, DIRECTORY_DOMAIN_ONTOLOGY}
+    report_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_REPORT, "index.html")
+    with open(report_path) as report_file:
+        assert 'id="myTabContent_data_tests"' in report_file.read()
+
+
+def test_run_alignment_and_connection_process_skipped_steps(clean_output_folder):
+    Pipeline(
+        project_folder_path=TEST_FOLDER_PATH, skipped_steps=SKIPPABLE_STEPS
+    ).run_alignment_and_connection_process()
+
+    actual_outputs_domain = set(os.listdir(os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_DOMAIN_ONTOLOGY)))
+    assert actual_outputs_domain == {"merges.csv", "mappings.csv", "edges_hierarchy.csv", "nodes.csv"}
+    actual_outputs_intermediate = set(os.listdir(os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE)))
+    assert "pipeline_steps_report.csv" in actual_outputs_intermediate
+    assert os.path.exists(os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_REPORT, "index.html")) is False
+    profile_reports_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_REPORT, "data_profile_reports")
+    assert [file_name for file_name in os.listdir(profile_reports_path) if file_name.endswith("_report.html")] == []
+
+
+def test_run_alignment_and_connection_process_skipped_validation_with_report(clean_output_folder):
+    Pipeline(
+        project_folder_path=TEST_FOLDER_PATH, skipped_steps=[SKIP_PROFILING, SKIP_VALIDATION]
+    ).run_alignment_and_connection_process()
+
+    report_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_REPORT, "index.html")
+    assert os.path.getsize(report_path) > 100
+    with open(report_path) as report_file:
+        report = report_file.read()
+    assert 'id="myTabContent_data_profiling"' not in report
+    assert 'id="myTabContent_data_tests"' not in report
+
+
+def test_run_alignment_and_connection_process_resumed(clean_output_folder):
+    # the earlier stages have not been run
+    with pytest.raises(ValueError):
+        Pipeline(
+            project_folder_path=TEST_FOLDER_PATH, from_stage=STAGE_CONNECTIVITY, skipped_steps=SKIPPABLE_STEPS
+        ).run_alignment_and_connection_process()
+
+    Pipeline(
+        project_folder_path=TEST_FOLDER_PATH, to_stage=STAGE_CONNECTIVITY, skipped_steps=SKIPPABLE_STEPS
+    ).run_alignment_and_connection_process()
+    pipeline = Pipeline(
+        project_folder_path=TEST_FOLDER_PATH,
+        from_stage=STAGE_ALIGNMENT_POST_PROCESSING,
+        to_stage=STAGE_ALIGNMENT_POST_PROCESSING,
+        skipped_steps=SKIPPABLE_STEPS,
+    )
+    pipeline.run_alignment_and_connection_process()
+
+    # the tables saved by the connectivity stage of the previous run are not loaded
+    assert TABLE_MERGES_WITH_META_DATA in pipeline._loaded_table_names
+    assert TABLE_EDGES_HIERARCHY_POST not in pipeline._loaded_table_names
+
+
+def test_pipeline_unknown_skipped_step():
+    with pytest.raises(ValueError):
+        Pipeline(project_folder_path=TEST_FOLDER_PATH, skipped_steps=["skip_alignment"])
+    shutil.rmtree(TEST_FOLDER_OUTPUT_PATH, ignore_errors=True)
+
+
 def test_run_alignment_and_connection_process_invalid():
     test_folder_invalid = os.path.abspath("../test_data_invalid")
     test_folder_invalid_output = os.path.abspath(f"../test_data_invalid/{DIRECTORY_OUTPUT}")
@@ -4,7 +4,12 @@ import pytest
 from pandas import DataFrame
 
 from onto_merger.alignment import hierarchy_utils
-from onto_merger.data.constants import COLUMN_DEFAULT_ID, SCHEMA_HIERARCHY_EDGE_TABLE
+from onto_merger.alignment.networkit_utils import NetworkitGraph
+from onto_merger.data.constants import (
+    COLUMN_DEFAULT_ID,
+    SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
+    SCHEMA_HIERARCHY_EDGE_TABLE,
+)
 from onto_merger.data.dataclasses import NamedTable
 
 
@@ -52,3 +57,61 @@ def test_produce_table_nodes_dangling():
     assert isinstance(actual, NamedTable)
     assert isinstance(actual.dataframe, DataFrame)
     assert np.array_equal(actual.dataframe.values, expected.values) is True
+
+
+def test_connectivity_index():
+    hierarchy_graph = NetworkitGraph(
+        edges=pd.DataFrame(
+            [("FOO:001", "FOO:002"), ("FOO:002", "FOO:003"), ("FOO:004", "FOO:003")],
+            columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
+        )
+    )
+    connectivity_index = hierarchy_utils.ConnectivityIndex(
+        hierarchy_graph=hierarchy_graph,
+        unmapped_node_ids=["FOO:004", "BAR:001", "FOO:001"],
+        terminus_map=hierarchy_utils.TerminusMap(
+            merges=pd.DataFrame(
+                [("FOO:003", "MONDO:001"), ("BAR:002", "MONDO:002")], columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS
+            )
+        ),
+    )
+    node_index_map = hierarchy_graph.node_id_to_index_map
+    assert connectivity_index.node_ids[connectivity_index.reachable_unmapped_node_indices].tolist() == [
+        "FOO:004", "FOO:001"
+    ]
+    assert connectivity_index.is_unmapped.tolist() == [
+        node_id in {"FOO:001", "FOO:004"} for node_id in node_index_map
+    ]
+    assert connectivity_index.is_merged.tolist() == [node_id == "FOO:003" for node_id in node_index_map]
+    assert connectivity_index.terminus_node_ids[node_index_map["FOO:003"]] == "MONDO:001"
+
+    connectivity_index.mark_connected(node_indices=[node_index_map["FOO:001"]])
+    assert connectivity_index.is_terminus.tolist() == [
+        node_id in {"FOO:001", "FOO:003"} for node_id in node_index_map
+    ]
+    assert connectivity_index.terminus_node_ids[node_index_map["FOO:001"]] == "FOO:001"
+    assert not connectivity_index.is_merged[node_index_map["FOO:001"]]
+    assert connectivity_index.get_connected_node_ids() == ["FOO:001"]
+
+
+def test_terminus_map():
+    terminus_map = hierarchy_utils.TerminusMap(
+        merges=pd.DataFrame(
+            [("FOO:001", "MONDO:001"), ("BAR:001", "MONDO:001"), ("FOO:002", "MONDO:002")],
+            columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
+        )
+    )
+    node_ids = np.array(["FOO:002", "FOO:003", "BAR:001", "MONDO:001", "FOO:004"], dtype=object)
+    assert terminus_map.get_terminus_node_ids(node_ids=node_ids).tolist() == [
+        "MONDO:002", None, "MONDO:001", None, None
+    ]
+    terminus_map.add_layer(node_ids=["FOO:003"])
+    terminus_map.add_layer(node_ids=[])
+    terminus_map.add_layer(node_ids=["FOO:004", "FOO:002"])
+    assert terminus_map.get_terminus_node_ids(node_ids=node_ids).tolist() == [
+        "FOO:002", "FOO:003", "MONDO:001", None, "FOO:004"
+    ]
+    empty_terminus_map = hierarchy_utils.TerminusMap(
+        merges=pd.DataFrame([], columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS)
+    )
+    assert empty_terminus_map.get_terminus_node_ids(node_ids=node_ids).tolist() == [None] * len(node_ids)
@@ -11,6 +11,7 @@ from onto_merger.data.constants import (
     COLUMN_TARGET_ID,
     SCHEMA_MAPPING_TABLE,
 )
+from onto_merger.data.dataclasses import NodeIdDictionary
 
 
 def test_get_mappings_internal_node_reassignment():
@@ -55,6 +56,105 @@ def test_get_mappings_obsolete_to_current_node_id():
     assert np.array_equal(actual.values, expected.values) is True
 
 
+def test_get_mappings_obsolete_to_current_node_id_with_obsolete_target():
+    input_nodes_obsolete = pd.DataFrame(
+        ["MONDO:0000001", "MONDO:0000002"], columns=[COLUMN_DEFAULT_ID])
+    input_mappings = pd.DataFrame(
+        [
+            ("MONDO:0000001", "MONDO:0000002", "equivalent_to", "MONDO"),
+            ("MONDO:0000003", "MONDO:0000004", "equivalent_to", "MONDO"),
+            ("FOO:0000001", "MONDO:0000001", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    actual = mapping_utils.get_mappings_obsolete_to_current_node_id(
+        nodes_obsolete=input_nodes_obsolete,
+        mappings=input_mappings
+    )
+    expected = pd.DataFrame(
+        [("MONDO:0000001", "MONDO:0000002", "equivalent_to", "MONDO")],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    assert np.array_equal(actual.values, expected.values) is True
+
+
+def test_resolve_obsolete_to_current_node_id_chains():
+    input_mappings = pd.DataFrame(
+        [
+            # chain: 1 -> 2 -> 3 -> 4
+            ("MONDO:0000001", "MONDO:0000002", "equivalent_to", "MONDO"),
+            ("MONDO:0000002", "MONDO:0000003", "equivalent_to", "MONDO"),
+            ("MONDO:0000003", "MONDO:0000004", "equivalent_to", "MONDO"),
+            # ambiguous: 6 has two current node IDs, so 5 is not resolved further
+            ("MONDO:0000005", "MONDO:0000006", "equivalent_to", "MONDO"),
+            ("MONDO:0000006", "MONDO:0000007", "equivalent_to", "MONDO"),
+            ("MONDO:0000006", "MONDO:0000008", "equivalent_to", "MONDO"),
+            # cycle: 9 -> 10 -> 11 -> 9, and 12 leads into it
+            ("MONDO:0000009", "MONDO:0000010", "equivalent_to", "MONDO"),
+            ("MONDO:0000010", "MONDO:0000011", "equivalent_to", "MONDO"),
+            ("MONDO:0000011", "MONDO:0000009", "equivalent_to", "MONDO"),
+            ("MONDO:0000012", "MONDO:0000009", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    expected_target_ids = [
+        "MONDO:0000004",
+        "MONDO:0000004",
+        "MONDO:0000004",
+        "MONDO:0000006",
+        "MONDO:0000007",
+        "MONDO:0000008",
+        "MONDO:0000010",
+        "MONDO:0000011",
+        "MONDO:0000009",
+        "MONDO:0000009",
+    ]
+    for encoded in [False, True]:
+        mappings = input_mappings
+        if encoded:
+            mappings = NodeIdDictionary(
+                node_ids=np.concatenate([input_mappings[COLUMN_SOURCE_ID], input_mappings[COLUMN_TARGET_ID]])
+            ).encode_table(table=input_mappings)
+        actual = mapping_utils.resolve_obsolete_to_current_node_id_chains(mappings_obsolete_to_current_node_id=mappings)
+        assert list(actual[COLUMN_SOURCE_ID].astype(str)) == list(input_mappings[COLUMN_SOURCE_ID])
+        assert list(actual[COLUMN_TARGET_ID].astype(str)) == expected_target_ids
+        assert actual[COLUMN_TARGET_ID].dtype == mappings[COLUMN_TARGET_ID].dtype
+
+
+def test_resolve_obsolete_to_current_node_id_chains_from_mappings():
+    input_nodes_obsolete = pd.DataFrame(
+        ["MONDO:0000001", "MONDO:0000002"], columns=[COLUMN_DEFAULT_ID])
+    input_mappings = pd.DataFrame(
+        [
+            # chain: 1 -> 2 -> 3, where 3 is the current node ID
+            ("MONDO:0000001", "MONDO:0000002", "equivalent_to", "MONDO"),
+            ("MONDO:0000003", "MONDO:0000002", "equivalent_to", "MONDO"),
+            ("FOO:0000001", "MONDO:0000001", "equivalent_to", "MONDO"),
+            ("MONDO:0000002", "BAR:0000001", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    mappings_obsolete_to_current_node_id = mapping_utils.resolve_obsolete_to_current_node_id_chains(
+        mappings_obsolete_to_current_node_id=mapping_utils.get_mappings_obsolete_to_current_node_id(
+            nodes_obsolete=input_nodes_obsolete,
+            mappings=input_mappings
+        )
+    )
+    actual = mapping_utils.get_mappings_with_updated_node_ids(
+        mappings=input_mappings,
+        mappings_obsolete_to_current_node_id=mappings_obsolete_to_current_node_id,
+    )
+    expected = pd.DataFrame(
+        [
+            ("FOO:0000001", "MONDO:0000003", "equivalent_to", "MONDO"),
+            ("MONDO:0000003", "BAR:0000001", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    assert list(mappings_obsolete_to_current_node_id[COLUMN_TARGET_ID]) == ["MONDO:0000003", "MONDO:0000003"]
+    assert np.array_equal(actual[SCHEMA_MAPPING_TABLE].values, expected.values) is True
+
+
 def test_get_mappings_for_namespace():
     # input
     input_mappings = pd.DataFrame(
@@ -79,7 +179,7 @@ def test_get_mappings_for_namespace():
     assert np.array_equal(actual.values, expected.values) is True
 
 
-def test_get_one_or_many_source_to_one_target_mappings():
+def test_get_mappings_partitioned_by_source_multiplicity_one_to_many():
     input_mappings = pd.DataFrame(
         [
             ("FOO:001", "BAR:001", "equivalent_to", "MONDO"),
@@ -88,31 +188,54 @@ def test_get_one_or_many_source_to_one_target_mappings():
         ],
         columns=SCHEMA_MAPPING_TABLE,
     )
-    actual = mapping_utils.get_one_or_many_source_to_one_target_mappings(mappings=input_mappings)
-    expected = pd.DataFrame([("FOO:002", "BAR:003", "equivalent_to", "MONDO")], columns=SCHEMA_MAPPING_TABLE)
-    assert isinstance(actual, DataFrame)
-    assert np.array_equal(actual.values, expected.values) is True
+    actual_stable, actual_unstable = mapping_utils.get_mappings_partitioned_by_source_multiplicity(
+        mappings=input_mappings
+    )
+    expected_stable = pd.DataFrame([("FOO:002", "BAR:003", "equivalent_to", "MONDO")], columns=SCHEMA_MAPPING_TABLE)
+    expected_unstable = pd.DataFrame(
+        [
+            ("FOO:001", "BAR:001", "equivalent_to", "MONDO"),
+            ("FOO:001", "BAR:002", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    assert isinstance(actual_stable, DataFrame)
+    assert isinstance(actual_unstable, DataFrame)
+    assert np.array_equal(actual_stable.values, expected_stable.values) is True
+    assert np.array_equal(actual_unstable.values, expected_unstable.values) is True
 
 
-def test_get_one_source_to_many_target_mappings():
+def test_get_mappings_partitioned_by_source_multiplicity():
     input_mappings = pd.DataFrame(
         [
+            ("FOO:002", "BAR:002", "equivalent_to", "MONDO"),
             ("FOO:001", "BAR:001", "equivalent_to", "MONDO"),
-            ("FOO:001", "BAR:002", "equivalent_to", "MONDO"),
             ("FOO:002", "BAR:003", "equivalent_to", "MONDO"),
+            ("FOO:003", "BAR:004", "equivalent_to", "MONDO"),
+            ("FOO:003", "BAR:004", "equivalent_to", "ORPHANET"),
         ],
         columns=SCHEMA_MAPPING_TABLE,
     )
-    actual = mapping_utils.get_one_source_to_many_target_mappings(mappings=input_mappings)
-    expected = pd.DataFrame(
+    actual_stable, actual_unstable = mapping_utils.get_mappings_partitioned_by_source_multiplicity(
+        mappings=input_mappings
+    )
+    expected_stable = pd.DataFrame(
         [
             ("FOO:001", "BAR:001", "equivalent_to", "MONDO"),
-            ("FOO:001", "BAR:002", "equivalent_to", "MONDO"),
+            ("FOO:003", "BAR:004", "equivalent_to", "MONDO"),
+            ("FOO:003", "BAR:004", "equivalent_to", "ORPHANET"),
         ],
         columns=SCHEMA_MAPPING_TABLE,
     )
-    assert isinstance(actual, DataFrame)
-    assert np.array_equal(actual.values, expected.values) is True
+    expected_unstable = pd.DataFrame(
+        [
+            ("FOO:002", "BAR:002", "equivalent_to", "MONDO"),
+            ("FOO:002", "BAR:003", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    assert np.array_equal(actual_stable.values, expected_stable.values) is True
+    assert np.array_equal(actual_unstable.values, expected_unstable.values) is True
 
 
 def test_get_mappings_with_mapping_relations():
@@ -167,6 +290,25 @@ def test_orient_mappings_to_namespace():
     assert isinstance(actual, DataFrame)
     assert np.array_equal(actual.values, expected.values) is True
 
+    # encoded node IDs stay encoded
+    node_id_dictionary = NodeIdDictionary(
+        node_ids=np.concatenate([input_mappings[COLUMN_SOURCE_ID], input_mappings[COLUMN_TARGET_ID]])
+    )
+    actual = mapping_utils.orient_mappings_to_namespace(
+        required_target_id_namespace="FOO", mappings=node_id_dictionary.encode_table(table=input_mappings)
+    )
+    assert node_id_dictionary.is_encoded(node_ids=actual[COLUMN_SOURCE_ID])
+    assert node_id_dictionary.is_encoded(node_ids=actual[COLUMN_TARGET_ID])
+    assert np.array_equal(NodeIdDictionary.decode_table(table=actual).values, expected.values) is True
+
+    # the namespaces are looked up by node ID code
+    actual = mapping_utils.orient_mappings_to_namespace(
+        required_target_id_namespace="FOO",
+        mappings=node_id_dictionary.encode_table(table=input_mappings),
+        node_id_dictionary=node_id_dictionary,
+    )
+    assert np.array_equal(NodeIdDictionary.decode_table(table=actual).values, expected.values) is True
+
 
 def test_add_comparison_column_for_reoriented_mappings():
     # input
@@ -253,6 +395,79 @@ def test_filter_mappings_for_node_set():
     assert np.array_equal(actual.values, expected.values) is True
 
 
+def test_produce_mapping_partitions():
+    input_mappings = pd.DataFrame(
+        [
+            ("SNOMED:001", "MONDO:0000123", "eqv", "TEST"),
+            ("MONDO:0000123", "SNOMED:002", "eqv", "TEST"),
+            ("SNOMED:001", "MONDO:0000123", "xref", "TEST"),
+            ("SNOMED:003", "FOOBAR:1234", "eqv", "TEST"),
+            ("MONDO:0000234", "FOOBAR:1234", "xref", "TEST"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    namespaces = ["MONDO", "FOOBAR", "UMLS"]
+    mapping_type_groups = {"equivalence": ["eqv"], "database_reference": ["xref", "foo"]}
+    node_id_dictionary = NodeIdDictionary(node_ids=pd.concat(
+        [input_mappings[COLUMN_SOURCE_ID], input_mappings[COLUMN_TARGET_ID]]
+    ))
+    for mappings, dictionary in [
+        (input_mappings, None),
+        (node_id_dictionary.encode_table(table=input_mappings), node_id_dictionary),
+    ]:
+        actual = mapping_utils.produce_mapping_partitions(
+            mappings=mappings,
+            namespaces=namespaces,
+            mapping_type_groups=mapping_type_groups,
+            node_id_dictionary=dictionary,
+        )
+        assert set(actual.keys()) == {(namespace, name) for namespace in namespaces for name in mapping_type_groups}
+        # each partition is the mapping selection of the corresponding alignment step
+        for (namespace, name), partition in actual.items():
+            expected = mapping_utils.deduplicate_mappings_for_type_group(
+                mapping_type_group_name=name,
+                mappings=mapping_utils.orient_mappings_to_namespace(
+                    required_target_id_namespace=namespace,
+                    mappings=mapping_utils.get_mappings_with_mapping_relations(
+                        permitted_mapping_relations=mapping_type_groups[name],
+                        mappings=mapping_utils.get_mappings_for_namespace(namespace=namespace, edges=mappings),
+                    ),
+                ),
+            )
+            pd.testing.assert_frame_equal(
+                NodeIdDictionary.decode_table(partition).reset_index(drop=True),
+                NodeIdDictionary.decode_table(expected).reset_index(drop=True),
+            )
+        assert list(NodeIdDictionary.decode_table(actual[("MONDO", "equivalence")]).itertuples(index=False)) == [
+            ("SNOMED:001", "MONDO:0000123", "equivalence", "TEST"),
+            ("SNOMED:002", "MONDO:0000123", "equivalence", "TEST"),
+        ]
+        assert len(actual[("UMLS", "database_reference")]) == 0
+
+
+def test_filter_mappings_for_node_mask():
+    input_mappings = pd.DataFrame(
+        [
+            ("SNOMED:001", "MONDO:0000123", "foo", "TEST"),
+            ("SNOMED:002", "MONDO:0000234", "foo", "TEST"),
+            ("FOOBAR:1234", "MONDO:0000234", "foo", "TEST"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    node_id_dictionary = NodeIdDictionary(node_ids=["SNOMED:001", "SNOMED:002", "MONDO:0000123", "MONDO:0000234"])
+    node_mask = np.zeros(len(node_id_dictionary), dtype=bool)
+    node_mask[node_id_dictionary.get_codes(node_ids=pd.Series(["SNOMED:001"]))] = True
+    expected = pd.DataFrame(
+        [("SNOMED:001", "MONDO:0000123", "foo", "TEST")],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    actual = mapping_utils.filter_mappings_for_node_mask(
+        node_mask=node_mask, node_id_dictionary=node_id_dictionary, mappings=input_mappings
+    )
+    assert isinstance(actual, DataFrame)
+    assert np.array_equal(actual.values, expected.values) is True
+
+
 def test_deduplicate_mappings_for_type_group():
     input_mappings = pd.DataFrame(
         [
@@ -43,24 +43,28 @@ def test_aggregate_merges(example_merges):
     assert np.array_equal(actual.values, expected.values) is True
 
 
-def test_get_canonical_node_for_merge_cluster():
-    # canonical exits
-    canonical_node = "C:1"
-    input_cluster = ["A:1", "B:1", canonical_node]
-    input_alignment_priority_order = ["C", "B", "A"]
-    actual = merge_utils._get_canonical_node_for_merge_cluster(
-        merge_cluster=input_cluster,
-        alignment_priority_order=input_alignment_priority_order,
+def test_aggregate_merges_with_several_nodes_of_the_canonical_namespace():
+    # the smallest node ID of the highest priority namespace is the canonical node
+    merges = pd.DataFrame(
+        [("A:1", "C:2"), ("C:2", "B:1"), ("B:1", "C:1"), ("D:1", "E:2"), ("D:1", "E:1")],
+        columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
     )
-    assert isinstance(actual, str)
-    assert actual == canonical_node
+    actual = merge_utils._produce_named_table_aggregated_merges(
+        merges=merges, alignment_priority_order=["C", "E", "B", "D", "A"]
+    ).dataframe
+    expected = pd.DataFrame(
+        [("A:1", "C:1"), ("B:1", "C:1"), ("C:2", "C:1"), ("D:1", "E:1"), ("E:2", "E:1")],
+        columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
+    )
+    assert np.array_equal(actual.values, expected.values) is True
 
-    # canonical cannot be found
-    actual_no_canonical = merge_utils._get_canonical_node_for_merge_cluster(
-        merge_cluster=input_cluster,
-        alignment_priority_order=["X"],
+
+def test_produce_node_priority_ranks():
+    actual = merge_utils._produce_node_priority_ranks(
+        node_ids=np.array(["A:1", "B:1", "C:1", "X:1"], dtype=object),
+        alignment_priority_order=["C", "B", "A"],
     )
-    assert actual_no_canonical is None
+    assert np.array_equal(actual, np.array([2, 1, 0, 3]))
 
 
 def test_produce_named_table_merged_nodes(example_merges):
@@ -96,6 +100,37 @@ def test_produce_named_table_merges_with_alignment_meta_data(example_merges):
     assert np.array_equal(actual.dataframe.values, expected.values) is True
 
 
+def test_merge_table_accumulator(example_merges):
+    accumulator = merge_utils.MergeTableAccumulator()
+    assert len(accumulator.produce_named_table().dataframe) == 0
+    accumulator.append(merges=pd.DataFrame([("A:1", "A:1")], columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS))
+    accumulator.clear()
+    accumulator.append(
+        merges=pd.DataFrame([("S:1", "S:1"), ("S:2", "S:2")], columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS),
+        is_seed_self_merge=True,
+    )
+    for step in [1, 2]:
+        accumulator.append(
+            merges=merge_utils.produce_named_table_merges_with_alignment_meta_data(
+                merges=example_merges.iloc[step - 1 : step + 1], source_id="FOO", step_counter=step, mapping_type="eqv"
+            ).dataframe
+        )
+    assert len(accumulator) == 6
+    expected = pd.DataFrame(
+        [
+            ("B:1", "C:1", 2, "FOO", "eqv"),
+            ("D:2", "E:2", 2, "FOO", "eqv"),
+            ("A:1", "B:1", 1, "FOO", "eqv"),
+            ("B:1", "C:1", 1, "FOO", "eqv"),
+        ],
+        columns=SCHEMA_MERGE_TABLE_WITH_META_DATA,
+    )
+    actual = accumulator.produce_named_table()
+    assert actual.name == TABLE_MERGES_WITH_META_DATA
+    assert list(actual.dataframe.columns) == list(SCHEMA_MERGE_TABLE_WITH_META_DATA)
+    assert np.array_equal(actual.dataframe.values, expected.values) is True
+
+
 def test_produce_table_unmapped_nodes():
     # input
     input_merges = pd.DataFrame(
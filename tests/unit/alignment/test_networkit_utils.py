@@ -1,7 +1,10 @@
 import pandas as pd
 
 from onto_merger.alignment.networkit_utils import NetworkitGraph
-from onto_merger.data.constants import SCHEMA_EDGE_SOURCE_TO_TARGET_IDS
+from onto_merger.data.constants import (
+    CONNECTIVITY_PATH_SEARCH_SHORTEST_PATH_TREE,
+    SCHEMA_EDGE_SOURCE_TO_TARGET_IDS,
+)
 
 
 def test_get_hierarchy_edge_for_unmapped_node():
@@ -34,3 +37,45 @@ def test_get_hierarchy_edge_for_unmapped_node():
     )
     assert isinstance(actual_3, list)
     assert actual_3 == []
+
+
+def test_get_hierarchy_edge_for_unmapped_node_shortest_path_tree():
+    background_knowledge_hierarchy_edges = pd.DataFrame(
+        [("FOO:001", "FOO:002"), ("FOO:002", "FOO:003"), ("FOO:001", "FOO:004"), ("FOO:004", "FOO:005"),
+         ("FOO:005", "FOO:003"), ("BAR:001", "BAR:002")],
+        columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS)
+    hierarchy_graph = NetworkitGraph(
+        edges=background_knowledge_hierarchy_edges,
+        path_search=CONNECTIVITY_PATH_SEARCH_SHORTEST_PATH_TREE,
+    )
+
+    # shortest path
+    assert hierarchy_graph.get_path_for_node(node_id="FOO:001") == ['FOO:001', 'FOO:002', 'FOO:003']
+    assert hierarchy_graph.get_path_for_node(node_id="FOO:004") == ['FOO:004', 'FOO:005', 'FOO:003']
+
+    # path to the other root
+    assert hierarchy_graph.get_path_for_node(node_id="BAR:001") == ['BAR:001', 'BAR:002']
+
+    # no path: root node, or no edges for input node ID
+    assert hierarchy_graph.get_path_for_node(node_id="FOO:003") == []
+    assert hierarchy_graph.get_path_for_node(node_id="FOO:00345") == []
+
+
+def test_networkit_graph_attributes():
+    background_knowledge_hierarchy_edges = pd.DataFrame(
+        [("FOO:001", "FOO:002"), ("FOO:002", "FOO:003"), ("BAR:001", "BAR:002")],
+        columns=SCHEMA_EDGE_SOURCE_TO_TARGET_IDS)
+    hierarchy_graph = NetworkitGraph(edges=background_knowledge_hierarchy_edges)
+
+    assert sorted(hierarchy_graph.root_nodes) == ["BAR:002", "FOO:003"]
+    assert len(hierarchy_graph.node_id_to_index_map) == 5
+    assert all(
+        hierarchy_graph.node_index_to_id_map[node_index] == node_id
+        for node_id, node_index in hierarchy_graph.node_id_to_index_map.items()
+    )
+    assert hierarchy_graph.graph.numberOfNodes() == 5
+    assert hierarchy_graph.graph.numberOfEdges() == 3
+    assert hierarchy_graph.graph.hasEdge(
+        hierarchy_graph.node_id_to_index_map["FOO:001"], hierarchy_graph.node_id_to_index_map["FOO:002"]
+    )
+    assert len(hierarchy_graph.search_heuristic) == 5
@@ -0,0 +1,40 @@
+"""Tests for the union_find_utils."""
+
+import numpy as np
+
+from onto_merger.alignment import union_find_utils
+
+
+def test_produce_component_labels():
+    # components: {0, 3, 5}, {1, 4}, {2}, {6, 7}
+    actual = union_find_utils.produce_component_labels(
+        source_codes=np.array([5, 4, 3, 7]),
+        target_codes=np.array([3, 1, 0, 6]),
+        node_count=8,
+    )
+    assert np.array_equal(actual, np.array([0, 1, 2, 0, 1, 0, 6, 6]))
+
+
+def test_produce_component_labels_chain():
+    # a chain where the smallest code is at the end: labels propagate over several iterations
+    actual = union_find_utils.produce_component_labels(
+        source_codes=np.array([5, 4, 3, 2, 1]),
+        target_codes=np.array([4, 3, 2, 1, 0]),
+        node_count=6,
+    )
+    assert np.array_equal(actual, np.zeros(6))
+
+
+def test_produce_component_numbers():
+    actual = union_find_utils.produce_component_numbers(labels=np.array([0, 1, 2, 0, 1, 0, 6, 6]))
+    assert np.array_equal(actual, np.array([0, 1, 2, 0, 1, 0, 3, 3]))
+
+
+def test_produce_component_representatives():
+    labels = np.array([0, 1, 2, 0, 1, 0, 6, 6])
+    node_ranks = np.array([3, 1, 0, 1, 1, 2, 5, 4])
+    actual = union_find_utils.produce_component_representatives(labels=labels, node_ranks=node_ranks)
+    assert actual[0] == 3
+    assert actual[1] == 1
+    assert actual[2] == 2
+    assert actual[6] == 7
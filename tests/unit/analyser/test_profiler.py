@@ -1,11 +1,13 @@
 """Tests for the Profiler class."""
 import os
 
+import pandas as pd
 from pandas_profiling import ProfileReport
 
 from onto_merger.analyser import pandas_profiler
-from onto_merger.data.constants import TABLES_INPUT
+from onto_merger.data.constants import COLUMN_DEFAULT_ID, TABLES_INPUT
 from onto_merger.data.data_manager import DataManager
+from onto_merger.data.dataclasses import NamedTable
 from tests.fixtures import data_manager
 
 
@@ -22,3 +24,33 @@ def test_profile_tables(data_manager: DataManager):
 def test_produce_table_report(data_manager: DataManager):
     actual = pandas_profiler.produce_table_report(table=data_manager.load_input_tables()[0])
     assert isinstance(actual, ProfileReport)
+
+
+def test_profile_tables_sampled(data_manager: DataManager):
+    tables = data_manager.load_input_tables()[0:2]
+    pandas_profiler.profile_tables(tables=tables, data_manager=data_manager, sample_row_threshold=100, worker_count=2)
+
+    for table in tables:
+        assert os.path.isfile(data_manager.get_profiled_table_report_path(table_name=table.name))
+        sampling = data_manager.load_profiled_table_sampling(table_name=table.name)
+        assert sampling["rows"] == len(table.dataframe)
+        assert sampling["profiled_rows"] < len(table.dataframe)
+        assert sampling["sampling_rate"] == sampling["profiled_rows"] / sampling["rows"]
+
+
+def test_produce_stratified_sample():
+    table = pd.DataFrame({
+        COLUMN_DEFAULT_ID: pd.Series([f"FOO:{i}" for i in range(1000)] + ["BAR:1", "BAR:2"], dtype="category"),
+    })
+    actual = pandas_profiler.produce_profiled_table(table=NamedTable("nodes", table), sample_row_threshold=100)
+    assert 100 <= len(actual.dataframe) <= 102
+    # every namespace is in the sample, the table order is kept
+    assert set(actual.dataframe[COLUMN_DEFAULT_ID].str.split(":").str[0]) == {"FOO", "BAR"}
+    assert actual.dataframe.index.is_monotonic_increasing
+    # the sample is reproducible
+    assert actual.dataframe.equals(
+        pandas_profiler.produce_profiled_table(table=NamedTable("nodes", table), sample_row_threshold=100).dataframe
+    )
+    # small tables are not sampled
+    assert pandas_profiler.produce_profiled_table(table=NamedTable("nodes", table), sample_row_threshold=0).dataframe \
+        is table
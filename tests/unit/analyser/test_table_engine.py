@@ -0,0 +1,164 @@
+"""Tests for the table engines: the Polars engine must produce the same tables as the Pandas engine."""
+
+import os
+
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from onto_merger.analyser import table_engine
+from onto_merger.analyser.table_engine import PandasTableEngine
+from onto_merger.data.constants import (
+    COLUMN_DEFAULT_ID,
+    COLUMN_RELATION,
+    COLUMN_SOURCE_ID,
+    COLUMN_TARGET_ID,
+    DIRECTORY_INPUT,
+    SCHEMA_MAPPING_TABLE,
+    TABLE_ENGINE_PANDAS,
+)
+from onto_merger.data.dataclasses import NamedTable, NodeIdDictionary
+from tests.fixtures import TEST_FOLDER_PATH
+
+
+def _load_input_table(table_name: str) -> DataFrame:
+    return pd.read_csv(os.path.join(TEST_FOLDER_PATH, DIRECTORY_INPUT, f"{table_name}.csv"))
+
+
+@pytest.fixture(params=[False, True], ids=["strings", "encoded"])
+def input_tables(request) -> dict:
+    tables = {
+        "nodes": _load_input_table(table_name="nodes"),
+        "nodes_obsolete": _load_input_table(table_name="nodes_obsolete"),
+        "mappings": _load_input_table(table_name="mappings")[SCHEMA_MAPPING_TABLE],
+    }
+    if request.param:
+        node_id_dictionary = NodeIdDictionary.from_tables(
+            tables=[NamedTable(name=name, dataframe=table) for name, table in tables.items()]
+        )
+        tables = {name: node_id_dictionary.encode_table(table=table) for name, table in tables.items()}
+    return tables
+
+
+@pytest.fixture()
+def engines():
+    pytest.importorskip("polars")
+    return PandasTableEngine(), table_engine.PolarsTableEngine()
+
+
+def _assert_same_table(expected: DataFrame, actual: DataFrame) -> None:
+    pd.testing.assert_frame_equal(
+        NodeIdDictionary.decode_table(table=expected).reset_index(drop=True).astype(object),
+        NodeIdDictionary.decode_table(table=actual).reset_index(drop=True).astype(object),
+    )
+
+
+def test_produce_table_with_namespace_column_for_node_ids(engines, input_tables):
+    for table in input_tables.values():
+        _assert_same_table(
+            *[engine.produce_table_with_namespace_column_for_node_ids(table=table) for engine in engines]
+        )
+
+
+@pytest.mark.parametrize("keep", [True, False])
+def test_filter_rows_for_values(engines, input_tables, keep):
+    node_ids = input_tables["nodes"][COLUMN_DEFAULT_ID].iloc[::3]
+    for columns in [[COLUMN_SOURCE_ID], [COLUMN_SOURCE_ID, COLUMN_TARGET_ID]]:
+        _assert_same_table(
+            *[
+                engine.filter_rows_for_values(
+                    table=input_tables["mappings"], columns=columns, values=node_ids, keep=keep
+                )
+                for engine in engines
+            ]
+        )
+    _assert_same_table(
+        *[
+            engine.filter_rows_for_values(
+                table=input_tables["mappings"], columns=[COLUMN_RELATION], values=["equivalent_to"], keep=keep
+            )
+            for engine in engines
+        ]
+    )
+    _assert_same_table(
+        *[
+            engine.filter_rows_for_values(
+                table=input_tables["mappings"], columns=[COLUMN_SOURCE_ID], values=[], keep=keep
+            )
+            for engine in engines
+        ]
+    )
+
+
+@pytest.mark.parametrize("same_namespace", [True, False])
+def test_filter_mappings_for_namespace_match(engines, input_tables, same_namespace):
+    _assert_same_table(
+        *[
+            engine.filter_mappings_for_namespace_match(mappings=input_tables["mappings"], same_namespace=same_namespace)
+            for engine in engines
+        ]
+    )
+
+
+@pytest.mark.parametrize("namespace", ["MONDO", "MESH", "FOO"])
+def test_orient_mappings_to_namespace(engines, input_tables, namespace):
+    _assert_same_table(
+        *[
+            engine.orient_mappings_to_namespace(
+                required_target_id_namespace=namespace, mappings=input_tables["mappings"]
+            )
+            for engine in engines
+        ]
+    )
+
+
+def test_partition_mappings_for_source_multiplicity(engines, input_tables):
+    expected, actual = [
+        engine.partition_mappings_for_source_multiplicity(mappings=input_tables["mappings"]) for engine in engines
+    ]
+    for expected_partition, actual_partition in zip(expected, actual):
+        _assert_same_table(expected_partition, actual_partition)
+
+
+def test_update_mappings_with_current_node_ids(engines, input_tables):
+    mappings = input_tables["mappings"]
+    obsolete_to_current = mappings[mappings[COLUMN_SOURCE_ID].isin(input_tables["nodes_obsolete"][COLUMN_DEFAULT_ID])]
+    obsolete_to_current = obsolete_to_current.drop_duplicates(subset=[COLUMN_SOURCE_ID])
+    _assert_same_table(
+        *[
+            engine.update_mappings_with_current_node_ids(
+                mappings_internal_obsolete_to_current_node_id=obsolete_to_current, mappings=mappings
+            )
+            for engine in engines
+        ]
+    )
+
+
+def test_produce_table_set_difference(engines, input_tables):
+    nodes = input_tables["nodes"]
+    for tables_to_remove in [[], [nodes.iloc[::2]], [nodes.iloc[::2], nodes.iloc[::3], input_tables["nodes_obsolete"]]]:
+        _assert_same_table(
+            *[
+                engine.produce_table_set_difference(
+                    table=nodes, tables_to_remove=tables_to_remove, columns=[COLUMN_DEFAULT_ID]
+                )
+                for engine in engines
+            ]
+        )
+    # rows that are duplicated in the table are dropped
+    nodes_with_duplicates = pd.concat([nodes, nodes.iloc[::5]])
+    _assert_same_table(
+        *[
+            engine.produce_table_set_difference(
+                table=nodes_with_duplicates, tables_to_remove=[nodes.iloc[::7]], columns=[COLUMN_DEFAULT_ID]
+            )
+            for engine in engines
+        ]
+    )
+
+
+def test_set_table_engine():
+    assert table_engine.get_table_engine().name == TABLE_ENGINE_PANDAS
+    with pytest.raises(ValueError):
+        table_engine.set_table_engine(table_engine_name="foo")
+    assert table_engine.get_table_engine().name == TABLE_ENGINE_PANDAS
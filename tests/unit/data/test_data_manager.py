@@ -21,6 +21,8 @@ from onto_merger.data.constants import (
     SCHEMA_MAPPING_TABLE,
     SCHEMA_MERGE_TABLE,
     SCHEMA_MERGE_TABLE_WITH_META_DATA,
+    STORAGE_FORMAT_CSV,
+    STORAGE_FORMAT_PARQUET,
     TABLE_EDGES_HIERARCHY,
     TABLE_MAPPINGS,
     TABLE_MERGES,
@@ -127,6 +129,65 @@ def test_save_table(data_manager: DataManager, loaded_table_mappings: NamedTable
     Path(expected_path2).unlink()
 
 
+def test_save_and_load_table_parquet(data_manager: DataManager, loaded_table_mappings: NamedTable):
+    pytest.importorskip("pyarrow")
+    data_manager.config.base_config.storage_format = STORAGE_FORMAT_PARQUET
+    assert data_manager.get_storage_format(process_directory=DIRECTORY_INPUT) == STORAGE_FORMAT_CSV
+    assert data_manager.get_storage_format(process_directory=DIRECTORY_INTERMEDIATE) == STORAGE_FORMAT_PARQUET
+
+    data_manager.save_table(table=loaded_table_mappings)
+    expected_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE, "mappings.parquet")
+    assert os.path.isfile(expected_path) is True
+
+    actual = data_manager.load_table(
+        table_name=TABLE_MAPPINGS, process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}"
+    )
+    assert actual.equals(loaded_table_mappings.dataframe)
+
+    # only the requested columns are loaded
+    actual_columns = data_manager.load_table(
+        table_name=TABLE_MAPPINGS,
+        process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}",
+        columns=SCHEMA_MAPPING_TABLE[:2],
+    )
+    assert list(actual_columns) == SCHEMA_MAPPING_TABLE[:2]
+    Path(expected_path).unlink()
+
+
+def test_load_table_with_columns(data_manager: DataManager):
+    table = pd.DataFrame(
+        [
+            ("MONDO:0000001", "MONDO:0000123", "equivalent_to", "MONDO"),
+            ("MONDO:0000002", "MONDO:0000123", "equivalent_to", "MONDO"),
+            ("MONDO:0000002", "MONDO:0000123", "equivalent_to", "MONDO"),
+        ],
+        columns=SCHEMA_MAPPING_TABLE,
+    )
+    data_manager.save_table(table=NamedTable(TABLE_MAPPINGS, table))
+    expected_path = os.path.join(TEST_FOLDER_OUTPUT_PATH, DIRECTORY_INTERMEDIATE, "mappings.csv")
+
+    # the projected rows are not de-duplicated, the full rows are
+    actual_columns = data_manager.load_table(
+        table_name=TABLE_MAPPINGS,
+        process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}",
+        columns=SCHEMA_MAPPING_TABLE[1:],
+    )
+    assert len(actual_columns) == 3
+    actual = data_manager.load_table(
+        table_name=TABLE_MAPPINGS, process_directory=f"{DIRECTORY_OUTPUT}/{DIRECTORY_INTERMEDIATE}"
+    )
+    assert len(actual) == 2
+    Path(expected_path).unlink()
+
+
+def test_save_and_load_stage_table_names(data_manager: DataManager):
+    assert data_manager.load_stage_table_names() is None
+    stage_table_names = {"input": ["nodes", "mappings"], "validation_input": []}
+    data_manager.save_stage_table_names(stage_table_names=stage_table_names)
+    assert data_manager.load_stage_table_names() == stage_table_names
+    Path(data_manager.get_stage_table_names_file_path()).unlink()
+
+
 def test_save_dropped_mappings_table(data_manager: DataManager):
     test_folder_intermediate_dropped_mappings = os.path.join(
         TEST_FOLDER_OUTPUT_PATH,
@@ -1,11 +1,17 @@
 """Tests for the data classes."""
+import tracemalloc
+from datetime import datetime
 from typing import List
 
 import numpy as np
 import pandas as pd
+import pytest
 from pandas import DataFrame
 
 from onto_merger.data.constants import (
+    COLUMN_DEFAULT_ID,
+    COLUMN_SOURCE_ID,
+    COLUMN_TARGET_ID,
     SCHEMA_ALIGNMENT_STEPS_TABLE,
     SCHEMA_DATA_REPO_SUMMARY,
     SCHEMA_MAPPING_TABLE,
@@ -17,6 +23,10 @@ from onto_merger.data.dataclasses import (
     AlignmentStep,
     DataRepository,
     NamedTable,
+    NamespaceIndex,
+    NodeIdDictionary,
+    ResourceUsage,
+    RuntimeData,
     convert_alignment_steps_to_named_table,
 )
 
@@ -115,8 +125,10 @@ def test_convert_alignment_steps_to_named_table():
     ]
     actual = convert_alignment_steps_to_named_table(alignment_steps=input_data)
     expected = pd.DataFrame(
-        [("eqv", "FOO", 1, 100, 0, 0, 0, "Aligning FOO eqv", "2022-06-06 09:37:36", "2022-06-06", "09:37:36.604905", 0),
-         ("eqv", "BAR", 2, 90, 0, 0, 0, "Aligning BAR eqv", "2022-06-06 09:37:36", "2022-06-06", "09:37:36.604935", 0)],
+        [("eqv", "FOO", 1, 100, 0, 0, 0, "Aligning FOO eqv", "2022-06-06 09:37:36", "2022-06-06", "09:37:36.604905", 0,
+          0.0, 0.0, 0.0),
+         ("eqv", "BAR", 2, 90, 0, 0, 0, "Aligning BAR eqv", "2022-06-06 09:37:36", "2022-06-06", "09:37:36.604935", 0,
+          0.0, 0.0, 0.0)],
         columns=SCHEMA_ALIGNMENT_STEPS_TABLE,
     )
     print(actual.dataframe, "\n\n")
@@ -126,3 +138,160 @@ def test_convert_alignment_steps_to_named_table():
     assert actual.name == TABLE_ALIGNMENT_STEPS_REPORT
     assert isinstance(actual.dataframe, DataFrame)
     assert np.array_equal(actual.dataframe[SCHEMA_NO_DATES].values, expected[SCHEMA_NO_DATES].values) is True
+
+
+def test_node_id_dictionary():
+    node_id_dictionary = NodeIdDictionary(node_ids=["MONDO:0000002", "MONDO:0000001", "MONDO:0000002", np.nan])
+    assert len(node_id_dictionary) == 2
+    assert list(node_id_dictionary.dtype.categories) == ["MONDO:0000001", "MONDO:0000002"]
+    assert np.array_equal(
+        node_id_dictionary.get_codes(node_ids=pd.Series(["MONDO:0000002", "FOO:1"])), np.array([1, -1])
+    )
+    assert np.array_equal(
+        node_id_dictionary.get_node_ids(codes=np.array([1, 0])), np.array(["MONDO:0000002", "MONDO:0000001"])
+    )
+
+
+def test_node_id_dictionary_encode_decode_table():
+    table = pd.DataFrame(
+        [("MONDO:0000001", "SNOMED:001", "foo"), ("MONDO:0000002", "SNOMED:001", "bar")],
+        columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID, "other"],
+    )
+    node_id_dictionary = NodeIdDictionary.from_tables(tables=[NamedTable(name=TABLE_MAPPINGS, dataframe=table)])
+    assert len(node_id_dictionary) == 3
+
+    encoded_table = node_id_dictionary.encode_table(table=table)
+    assert encoded_table[COLUMN_SOURCE_ID].dtype == node_id_dictionary.dtype
+    assert encoded_table[COLUMN_TARGET_ID].dtype == node_id_dictionary.dtype
+    assert encoded_table["other"].dtype == object
+    assert table[COLUMN_SOURCE_ID].dtype == object
+    assert np.array_equal(node_id_dictionary.get_codes(node_ids=encoded_table[COLUMN_TARGET_ID]), np.array([2, 2]))
+
+    decoded_table = NodeIdDictionary.decode_table(table=encoded_table)
+    assert decoded_table[COLUMN_SOURCE_ID].dtype == object
+    assert decoded_table.equals(table)
+
+    with pytest.raises(ValueError):
+        node_id_dictionary.encode_table(
+            table=pd.DataFrame([("FOO:1", "SNOMED:001")], columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID])
+        )
+
+
+def test_node_id_dictionary_namespaces():
+    node_id_dictionary = NodeIdDictionary(node_ids=["SNOMED:001", "MONDO:0000001", "MONDO:0000002"])
+    assert list(node_id_dictionary.namespace_dtype.categories) == ["MONDO", "SNOMED"]
+    assert np.array_equal(node_id_dictionary.namespace_codes, np.array([0, 0, 1]))
+    assert np.array_equal(
+        node_id_dictionary.get_namespace_codes(node_ids=pd.Series(["SNOMED:001", "FOO:1", np.nan])),
+        np.array([1, -1, -1]),
+    )
+    assert node_id_dictionary.get_namespace_code(namespace="SNOMED") == 1
+    assert node_id_dictionary.get_namespace_code(namespace="FOO") == -1
+
+
+def test_namespace_index():
+    mappings = pd.DataFrame(
+        [
+            ("SNOMED:001", "MONDO:0000001"),
+            ("MONDO:0000002", "FOOBAR:1"),
+            ("SNOMED:002", "FOOBAR:1"),
+            ("MONDO:0000001", "SNOMED:002"),
+        ],
+        columns=[COLUMN_SOURCE_ID, COLUMN_TARGET_ID],
+    )
+    node_id_dictionary = NodeIdDictionary.from_tables(tables=[NamedTable(name=TABLE_MAPPINGS, dataframe=mappings)])
+    namespace_index = NamespaceIndex(
+        table=node_id_dictionary.encode_table(table=mappings), node_id_dictionary=node_id_dictionary
+    )
+    assert np.array_equal(namespace_index.get_row_positions(namespace="MONDO"), np.array([0, 1, 3]))
+    assert np.array_equal(
+        namespace_index.get_row_positions(namespace="SNOMED", columns=[COLUMN_SOURCE_ID]), np.array([0, 2])
+    )
+    assert np.array_equal(namespace_index.get_row_positions(namespace="FOOBAR"), np.array([1, 2]))
+    assert len(namespace_index.get_row_positions(namespace="UMLS")) == 0
+
+
+def test_data_repository_namespace_index():
+    nodes = pd.DataFrame(["MONDO:0000001", "SNOMED:001"], columns=[COLUMN_DEFAULT_ID])
+    data_repo = DataRepository()
+    data_repo.update(table=NamedTable(name="nodes", dataframe=nodes))
+    assert data_repo.get_namespace_index(table_name="nodes") is None
+
+    data_repo.node_id_dictionary = NodeIdDictionary(node_ids=nodes[COLUMN_DEFAULT_ID])
+    data_repo.update(table=NamedTable(name="nodes", dataframe=nodes))
+    namespace_index = data_repo.get_namespace_index(table_name="nodes")
+    assert np.array_equal(namespace_index.get_row_positions(namespace="SNOMED"), np.array([1]))
+    assert data_repo.get_namespace_index(table_name="nodes") is namespace_index
+    data_repo.update(table=NamedTable(name="nodes", dataframe=nodes))
+    assert data_repo.get_namespace_index(table_name="nodes") is not namespace_index
+
+
+def test_data_repository_memory_usage():
+    nodes = pd.DataFrame(["MONDO:0000001", "SNOMED:001"], columns=[COLUMN_DEFAULT_ID])
+    data_repo = DataRepository()
+    data_repo.node_id_dictionary = NodeIdDictionary(node_ids=nodes[COLUMN_DEFAULT_ID])
+    assert data_repo.get_memory_usage() == 0
+
+    data_repo.update(table=NamedTable(name="nodes", dataframe=nodes))
+    memory_usage = data_repo.get_memory_usage()
+    assert memory_usage > 0
+
+    # the node ID dictionary categories are shared, so only the codes and the index are added
+    data_repo.update(table=NamedTable(name="nodes_copy", dataframe=nodes))
+    nodes_copy = data_repo.get("nodes_copy").dataframe
+    assert data_repo.get_memory_usage() == (
+        memory_usage + nodes_copy[COLUMN_DEFAULT_ID].cat.codes.nbytes + nodes_copy.index.memory_usage()
+    )
+
+    # the memory usage of a table is measured again when the table is updated
+    data_repo.update(table=NamedTable(name="nodes_copy", dataframe=nodes.head(1)))
+    nodes_copy = data_repo.get("nodes_copy").dataframe
+    assert data_repo.get_memory_usage() == (
+        memory_usage + nodes_copy[COLUMN_DEFAULT_ID].cat.codes.nbytes + nodes_copy.index.memory_usage()
+    )
+
+
+def test_runtime_data_from_resource_usage():
+    start = ResourceUsage(
+        date_time=datetime(2022, 1, 1, 10, 0, 0),
+        cpu_user=1.0,
+        cpu_system=0.5,
+        peak_rss_mb=100.0,
+        dataframe_memory_mb=20.0,
+    )
+    end = ResourceUsage(
+        date_time=datetime(2022, 1, 1, 10, 0, 30),
+        cpu_user=11.0,
+        cpu_system=0.75,
+        peak_rss_mb=250.0,
+        dataframe_memory_mb=25.5,
+    )
+    actual = RuntimeData.from_resource_usage(task="foo", start=start, end=end)
+    assert actual.task == "foo"
+    assert actual.elapsed == 30.0
+    assert actual.cpu_user == 10.0
+    assert actual.cpu_system == 0.25
+    assert actual.peak_rss_mb == 250.0
+    assert actual.dataframe_memory_delta_mb == 5.5
+    assert actual.top_allocations == ""
+
+
+def test_resource_usage_measure():
+    data_repo = DataRepository()
+    data_repo.update(table=NamedTable(name="nodes", dataframe=pd.DataFrame(["MONDO:0000001"], columns=["id"])))
+    actual = ResourceUsage.measure()
+    assert actual.peak_rss_mb > 0
+    assert actual.dataframe_memory_mb == 0.0
+    assert actual.memory_snapshot is None
+
+    tracemalloc.start()
+    try:
+        start = ResourceUsage.measure(data_repo=data_repo)
+        allocated = [np.ones(1 << 18) for _ in range(4)]  # noqa: F841
+        end = ResourceUsage.measure(data_repo=data_repo)
+    finally:
+        tracemalloc.stop()
+    assert start.dataframe_memory_mb > 0
+    assert start.memory_snapshot is not None
+    top_allocations = RuntimeData.from_resource_usage(task="foo", start=start, end=end).top_allocations
+    assert top_allocations.split("; ")[0].endswith("(+8.0 MB)")
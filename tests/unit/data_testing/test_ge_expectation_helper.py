@@ -66,7 +66,8 @@ def test_produce_edge_table_expectations(alignment_config):
         table_name=TABLE_MERGES, alignment_config=alignment_config
     )
     expectation_list_type_check(actual=actual)
-    assert len(actual) == 31
+    # the source to target namespace expectations are produced once (not for each node ID column)
+    assert len(actual) == 26
 
 
 def test_get_column_set_for_edge_table():
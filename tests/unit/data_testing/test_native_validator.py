@@ -0,0 +1,170 @@
+"""Tests for the native validation engine."""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from onto_merger.analyser.analysis_utils import add_namespace_column_to_loaded_tables
+from onto_merger.data.constants import DIRECTORY_INPUT, VALIDATION_ENGINE_NATIVE
+from onto_merger.data.data_manager import DataManager
+from onto_merger.data.dataclasses import AlignmentConfig
+from onto_merger.data_testing.ge_expectation_helper import (
+    ExpectationConfiguration,
+    produce_expectation_config_column_value_lengths_to_be_between,
+    produce_expectation_config_column_values_to_be_unique,
+    produce_expectation_config_column_values_to_match_regex,
+    produce_expectation_config_column_values_to_not_be_null,
+    produce_expectation_config_expect_column_values_to_be_in_set,
+)
+from onto_merger.data_testing.native_validator import (
+    NativeValidator,
+    evaluate_expectation,
+)
+from tests.fixtures import alignment_config, data_manager
+
+
+def test_run_data_tests_empty(alignment_config: AlignmentConfig, data_manager: DataManager):
+    actual = NativeValidator(
+        alignment_config=alignment_config,
+        data_tests_directory=data_manager.get_data_tests_path(),
+        data_manager=data_manager,
+    ).run_data_tests(named_tables=[], data_origin="FOO")
+    assert actual is None
+
+
+def test_run_data_tests(alignment_config: AlignmentConfig, data_manager: DataManager):
+    actual = NativeValidator(
+        alignment_config=alignment_config,
+        data_tests_directory=data_manager.get_data_tests_path(),
+        data_manager=data_manager,
+    ).run_data_tests(named_tables=data_manager.load_input_tables()[0:1], data_origin="FOO")
+    assert isinstance(actual, pd.DataFrame)
+    assert len(actual) == 1
+    assert actual["directory_name"].iloc[0] == "FOO"
+    assert actual["nb_validations"].iloc[0] > 0
+    assert actual["validation_engine"].iloc[0] == VALIDATION_ENGINE_NATIVE
+    assert len(os.listdir(os.path.join(data_manager.get_data_tests_path(), "expectations"))) == 1
+    assert len(os.listdir(data_manager.get_ge_json_validations_folder_path())) == 1
+
+
+def test_run_data_tests_matches_great_expectations(alignment_config: AlignmentConfig, data_manager: DataManager):
+    pytest.importorskip("great_expectations")
+    from onto_merger.data_testing.ge_runner import GERunner
+
+    # the input tables are validated with the namespace columns
+    named_tables = add_namespace_column_to_loaded_tables(tables=data_manager.load_input_tables())
+    expected = GERunner(
+        alignment_config=alignment_config,
+        ge_base_directory=data_manager.get_data_tests_path(),
+        data_manager=data_manager,
+    ).run_ge_tests(named_tables=named_tables, data_origin=DIRECTORY_INPUT)
+    shutil.rmtree(data_manager.get_data_tests_path())
+    actual = NativeValidator(
+        alignment_config=alignment_config,
+        data_tests_directory=data_manager.get_data_tests_path(),
+        data_manager=data_manager,
+    ).run_data_tests(named_tables=named_tables, data_origin=DIRECTORY_INPUT)
+
+    # the results tables only differ in the engine columns
+    compared_columns = [
+        "table_name", "directory_name", "nb_validations", "success_percent", "nb_failed_validations", "success"
+    ]
+    assert len(actual) == len(named_tables)
+    pd.testing.assert_frame_equal(
+        actual[compared_columns].sort_values("table_name", ignore_index=True),
+        expected[compared_columns].sort_values("table_name", ignore_index=True),
+    )
+
+
+def test_evaluate_expectation():
+    table = pd.DataFrame(
+        {
+            "default_id": pd.Series(["MONDO:0000001", "MONDO:0000001", "FOO", None], dtype="category"),
+            "relation": ["equivalentTo", "equivalentTo", "equivalentTo", "foo"],
+            "count": [3, 2, 2, 1],
+        }
+    )
+    category_masks: dict = {}
+    expectations_and_unexpected_counts = [
+        (produce_expectation_config_column_values_to_not_be_null(column_name="default_id"), 1),
+        (produce_expectation_config_column_values_to_be_unique(column_name="default_id"), 2),
+        (produce_expectation_config_column_values_to_match_regex(column_name="default_id", regex="^\\w+:\\S+$"), 1),
+        (produce_expectation_config_column_value_lengths_to_be_between("default_id", min_value=4, max_value=25), 1),
+        (produce_expectation_config_expect_column_values_to_be_in_set("relation", value_set=["equivalentTo"]), 1),
+        (
+            ExpectationConfiguration(
+                expectation_type="expect_column_values_to_be_between",
+                kwargs={"column": "count", "min_value": 2, "max_value": None},
+            ),
+            1,
+        ),
+        (
+            ExpectationConfiguration(
+                expectation_type="expect_column_values_to_be_decreasing", kwargs={"column": "count"}
+            ),
+            0,
+        ),
+    ]
+    for expectation, unexpected_count in expectations_and_unexpected_counts:
+        actual = evaluate_expectation(table=table, expectation=expectation, category_masks=category_masks)
+        assert actual["success"] is (unexpected_count == 0)
+        assert actual["result"]["unexpected_count"] == unexpected_count
+    assert len(category_masks) == 2
+
+    # the stored category masks are reused
+    regex_expectation = produce_expectation_config_column_values_to_match_regex(column_name="default_id", regex="^F")
+    for _ in range(2):
+        actual = evaluate_expectation(table=table, expectation=regex_expectation, category_masks=category_masks)
+        assert actual["result"]["unexpected_count"] == 2
+    assert len(category_masks) == 3
+
+    # at least half of the values are expected
+    in_set_expectation = ExpectationConfiguration(
+        expectation_type="expect_column_values_to_be_in_set",
+        kwargs={"column": "relation", "value_set": ["equivalentTo"], "mostly": 0.5},
+    )
+    actual = evaluate_expectation(table=table, expectation=in_set_expectation)
+    assert actual["success"] is True
+    assert actual["result"]["unexpected_count"] == 1
+    in_set_expectation.kwargs["mostly"] = 0.9
+    assert evaluate_expectation(table=table, expectation=in_set_expectation)["success"] is False
+
+
+def test_evaluate_expectation_fails():
+    table = pd.DataFrame({"default_id": ["MONDO:0000001"], "count": [np.int64(1)]})
+
+    # missing column
+    actual = evaluate_expectation(
+        table=table, expectation=produce_expectation_config_column_values_to_not_be_null(column_name="foo")
+    )
+    assert actual["success"] is False
+    assert actual["exception_info"]["raised_exception"] is True
+
+    # values that cannot be compared
+    actual = evaluate_expectation(
+        table=table,
+        expectation=ExpectationConfiguration(
+            expectation_type="expect_column_values_to_be_between",
+            kwargs={"column": "default_id", "min_value": 0, "max_value": None},
+        ),
+    )
+    assert actual["success"] is False
+
+    # column types
+    for column_name, type_, expected in [
+        ("default_id", "object", True),
+        ("count", "int64", True),
+        ("default_id", "int64", False),
+        ("count", "object", False),
+    ]:
+        actual = evaluate_expectation(
+            table=table,
+            expectation=ExpectationConfiguration(
+                expectation_type="expect_column_values_to_be_of_type",
+                kwargs={"column": column_name, "type_": type_},
+            ),
+        )
+        assert actual["success"] is expected
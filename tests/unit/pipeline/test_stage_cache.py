@@ -0,0 +1,124 @@
+import gc
+import os
+import time
+import weakref
+
+import pandas as pd
+
+from onto_merger.data.constants import SCHEMA_MAPPING_TABLE, TABLE_MAPPINGS
+from onto_merger.data.dataclasses import NamedTable, NodeIdDictionary
+from onto_merger.pipeline.stage_cache import StageCache
+
+
+def _produce_mappings() -> NamedTable:
+    return NamedTable(
+        TABLE_MAPPINGS,
+        pd.DataFrame(
+            [("MONDO:0000004", "MONDO:0000123", "equivalent_to", "MONDO")],
+            columns=SCHEMA_MAPPING_TABLE,
+        ),
+    )
+
+
+def test_produce_fingerprint(tmp_path):
+    stage_cache = StageCache(cache_folder_path=str(tmp_path), max_size_bytes=1 << 20)
+    mappings = _produce_mappings()
+    fingerprint = stage_cache.produce_fingerprint(stage_name="foo", config={"a": 1}, tables=[mappings])
+    assert fingerprint == stage_cache.produce_fingerprint(
+        stage_name="foo", config={"a": 1}, tables=[NamedTable(mappings.name, mappings.dataframe.copy())]
+    )
+
+    # encoded tables have the same fingerprint in every run
+    node_id_dictionary = NodeIdDictionary.from_tables(tables=[mappings])
+    encoded_mappings = NamedTable(mappings.name, node_id_dictionary.encode_table(table=mappings.dataframe))
+    assert stage_cache.produce_fingerprint(stage_name="foo", config={"a": 1}, tables=[encoded_mappings]) == StageCache(
+        cache_folder_path=str(tmp_path), max_size_bytes=1 << 20
+    ).produce_fingerprint(stage_name="foo", config={"a": 1}, tables=[encoded_mappings])
+
+    # stage, config and table content changes
+    assert fingerprint != stage_cache.produce_fingerprint(stage_name="bar", config={"a": 1}, tables=[mappings])
+    assert fingerprint != stage_cache.produce_fingerprint(stage_name="foo", config={"a": 2}, tables=[mappings])
+    changed_mappings = mappings.dataframe.copy()
+    changed_mappings["relation"] = "xref"
+    assert fingerprint != stage_cache.produce_fingerprint(
+        stage_name="foo", config={"a": 1}, tables=[NamedTable(mappings.name, changed_mappings)]
+    )
+
+    # ignored columns
+    assert stage_cache.produce_fingerprint(
+        stage_name="foo", config={}, tables=[mappings], ignored_columns=["relation"]
+    ) == stage_cache.produce_fingerprint(
+        stage_name="foo", config={}, tables=[NamedTable(mappings.name, changed_mappings)], ignored_columns=["relation"]
+    )
+
+
+def test_table_digests_do_not_keep_tables_alive(tmp_path):
+    stage_cache = StageCache(cache_folder_path=str(tmp_path), max_size_bytes=1 << 20)
+    mappings = _produce_mappings()
+    stage_cache.produce_fingerprint(stage_name="foo", config={}, tables=[mappings])
+    assert len(stage_cache._table_digests) == 1
+
+    table_reference = weakref.ref(mappings.dataframe)
+    del mappings
+    gc.collect()
+    assert table_reference() is None
+    assert stage_cache._table_digests == {}
+
+
+def test_save_and_load(tmp_path):
+    output_path = tmp_path / "output"
+    output_path.mkdir()
+    stage_cache = StageCache(cache_folder_path=str(tmp_path / "cache"), max_size_bytes=1 << 20)
+    snapshot_before = StageCache.produce_file_snapshot(folder_path=str(output_path), excluded_folder_paths=[])
+    (output_path / "sub").mkdir()
+    (output_path / "sub" / "foo.txt").write_text("foo")
+    files = StageCache.get_written_files(
+        snapshot_before=snapshot_before,
+        snapshot_after=StageCache.produce_file_snapshot(folder_path=str(output_path), excluded_folder_paths=[]),
+    )
+    assert files == [os.path.join("sub", "foo.txt")]
+
+    assert stage_cache.load(stage_name="foo", fingerprint="abc") is None
+    stage_cache.save(
+        stage_name="foo",
+        fingerprint="abc",
+        tables=[_produce_mappings()],
+        folder_path=str(output_path),
+        files=files,
+        state={"alignment_priority_order": ["MONDO"]},
+    )
+    entry = stage_cache.load(stage_name="foo", fingerprint="abc")
+    assert entry is not None
+    assert [table.name for table in entry.tables] == [TABLE_MAPPINGS]
+    assert entry.tables[0].dataframe.equals(_produce_mappings().dataframe)
+    assert entry.state == {"alignment_priority_order": ["MONDO"]}
+
+    restored_path = tmp_path / "restored"
+    stage_cache.restore_files(entry=entry, folder_path=str(restored_path))
+    assert (restored_path / "sub" / "foo.txt").read_text() == "foo"
+
+
+def test_evict(tmp_path):
+    output_path = tmp_path / "output"
+    output_path.mkdir()
+    (output_path / "large.txt").write_text("x" * 3000)
+    stage_cache = StageCache(cache_folder_path=str(tmp_path / "cache"), max_size_bytes=8000)
+    for fingerprint in ["a", "b"]:
+        stage_cache.save(
+            stage_name="foo",
+            fingerprint=fingerprint,
+            tables=[],
+            folder_path=str(output_path),
+            files=["large.txt"],
+            state={},
+        )
+        time.sleep(0.01)
+
+    # "a" is used more recently than "b", so "b" is evicted when "c" is added
+    assert stage_cache.load(stage_name="foo", fingerprint="a") is not None
+    stage_cache.save(
+        stage_name="foo", fingerprint="c", tables=[], folder_path=str(output_path), files=["large.txt"], state={}
+    )
+    assert stage_cache.load(stage_name="foo", fingerprint="a") is not None
+    assert stage_cache.load(stage_name="foo", fingerprint="b") is None
+    assert stage_cache.load(stage_name="foo", fingerprint="c") is not None
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from onto_merger.pipeline.stage_scheduler import StageScheduler
+
+
+def _produce_stage(stage_name: str, log: list, duration: float = 0.0):
+    def stage():
+        log.append(f"{stage_name}_start")
+        time.sleep(duration)
+        log.append(f"{stage_name}_end")
+
+    return stage
+
+
+def test_run_sequential():
+    log = []
+    scheduler = StageScheduler(worker_count=1)
+    scheduler.add_stage(stage_name="a", stage=_produce_stage("a", log))
+    scheduler.add_stage(stage_name="b", stage=_produce_stage("b", log), dependencies=["a"])
+    scheduler.add_stage(stage_name="c", stage=_produce_stage("c", log), dependencies=["a"])
+    scheduler.run()
+    assert log == ["a_start", "a_end", "b_start", "b_end", "c_start", "c_end"]
+
+
+def test_run_concurrent():
+    log = []
+    scheduler = StageScheduler(worker_count=2)
+    scheduler.add_stage(stage_name="a", stage=_produce_stage("a", log))
+    scheduler.add_stage(stage_name="b", stage=_produce_stage("b", log, duration=0.2), dependencies=["a"])
+    scheduler.add_stage(stage_name="c", stage=_produce_stage("c", log, duration=0.2), dependencies=["a"])
+    scheduler.add_stage(stage_name="d", stage=_produce_stage("d", log), dependencies=["b", "c"])
+    scheduler.run()
+    assert log[0:2] == ["a_start", "a_end"]
+    # the independent stages overlap
+    assert sorted(log[2:4]) == ["b_start", "c_start"]
+    assert log[6:8] == ["d_start", "d_end"]
+
+
+def test_run_concurrent_fails():
+    log = []
+    c_is_running = threading.Event()
+
+    def failing_stage():
+        c_is_running.wait(timeout=5)
+        raise ValueError("foo")
+
+    def slow_stage():
+        c_is_running.set()
+        _produce_stage("c", log, duration=0.2)()
+
+    scheduler = StageScheduler(worker_count=2)
+    scheduler.add_stage(stage_name="a", stage=_produce_stage("a", log))
+    scheduler.add_stage(stage_name="b", stage=failing_stage, dependencies=["a"])
+    scheduler.add_stage(stage_name="c", stage=slow_stage, dependencies=["a"])
+    scheduler.add_stage(stage_name="d", stage=_produce_stage("d", log), dependencies=["b", "c"])
+    with pytest.raises(ValueError, match="foo"):
+        scheduler.run()
+    # the running stage is finished, the dependent stage is not started
+    assert log == ["a_start", "a_end", "c_start", "c_end"]
+
+
+def test_add_stage_fails():
+    scheduler = StageScheduler()
+    scheduler.add_stage(stage_name="a", stage=lambda: None)
+    with pytest.raises(ValueError):
+        scheduler.add_stage(stage_name="a", stage=lambda: None)
+    with pytest.raises(ValueError):
+        scheduler.add_stage(stage_name="b", stage=lambda: None, dependencies=["c"])
@@ -0,0 +1,62 @@
+"""Startup checks of the command line interface: heavy libraries are not imported at startup."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from onto_merger.data.constants import DIRECTORY_INPUT, FILE_NAME_CONFIG_JSON
+from tests.fixtures import TEST_FOLDER_PATH
+
+# the libraries that are only imported when the stage using them runs
+HEAVY_MODULES = ["great_expectations", "pandas_profiling", "plotly", "kaleido", "networkit", "networkx", "jinja2"]
+
+_CHECK_LOADED_MODULES = f"""
+import sys
+print("loaded:" + ",".join(module for module in {HEAVY_MODULES} if module in sys.modules))
+"""
+
+
+def _run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=os.path.abspath("."), timeout=120
+    )
+
+
+def _get_loaded_heavy_modules(result: subprocess.CompletedProcess) -> str:
+    return result.stdout.strip().splitlines()[-1][len("loaded:") :]
+
+
+def test_version_startup():
+    result = subprocess.run(
+        [sys.executable, "-m", "onto_merger.main", "-v"], capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("OntoMerger v.")
+
+    result = _run_python("import onto_merger.main" + _CHECK_LOADED_MODULES)
+    assert result.returncode == 0, result.stderr
+    assert _get_loaded_heavy_modules(result) == ""
+
+
+def test_config_validation_startup(tmp_path):
+    os.makedirs(tmp_path / DIRECTORY_INPUT)
+    with open(os.path.join(TEST_FOLDER_PATH, DIRECTORY_INPUT, FILE_NAME_CONFIG_JSON)) as config_file:
+        config = json.load(config_file)
+    config["stage_worker_count"] = 0
+    with open(tmp_path / DIRECTORY_INPUT / FILE_NAME_CONFIG_JSON, "w") as config_file:
+        json.dump(config, config_file)
+
+    result = _run_python(f"""
+from onto_merger.main import main
+try:
+    main(project_folder_path={str(tmp_path)!r})
+except Exception:
+    pass
+else:
+    raise AssertionError("The invalid configuration was accepted.")
+""" + _CHECK_LOADED_MODULES)
+    shutil.rmtree(tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert _get_loaded_heavy_modules(result) == ""